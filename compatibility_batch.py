@@ -0,0 +1,146 @@
+import json
+import os
+
+from compatibility_engine import FILTER_FIELDS, CompatibilityEngine, Filters
+
+# Batch resolution of many environment specs (partial pins of torch, python,
+# CUDA, ...), read from JSONL (one object per line) or CSV (one column per
+# filter). Values are versions, PEP 440 specifier sets (">=2.8,<2.11") or,
+# in JSONL, lists of either. One JSON record is streamed per input spec, in
+# input order:
+#
+#   {"line": 3, "spec": {...}, "matches": 2, "combinations": [...]}
+#   {"line": 4, "spec": {...}, "error": "unknown filter 'cudnn'"}
+#
+# Identical specs are resolved once. Unique specs are spread over a process
+# pool in chunks; every worker resolves against one engine built when the
+# worker starts (inherited from the parent where processes are forked).
+
+SPEC_KEYS = FILTER_FIELDS + ("windows_only",)
+
+BATCH_CHUNK_SIZE = 64
+# A warm engine resolves and serializes one spec in about a millisecond;
+# starting a pool and pickling the results back costs tens of milliseconds
+# with fork and half a second where workers are spawned and load the data
+# themselves, so small batches stay in this process
+INLINE_LIMIT = 256
+WRITE_EVERY = 256
+
+_engine = None
+
+
+def _spec_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        # Multi-value selection, joined by Filters.from_selection
+        return [_spec_value(v) for v in value]
+    return value if isinstance(value, str) else str(value)
+
+
+def spec_to_filters(spec):
+    unknown = [key for key in spec if key not in SPEC_KEYS]
+    if unknown:
+        raise ValueError(f"unknown filter {unknown[0]!r}")
+    windows_only = spec.get("windows_only", False)
+    if isinstance(windows_only, (list, tuple, dict)):
+        raise ValueError("windows_only takes a single value")
+    if isinstance(windows_only, str):
+        windows_only = windows_only.strip().lower() in ("1", "true", "yes", "y")
+    return Filters.from_selection(
+        windows_only=windows_only,
+        **{field: _spec_value(spec.get(field)) for field in FILTER_FIELDS}).check_specifiers()
+
+
+def read_specs(path):
+    # Yields (line number, spec dict or None, error text or None)
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            import csv
+            reader = csv.DictReader(f)
+            for spec in reader:
+                yield reader.line_num, {k: v for k, v in spec.items() if k is not None}, None
+            return
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                spec = json.loads(line)
+            except ValueError as e:
+                yield number, None, f"invalid JSON: {e}"
+                continue
+            if isinstance(spec, dict):
+                yield number, spec, None
+            else:
+                yield number, None, "spec must be a JSON object"
+
+
+def _init_worker():
+    global _engine
+    if _engine is None:
+        _engine = CompatibilityEngine()
+
+
+def _resolve(filters):
+    # Runs in the workers; returns the serialized combinations so the
+    # encoding work is parallel too
+    rows = _engine.resolve(filters)
+    return len(rows), json.dumps([row.as_json() for row in rows])
+
+
+def _resolve_all(unique, processes):
+    global _engine
+    if _engine is None:
+        _engine = CompatibilityEngine()
+    if processes == 1 or len(unique) < INLINE_LIMIT:
+        return map(_resolve, unique), None
+    import multiprocessing
+    pool = multiprocessing.Pool(processes, initializer=_init_worker)
+    return pool.imap(_resolve, unique, chunksize=BATCH_CHUNK_SIZE), pool
+
+
+def resolve_batch(specs, processes=None):
+    # specs: iterable of (line, spec, error) as produced by read_specs.
+    # Yields one JSON text line per spec, in input order.
+    entries = []
+    unique = {}
+    for line, spec, error in specs:
+        filters = None
+        if error is None:
+            try:
+                filters = spec_to_filters(spec)
+            except ValueError as e:
+                error = str(e)
+        if filters is not None:
+            filters = unique.setdefault(filters, len(unique))
+        entries.append((line, spec, error, filters))
+
+    results, pool = _resolve_all(list(unique), processes or os.cpu_count() or 1)
+    resolved = []
+    try:
+        for line, spec, error, index in entries:
+            head = json.dumps({"line": line, "spec": spec})[:-1]
+            if error is not None:
+                yield f'{head}, "error": {json.dumps(error)}}}'
+                continue
+            # Unique specs are numbered in order of first appearance, so the
+            # one needed here is at most one past those already received
+            while len(resolved) <= index:
+                resolved.append(next(results))
+            matches, combinations = resolved[index]
+            yield f'{head}, "matches": {matches}, "combinations": {combinations}}}'
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+
+def write_batch(lines, out):
+    # Chunked output: one write per WRITE_EVERY records
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= WRITE_EVERY:
+            out.write("\n".join(chunk) + "\n")
+            chunk = []
+    if chunk:
+        out.write("\n".join(chunk) + "\n")
@@ -0,0 +1,211 @@
+import os
+import pickle
+from collections import namedtuple
+
+from compatibility_versions import Version, intern_versions
+
+# The tables live in compatibility_data.json so a data refresh doesn't need
+# a code change. The parsed records and indexes are pickled next to
+# settings.ini and reused until the JSON file's content changes.
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(DATA_DIR, "compatibility_data.json")
+CACHE_PATH = os.path.join(DATA_DIR, "compatibility_data.cache")
+
+DATA_FORMAT = 1
+# Bump when the records or indexes change shape so old caches are ignored
+CACHE_FORMAT = 2
+
+TABLES = ("torch_cuda", "torch_python_triton", "torch_ecosystem", "flash_attention",
+          "fa2_windows_wheels", "xformers", "bitsandbytes", "cuda_metapackages")
+
+# Row types for the tables. The JSON rows are plain objects;
+# build_indexes() turns them into these tuple-backed records.
+TorchCudaBuild = namedtuple("TorchCudaBuild", ("torch", "wheel", "cuda", "cudnn", "windows"),
+                            defaults=(True,))
+TorchPythonTriton = namedtuple("TorchPythonTriton", ("torch", "cuda_versions", "python", "triton",
+                                                     "triton_compat", "sympy"))
+FlashAttentionBuild = namedtuple("FlashAttentionBuild", ("fa2", "python", "torch", "cuda", "assumed"),
+                                 defaults=(False,))
+XformersRelease = namedtuple("XformersRelease", ("xformers", "torch", "fa2", "cuda", "notes", "torch_min"),
+                             defaults=("", False))
+BitsandbytesRelease = namedtuple("BitsandbytesRelease", ("bnb", "cuda", "python", "assumed_cuda"),
+                                 defaults=((),))
+
+
+def _fields(row):
+    return row._asdict() if hasattr(row, "_asdict") else dict(row)
+
+
+def cuda_family(cuda_version):
+    # "12.8.1" -> "12.8"
+    return Version(cuda_version).family
+
+
+def dump_pickle(path, obj):
+    # Pickles obj to path through a temporary file swapped in by os.replace,
+    # so a concurrent reader sees the old file or the new one, never half of
+    # one. Returns False when the location isn't writable.
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(obj, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+class CompatibilityData:
+    def __init__(self, path=DATA_PATH, cache_path=CACHE_PATH):
+        self.path = path
+        self.cache_path = cache_path
+        self.generation = 0
+        self.load()
+
+    def load(self):
+        # (Re)load the tables, from the compiled cache when it is current:
+        # same size and mtime as the data file, or failing that, same content
+        cached = self._read_cache()
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            stamp = (stat.st_size, stat.st_mtime_ns)
+            if cached is not None and cached[0]["stamp"] == stamp:
+                self.__dict__.update(cached[1])
+                self.generation += 1
+                return
+            raw = f.read()
+
+        # Only needed when the cache is stale; kept out of the import path
+        # so command line startup stays fast
+        import hashlib
+        import json
+
+        content_hash = hashlib.sha256(raw).hexdigest()
+        if cached is not None and cached[0]["content_hash"] == content_hash:
+            # Same content with a new mtime, e.g. a fresh checkout
+            self.__dict__.update(cached[1])
+            self.generation += 1
+        else:
+            self.apply_tables(json.loads(raw.decode("utf-8")), content_hash)
+        self._write_cache(stamp)
+
+    def apply_tables(self, document, content_hash=None):
+        if document.get("format") != DATA_FORMAT:
+            raise ValueError(f"Unsupported compatibility data format: {document.get('format')!r}")
+        self.data_version = document.get("data_version", "")
+        self.content_hash = content_hash
+        self.windows_notes = document.get("windows_notes", "")
+        self.notes = document.get("notes", {})
+        for table in TABLES:
+            setattr(self, table, document[table])
+        # (fa2_version, cu_moniker, torch_build_version) -> [python_versions]
+        self.fa2_windows_wheels = {
+            (row["fa2"], row["wheel"], row["torch"]): row["python"] for row in self.fa2_windows_wheels}
+        self.build_indexes()
+
+    def _cache_state(self):
+        return {k: v for k, v in self.__dict__.items() if k not in ("path", "cache_path", "generation")}
+
+    def _read_cache(self):
+        # (header, state) from the compiled cache, or None if it is missing,
+        # unreadable or written by an incompatible version
+        if not self.cache_path:
+            return None
+        try:
+            with open(self.cache_path, "rb") as f:
+                header, state = pickle.load(f)
+        except Exception:
+            return None
+        if header.get("format") != (CACHE_FORMAT, DATA_FORMAT):
+            return None
+        return header, state
+
+    def _write_cache(self, stamp):
+        if not self.cache_path:
+            return
+        header = {"format": (CACHE_FORMAT, DATA_FORMAT), "stamp": stamp, "content_hash": self.content_hash}
+        # A read-only install location just parses the JSON next time
+        dump_pickle(self.cache_path, (header, self._cache_state()))
+
+    def build_indexes(self):
+        # Hash indexes over the tables so the engine never rescans a
+        # whole table per result row. Rebuild after editing any table; the
+        # generation bump tells engines to drop their cached results.
+        self.generation += 1
+        self.build_records()
+
+        self.triton_by_torch = {}
+        for pt in self.torch_python_triton:
+            self.triton_by_torch.setdefault(pt.torch, []).append(pt)
+
+        self.fa2_by_torch_python_cuda = {}
+        for fa in self.flash_attention:
+            self.fa2_by_torch_python_cuda.setdefault((fa.torch, fa.python, fa.cuda), []).append(fa)
+
+        self.bnb_by_cuda_family = {}
+        for bnb in self.bitsandbytes:
+            for family in {c.family for c in bnb.cuda}:
+                self.bnb_by_cuda_family.setdefault(family, []).append(bnb)
+
+        # (component, version) -> CUDA releases shipping it, to match an
+        # installed set of nvidia-* wheels back to its release
+        self.cuda_releases_by_component = {}
+        for cuda, packages in self.cuda_metapackages.items():
+            for pkg, ver in packages.items():
+                self.cuda_releases_by_component.setdefault((pkg, ver), []).append(cuda)
+
+        self.xformers_cuda_families = {
+            xf.xformers: frozenset(c.family for c in xf.cuda) for xf in self.xformers}
+        self.xformers_by_torch = {}
+        for torch_ver in {tc.torch for tc in self.torch_cuda} | set(self.triton_by_torch):
+            self.xformers_by_torch[torch_ver] = self.match_xformers_torch(torch_ver)
+
+    def build_records(self):
+        # Convert table rows to records with every version string replaced
+        # by its interned Version, so versions are parsed once, not per lookup
+        self.torch_cuda = [
+            TorchCudaBuild(**dict(row, torch=Version(row["torch"]), cuda=Version(row["cuda"]),
+                                  cudnn=Version(row["cudnn"])))
+            for row in map(_fields, self.torch_cuda)]
+        self.torch_python_triton = [
+            TorchPythonTriton(**dict(row, torch=Version(row["torch"]), triton=Version(row["triton"]),
+                                     cuda_versions=tuple(intern_versions(row["cuda_versions"])),
+                                     python=tuple(intern_versions(row["python"])),
+                                     triton_compat=tuple(intern_versions(row["triton_compat"]))))
+            for row in map(_fields, self.torch_python_triton)]
+        self.torch_ecosystem = {
+            Version(torch_ver): {pkg: Version(ver) for pkg, ver in eco.items()}
+            for torch_ver, eco in self.torch_ecosystem.items()}
+        self.flash_attention = [
+            FlashAttentionBuild(**dict(row, fa2=Version(row["fa2"]), python=Version(row["python"]),
+                                       torch=Version(row["torch"]), cuda=Version(row["cuda"])))
+            for row in map(_fields, self.flash_attention)]
+        self.fa2_windows_wheels = {
+            key: tuple(intern_versions(pythons)) for key, pythons in self.fa2_windows_wheels.items()}
+        self.xformers = [
+            XformersRelease(**dict(row, xformers=Version(row["xformers"]), torch=Version(row["torch"]),
+                                   cuda=tuple(intern_versions(row["cuda"]))))
+            for row in map(_fields, self.xformers)]
+        self.bitsandbytes = [
+            BitsandbytesRelease(**dict(row, bnb=Version(row["bnb"]), cuda=tuple(intern_versions(row["cuda"])),
+                                       python=tuple(intern_versions(row["python"])),
+                                       assumed_cuda=tuple(intern_versions(row.get("assumed_cuda", ())))))
+            for row in map(_fields, self.bitsandbytes)]
+        self.cuda_metapackages = {
+            Version(cuda): {pkg: Version(ver) for pkg, ver in packages.items()}
+            for cuda, packages in self.cuda_metapackages.items()}
+
+    def match_xformers_torch(self, torch_version):
+        # torch_min entries match any torch >= their stated version
+        matches = []
+        for xf in self.xformers:
+            if xf.torch_min:
+                if Version(torch_version) >= xf.torch:
+                    matches.append(xf)
+            elif xf.torch == torch_version:
+                matches.append(xf)
+        return matches
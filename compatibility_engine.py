@@ -0,0 +1,621 @@
+from collections import OrderedDict, namedtuple
+from itertools import islice
+
+from compatibility_data import CompatibilityData, cuda_family
+from compatibility_versions import SPECIFIER_CACHE_SIZE, compile_specifier, is_specifier
+
+# Qt-free resolution of compatible torch/CUDA/python/add-on combinations.
+# The GUI, command line tools and services all go through CompatibilityEngine;
+# importing this module must never pull in PySide6.
+
+FILTER_FIELDS = ("torch", "python", "cuda", "fa2", "xformers", "triton", "bnb")
+# Filters naming an add-on library rather than the torch build itself
+ADDON_FIELDS = ("fa2", "xformers", "triton", "bnb")
+
+COMBINATION_HEADERS = ["PyTorch", "Torchvision", "Torchaudio", "Python",
+                       "CUDA (compatible)", "CUDA (torch-tested)", "cuDNN (torch-tested)",
+                       "Triton", "Flash Attn 2", "Xformers", "bitsandbytes", "Win cuDNN"]
+# CompatibleCombination attribute shown in each of those columns
+COMBINATION_COLUMNS = ("torch", "torchvision", "torchaudio", "python",
+                       "cuda_family", "cuda", "cudnn",
+                       "triton", "fa2", "xformers", "bnb", "windows_support")
+
+
+# A CUDA release scored against installed nvidia-* component versions;
+# mismatched holds (component, installed, expected) triples
+CudaReleaseMatch = namedtuple("CudaReleaseMatch", ("cuda", "matched", "mismatched"))
+
+
+class Filters(namedtuple("Filters", FILTER_FIELDS + ("windows_only",),
+                         defaults=(None,) * len(FILTER_FIELDS) + (False,))):
+    # None means "Any" for every version filter
+    __slots__ = ()
+
+    @classmethod
+    def from_selection(cls, windows_only=False, **selected):
+        # Combo boxes and query strings report an unset filter as "Any" or "".
+        # A list of values is a multi-value selection ("2.8.0|2.9.1").
+        values = {}
+        for name, value in selected.items():
+            if isinstance(value, (list, tuple)):
+                value = "|".join(value)
+            values[name] = None if value in (None, "", "Any") else value
+        return cls(windows_only=bool(windows_only), **values)
+
+    def check_specifiers(self):
+        # Raise ValueError for a malformed specifier set instead of letting
+        # it silently match nothing; returns self
+        for field in FILTER_FIELDS:
+            value = getattr(self, field)
+            if value is not None and is_specifier(value):
+                compile_specifier(value, bare_family=field == "cuda")
+        return self
+
+
+def filter_accepts(field, selected, value):
+    # Whether a filter selection (a version or a specifier set) admits one
+    # value of its field. CUDA is matched by major.minor family unless a
+    # specifier says otherwise; value is then the full CUDA version.
+    if is_specifier(selected):
+        try:
+            return compile_specifier(selected, bare_family=field == "cuda")(value)
+        except ValueError:
+            return False
+    if field == "cuda":
+        try:
+            return cuda_family(selected) == cuda_family(value)
+        except ValueError:
+            return False
+    return value == selected
+
+
+class CompatibleCombination(namedtuple("CompatibleCombination", (
+        "torch", "torchvision", "torchaudio", "python", "cuda", "cuda_family", "cudnn",
+        "triton_pin", "triton_compat", "fa2_versions", "fa2_assumed",
+        "xformers_versions", "xformers_patch_diff",
+        "bnb_versions", "bnb_assumed", "bnb_patch_diff", "windows"))):
+    # One row of the "Compatible Combinations" view. Add-on versions are kept
+    # unmarked; the "*" and "~" markers are only added for display.
+    __slots__ = ()
+
+    @property
+    def triton(self):
+        if len(self.triton_compat) > 1:
+            return f"{', '.join(self.triton_compat)} (pin: {self.triton_pin})"
+        return self.triton_pin
+
+    @property
+    def fa2(self):
+        if not self.fa2_versions:
+            return "-"
+        return ", ".join(v + "*" if v in self.fa2_assumed else v for v in self.fa2_versions)
+
+    @property
+    def fa2_has_assumed(self):
+        return bool(self.fa2_assumed)
+
+    @property
+    def xformers(self):
+        if not self.xformers_versions:
+            return "-"
+        marker = "~" if self.xformers_patch_diff else ""
+        return ", ".join(v + marker for v in self.xformers_versions)
+
+    @property
+    def xf_has_patch_diff(self):
+        return self.xformers_patch_diff
+
+    @property
+    def bnb(self):
+        if not self.bnb_versions:
+            return "-"
+        parts = []
+        for v in self.bnb_versions:
+            if v in self.bnb_patch_diff:
+                parts.append(v + "~")
+            elif v in self.bnb_assumed:
+                parts.append(v + "*")
+            else:
+                parts.append(v)
+        return ", ".join(parts)
+
+    @property
+    def bnb_has_assumed(self):
+        return bool(self.bnb_assumed)
+
+    @property
+    def bnb_has_patch_diff(self):
+        return bool(self.bnb_patch_diff)
+
+    @property
+    def windows_support(self):
+        return "Yes" if self.windows else "No (cuDNN)"
+
+    def as_json(self):
+        # Plain JSON-serializable form with unmarked add-on version lists
+        return {
+            "torch": self.torch,
+            "torchvision": self.torchvision,
+            "torchaudio": self.torchaudio,
+            "python": self.python,
+            "cuda_family": self.cuda_family,
+            "cuda": self.cuda,
+            "cudnn": self.cudnn,
+            "triton_pin": self.triton_pin,
+            "triton_compat": list(self.triton_compat),
+            "fa2": list(self.fa2_versions),
+            "fa2_assumed": sorted(self.fa2_assumed),
+            "xformers": list(self.xformers_versions),
+            "xformers_patch_diff": self.xformers_patch_diff,
+            "bnb": list(self.bnb_versions),
+            "bnb_assumed": sorted(self.bnb_assumed),
+            "bnb_patch_diff": sorted(self.bnb_patch_diff),
+            "windows": self.windows,
+        }
+
+    def display_cells(self):
+        # Cell text in COMBINATION_HEADERS order
+        return [getattr(self, name) for name in COMBINATION_COLUMNS]
+
+
+try:
+    _popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def _popcount(mask):
+        return bin(mask).count("1")
+
+
+def _bit_indices(mask):
+    # Positions of the set bits of mask, lowest first
+    bits = bin(mask)[:1:-1]
+    i = bits.find("1")
+    while i >= 0:
+        yield i
+        i = bits.find("1", i + 1)
+
+
+def _mask_from_indices(indices, size):
+    buf = bytearray((size + 7) // 8)
+    for i in indices:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _patch_diff(row, field, version):
+    if field == "xformers":
+        return row.xformers_patch_diff
+    if field == "bnb":
+        return version in row.bnb_patch_diff
+    return False
+
+
+class CompatibilityMatrix:
+    # Every compatible row, materialized once, with one int bitset per facet
+    # value (bit i set = rows[i] has that value). Filtering is a handful of
+    # ANDs followed by a gather, whatever the size of the tables.
+    def __init__(self, rows):
+        self.rows = rows
+        self.all_mask = (1 << len(rows)) - 1
+
+        positions = {field: {} for field in FILTER_FIELDS}
+        cuda_positions = {}
+        windows_positions = []
+        for i, row in enumerate(rows):
+            for field, values in self.facet_values(row):
+                index = positions[field]
+                for value in values:
+                    index.setdefault(value, []).append(i)
+            cuda_positions.setdefault(row.cuda, []).append(i)
+            if row.windows:
+                windows_positions.append(i)
+
+        size = len(rows)
+        self.masks = {field: {value: _mask_from_indices(idx, size) for value, idx in index.items()}
+                      for field, index in positions.items()}
+        # Full CUDA versions, for specifiers like "cuda>=12.8.1"
+        self.cuda_masks = {value: _mask_from_indices(idx, size) for value, idx in cuda_positions.items()}
+        self.windows_mask = _mask_from_indices(windows_positions, size)
+        self._longest_cells = None
+        self._key_indexes = {}
+        # Typed specifiers change with every keystroke, so keep the recent ones
+        self._specifier_masks = ResultCache(SPECIFIER_CACHE_SIZE)
+
+    @staticmethod
+    def facet_values(row):
+        # The values each filter field matches for a row. CUDA filters by
+        # major.minor family.
+        return (("torch", (row.torch,)),
+                ("python", (row.python,)),
+                ("cuda", (row.cuda_family,)),
+                ("fa2", row.fa2_versions),
+                ("xformers", row.xformers_versions),
+                ("triton", row.triton_compat),
+                ("bnb", row.bnb_versions))
+
+    @classmethod
+    def matches(cls, row, filters):
+        # Row-at-a-time equivalent of mask_for, for streaming without a matrix
+        if filters.windows_only and not row.windows:
+            return False
+        for field, values in cls.facet_values(row):
+            selected = getattr(filters, field)
+            if selected is None:
+                continue
+            if field == "cuda":
+                values = (row.cuda,)
+            if not any(filter_accepts(field, selected, value) for value in values):
+                return False
+        return True
+
+    def specifier_mask(self, field, text):
+        # A specifier set compiled once per field straight into a bitset: the
+        # OR of the masks of every indexed value it admits
+        mask = self._specifier_masks.get((field, text))
+        if mask is None:
+            mask = 0
+            values = self.cuda_masks if field == "cuda" else self.masks[field]
+            for value, value_mask in values.items():
+                if filter_accepts(field, text, value):
+                    mask |= value_mask
+            self._specifier_masks.put((field, text), mask)
+        return mask
+
+    def field_mask(self, field, value):
+        if is_specifier(value):
+            return self.specifier_mask(field, value)
+        if field == "cuda":
+            try:
+                value = cuda_family(value)
+            except ValueError:
+                return 0
+        return self.masks[field].get(value, 0)
+
+    def mask_for(self, filters):
+        mask = self.all_mask
+        for field in FILTER_FIELDS:
+            value = getattr(filters, field)
+            if value is None:
+                continue
+            mask &= self.field_mask(field, value)
+            if not mask:
+                return 0
+        if filters.windows_only:
+            mask &= self.windows_mask
+        return mask
+
+    def narrow(self, previous, mask, filters):
+        # Mask for filters derived from the previous state's mask, valid when
+        # every change only tightens (Any -> value, Windows only off -> on).
+        # Returns None when a filter was loosened or switched value.
+        for field in FILTER_FIELDS:
+            old = getattr(previous, field)
+            new = getattr(filters, field)
+            if old == new:
+                continue
+            if old is not None:
+                return None
+            mask &= self.field_mask(field, new)
+        if previous.windows_only != filters.windows_only:
+            if previous.windows_only:
+                return None
+            mask &= self.windows_mask
+        return mask
+
+    def facet_counts(self, filters):
+        # For every value of every facet, the number of rows the filters would
+        # give with that facet switched to the value (its own selection is
+        # ignored, all the others apply). Prefix/suffix ANDs give "all filters
+        # but one" for each facet in a single sweep. CUDA is keyed by family.
+        selected = []
+        for field in FILTER_FIELDS:
+            value = getattr(filters, field)
+            selected.append(self.all_mask if value is None else self.field_mask(field, value))
+        count = len(selected)
+        prefix = [self.all_mask] * (count + 1)
+        for i in range(count):
+            prefix[i + 1] = prefix[i] & selected[i]
+        suffix = [self.windows_mask if filters.windows_only else self.all_mask] * (count + 1)
+        for i in range(count - 1, -1, -1):
+            suffix[i] = suffix[i + 1] & selected[i]
+
+        counts = {}
+        for i, field in enumerate(FILTER_FIELDS):
+            base = prefix[i] & suffix[i + 1]
+            counts[field] = {value: _popcount(base & mask) for value, mask in self.masks[field].items()}
+        base = prefix[count]
+        counts["windows_only"] = {False: _popcount(base), True: _popcount(base & self.windows_mask)}
+        return counts
+
+    def key_index(self, exact=False):
+        # Inverted index per add-on field: version -> frozenset of the
+        # (torch, cuda, python) builds it runs on. Rows already carry the
+        # torch_min and CUDA patch-diff matching, so this is a regrouping of
+        # the facet masks; exact=True leaves out "~" patch-diff matches.
+        index = self._key_indexes.get(exact)
+        if index is None:
+            index = {}
+            for field in ADDON_FIELDS:
+                index[field] = {}
+                for value, mask in self.masks[field].items():
+                    keys = frozenset((row.torch, row.cuda, row.python) for row in self.iter_rows(mask)
+                                     if not (exact and _patch_diff(row, field, value)))
+                    if keys:
+                        index[field][value] = keys
+            self._key_indexes[exact] = index
+        return index
+
+    def longest_cells(self):
+        # Longest display text per column over the whole matrix, computed
+        # once so views can size columns without measuring every cell
+        if self._longest_cells is None:
+            longest = list(COMBINATION_HEADERS)
+            for row in self.rows:
+                for col, text in enumerate(row.display_cells()):
+                    if len(text) > len(longest[col]):
+                        longest[col] = text
+            self._longest_cells = longest
+        return self._longest_cells
+
+    def iter_rows(self, mask):
+        rows = self.rows
+        for i in _bit_indices(mask):
+            yield rows[i]
+
+    def gather(self, mask):
+        rows = self.rows
+        return [rows[i] for i in _bit_indices(mask)]
+
+    def select(self, filters):
+        return self.gather(self.mask_for(filters))
+
+
+# Everything the GUI shows for one filter state
+ResolvedView = namedtuple("ResolvedView", ("filters", "mask", "combinations", "metapackages", "facets"))
+
+
+class ResultCache:
+    # Bounded LRU, e.g. of ResolvedView keyed by the Filters tuple
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class CompatibilityEngine:
+    def __init__(self, data=None, cache_size=64):
+        self.data = data if data is not None else CompatibilityData()
+        self.cache = ResultCache(cache_size)
+        self.rebuild()
+
+    def rebuild(self):
+        # Drop the matrix and cached views; call after CompatibilityData
+        # changes. The matrix is re-materialized on first use.
+        self._matrix = None
+        self.cache.clear()
+        self._generation = self.data.generation
+        self._last_view = None
+
+    @property
+    def matrix(self):
+        if self._generation != self.data.generation:
+            self.rebuild()
+        if self._matrix is None:
+            self._matrix = CompatibilityMatrix(list(self.iter_joined_rows()))
+        return self._matrix
+
+    def query(self, filters=None):
+        # Cached combinations + metapackage view for a filter state
+        filters = filters if filters is not None else Filters()
+        if self._generation != self.data.generation:
+            self.rebuild()
+        view = self.cache.get(filters)
+        if view is None:
+            mask = None
+            if self._last_view is not None:
+                # Drilling down only needs to filter the previous result
+                last = self._last_view
+                mask = self.matrix.narrow(last.filters, last.mask, filters)
+            if mask is None:
+                mask = self.matrix.mask_for(filters)
+            view = ResolvedView(filters, mask, tuple(self.matrix.gather(mask)),
+                                self.metapackage_view(filters.cuda),
+                                self.matrix.facet_counts(filters))
+            self.cache.put(filters, view)
+        self._last_view = view
+        return view
+
+    def get_bnb_for_cuda_python(self, cuda_version, python_version):
+        # Returns (versions, assumed, patch_diff); assumed and patch_diff are
+        # the subsets of versions that get the "*" and "~" markers
+        bnb_versions = []
+        bnb_assumed = []
+        bnb_patch_diff = []
+        for bnb in self.data.bnb_by_cuda_family.get(cuda_family(cuda_version), ()):
+            if python_version not in bnb.python:
+                continue
+            bnb_versions.append(bnb.bnb)
+            if cuda_version in bnb.cuda:
+                # Exact match
+                if cuda_version in bnb.assumed_cuda:
+                    bnb_assumed.append(bnb.bnb)
+            else:
+                # Patch-version-diff match (same major.minor)
+                bnb_patch_diff.append(bnb.bnb)
+        return bnb_versions, bnb_assumed, bnb_patch_diff
+
+    def get_xformers_for_torch_cuda(self, torch_version, cuda_version):
+        # Returns (versions, patch_diff). Exact CUDA matches win; otherwise fall
+        # back to builds for the same major.minor with a different patch.
+        candidates = self.data.xformers_by_torch.get(torch_version)
+        if candidates is None:
+            candidates = self.data.match_xformers_torch(torch_version)
+        xf_exact = [x.xformers for x in candidates if cuda_version in x.cuda]
+        if xf_exact:
+            return xf_exact, False
+        cuda_short = cuda_family(cuda_version)
+        families = self.data.xformers_cuda_families
+        xf_patch_diff = [x.xformers for x in candidates if cuda_short in families[x.xformers]]
+        return xf_patch_diff, bool(xf_patch_diff)
+
+    def iter_joined_rows(self, torch_cuda=None):
+        # The full torch_cuda x torch_python_triton x python join with the
+        # add-on columns filled in, in display order. Add-on tuples are shared
+        # between rows with the same inputs instead of being rebuilt per row.
+        # torch_cuda limits the join to those TorchCudaBuild rows.
+        data = self.data
+        bnb_cache = {}
+        for tc in data.torch_cuda if torch_cuda is None else torch_cuda:
+            cuda_short = tc.cuda.family
+            xf_versions, xf_patch_diff = self.get_xformers_for_torch_cuda(tc.torch, tc.cuda)
+            xf_versions = tuple(xf_versions)
+            ecosystem = data.torch_ecosystem.get(tc.torch, {})
+
+            for pt in data.triton_by_torch.get(tc.torch, ()):
+                if cuda_short not in pt.cuda_versions:
+                    continue
+
+                for py_ver in pt.python:
+                    fa2_compat = data.fa2_by_torch_python_cuda.get((tc.torch, py_ver, tc.cuda), ())
+                    bnb = bnb_cache.get((tc.cuda, py_ver))
+                    if bnb is None:
+                        bnb_versions, bnb_assumed, bnb_patch_diff = self.get_bnb_for_cuda_python(tc.cuda, py_ver)
+                        bnb = (tuple(bnb_versions), frozenset(bnb_assumed), frozenset(bnb_patch_diff))
+                        bnb_cache[(tc.cuda, py_ver)] = bnb
+                    yield CompatibleCombination(
+                        torch=tc.torch,
+                        torchvision=ecosystem.get("torchvision", "-"),
+                        torchaudio=ecosystem.get("torchaudio", "-"),
+                        python=py_ver,
+                        cuda=tc.cuda,
+                        cuda_family=cuda_short,
+                        cudnn=tc.cudnn,
+                        triton_pin=pt.triton,
+                        triton_compat=pt.triton_compat,
+                        fa2_versions=tuple(sorted({x.fa2 for x in fa2_compat}, reverse=True)),
+                        fa2_assumed=frozenset(x.fa2 for x in fa2_compat if x.assumed),
+                        xformers_versions=xf_versions,
+                        xformers_patch_diff=xf_patch_diff,
+                        bnb_versions=bnb[0],
+                        bnb_assumed=bnb[1],
+                        bnb_patch_diff=bnb[2],
+                        windows=tc.windows,
+                    )
+
+    def resolve(self, filters=None):
+        return self.matrix.select(filters if filters is not None else Filters())
+
+    def supported_builds(self, exact=False, **versions):
+        # The (torch, cuda, python) builds that run every given add-on
+        # version, e.g. supported_builds(xformers="0.0.33.post2", bnb="0.49.2"):
+        # one set intersection over the inverted key index
+        index = self.matrix.key_index(exact)
+        builds = None
+        for field, version in versions.items():
+            if version is None:
+                continue
+            if is_specifier(version):
+                found = frozenset().union(*(keys for value, keys in index[field].items()
+                                            if filter_accepts(field, version, value)))
+            else:
+                found = index[field].get(version, frozenset())
+            builds = found if builds is None else builds & found
+            if not builds:
+                return frozenset()
+        if builds is None:
+            builds = frozenset((row.torch, row.cuda, row.python) for row in self.matrix.rows)
+        return builds
+
+    def iter_combinations(self, filters=None, limit=None):
+        # Matching rows lazily, in display order (newest torch first). Without
+        # a materialized matrix rows are joined one at a time and the join
+        # stops as soon as limit rows have matched.
+        if limit is not None and limit < 0:
+            raise ValueError(f"limit must not be negative, got {limit}")
+        filters = filters if filters is not None else Filters()
+        if self._matrix is not None and self._generation == self.data.generation:
+            rows = self._matrix.iter_rows(self._matrix.mask_for(filters))
+        else:
+            rows = (row for row in self.iter_joined_rows() if CompatibilityMatrix.matches(row, filters))
+        return rows if limit is None else islice(rows, limit)
+
+    def first(self, filters=None):
+        # The first matching row (newest compatible stack), or None
+        return next(self.iter_combinations(filters, 1), None)
+
+    @staticmethod
+    def facet_count(facets, field, value):
+        # Count for a combo box value; CUDA counts are per major.minor family
+        if field == "cuda":
+            try:
+                value = cuda_family(value)
+            except ValueError:
+                return 0
+        return facets[field].get(value, 0)
+
+    def match_cuda_release(self, components):
+        # Ranks the CUDA releases against installed component versions
+        # ({"cublas": "12.8.4.1", ...}, names as in cuda_metapackages), best
+        # first: most components matching, then fewest disagreeing, then
+        # newest. One pass over the installed set through the inverted
+        # index; releases sharing no component are left out.
+        metapackages = self.data.cuda_metapackages
+        index = self.data.cuda_releases_by_component
+        matched = {}
+        for component, version in components.items():
+            for cuda in index.get((component, version), ()):
+                matched.setdefault(cuda, []).append(component)
+        results = []
+        for cuda, names in matched.items():
+            packages = metapackages[cuda]
+            mismatched = tuple((component, version, packages[component])
+                               for component, version in components.items()
+                               if component in packages and packages[component] != version)
+            results.append(CudaReleaseMatch(cuda, tuple(names), mismatched))
+        results.sort(key=lambda m: (len(m.matched), -len(m.mismatched), m.cuda.key), reverse=True)
+        return results
+
+    def metapackage_view(self, cuda_version=None):
+        # (headers, rows) for the CUDA Metapackages tab, or None when the
+        # selected CUDA release has no metapackage data
+        metapackages = self.data.cuda_metapackages
+        cuda_versions = sorted(metapackages.keys())
+        if cuda_version and is_specifier(cuda_version):
+            # Specifier set — a column per CUDA release it admits
+            cuda_versions = [cv for cv in cuda_versions if filter_accepts("cuda", cuda_version, cv)]
+            if not cuda_versions:
+                return None
+        elif cuda_version:
+            if cuda_version not in metapackages:
+                return None
+            packages = metapackages[cuda_version]
+            return ["Package", cuda_version], [[pkg, ver] for pkg, ver in packages.items()]
+
+        # "Any" selected — all CUDA versions as columns
+        package_names = list(next(iter(metapackages.values())).keys())
+        rows = []
+        for pkg in package_names:
+            rows.append([pkg] + [metapackages[cv].get(pkg, "-") for cv in cuda_versions])
+        return ["Package"] + cuda_versions, rows
@@ -0,0 +1,318 @@
+import os
+import re
+import sys
+from collections import namedtuple
+
+from compatibility_engine import ADDON_FIELDS, FILTER_FIELDS, Filters
+from compatibility_versions import Version, compile_specifier
+
+# Detects the torch stack installed in a Python environment from the
+# *.dist-info / *.egg-info metadata in its site directories. Nothing is
+# imported from the environment, so torch and the CUDA libraries never load
+# (that costs seconds and initializes the GPU); a scan lists each site
+# directory once and reads the metadata headers of the few relevant
+# distributions only. importlib.metadata would parse the same headers but
+# costs more to import than the whole scan.
+#
+# The detected versions pre-fill the filters (the torch CUDA build comes
+# from its "+cu128" local tag, or from the installed nvidia-cuda-runtime
+# wheel for the untagged PyPI builds) and are checked against
+# CompatibilityData.
+#
+# audit_environments does the same for every virtualenv/conda environment
+# under a set of directories: the scans run on a bounded thread pool (they
+# are directory listings and small reads), the checks run on the calling
+# thread since the engine isn't thread-safe.
+
+# Distribution name (PEP 503 normalized) -> filter field it fills, or None
+DETECTED_PROJECTS = {
+    "torch": "torch",
+    "torchvision": None,
+    "torchaudio": None,
+    "triton": "triton",
+    "triton-windows": "triton",
+    "flash-attn": "fa2",
+    "xformers": "xformers",
+    "bitsandbytes": "bnb",
+    "sympy": None,
+}
+NVIDIA_PREFIX = "nvidia-"
+# The flash_attention table lists the kingbri1 Windows wheels only
+FA2_PLATFORM = "windows"
+AUDIT_WORKERS = 8
+
+InstalledEnvironment = namedtuple("InstalledEnvironment", ("python", "packages", "nvidia", "paths"))
+Mismatch = namedtuple("Mismatch", ("package", "installed", "problem"))
+
+_NORMALIZE_RE = re.compile(r"[-_.]+")
+_CUDA_TAG_RE = re.compile(r"^cu(\d+)(\d)$")
+_PYTHON_DIR_RE = re.compile(r"python(\d+\.\d+)")
+# Metadata directory names of the detected projects, in any spelling pip
+# and setuptools write them ("flash_attn-2.8.3.dist-info",
+# "nvidia_cublas_cu12-12.8.4.1.dist-info", "sympy.egg-info"); most entries
+# of a site directory are rejected here without further parsing
+_METADATA_DIR_RE = re.compile(
+    r"^(?P<name>%s|nvidia[-_.][^-]+)(?:-[^-]+)*\.(?:dist|egg)-info$"
+    % "|".join(re.escape(name).replace("\\-", "[-_.]") for name in DETECTED_PROJECTS),
+    re.IGNORECASE)
+
+
+def normalize_name(name):
+    return _NORMALIZE_RE.sub("-", name).lower()
+
+
+def nvidia_component(name):
+    # "nvidia-cublas-cu12" -> "cublas", "nvidia-cuda-runtime" -> "cuda-runtime",
+    # matching the component names of CompatibilityData.cuda_metapackages
+    component = name[len(NVIDIA_PREFIX):]
+    base, _, suffix = component.rpartition("-")
+    return base if base and _CUDA_TAG_RE.match(suffix) else component
+
+
+def _parse(text):
+    try:
+        return Version(text)
+    except ValueError:
+        return None
+
+
+def read_version(path):
+    # The Version header of a dist-info METADATA or egg-info PKG-INFO file;
+    # the headers end at the first blank line, before the long description
+    for name in ("METADATA", "PKG-INFO"):
+        try:
+            with open(os.path.join(path, name), encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    if line.startswith("Version:"):
+                        return line[len("Version:"):].strip()
+                    if not line.strip():
+                        break
+        except OSError:
+            continue
+    return None
+
+
+def scan_environment(paths=None, python=None):
+    # paths: site directories to scan, first match wins (default: sys.path
+    # of this interpreter, whose python version is then the default too)
+    if paths is None:
+        paths = [path for path in sys.path if path and os.path.isdir(path)]
+        if python is None:
+            python = f"{sys.version_info[0]}.{sys.version_info[1]}"
+    elif python is None:
+        # .../lib/python3.12/site-packages
+        for path in paths:
+            match = _PYTHON_DIR_RE.search(path)
+            if match:
+                python = match.group(1)
+                break
+    packages = {}
+    nvidia = {}
+    match_metadata = _METADATA_DIR_RE.match
+    for path in paths:
+        try:
+            names = os.listdir(path)
+        except OSError:
+            continue
+        for entry in names:
+            match = match_metadata(entry)
+            if match is None:
+                continue
+            name = normalize_name(match.group("name"))
+            if name.startswith(NVIDIA_PREFIX):
+                found, name = nvidia, nvidia_component(name)
+            else:
+                found = packages
+            if name in found:
+                continue
+            version = read_version(os.path.join(path, entry))
+            if version:
+                found[name] = version
+    return InstalledEnvironment(python, packages, nvidia, tuple(paths))
+
+
+def torch_cuda_family(env):
+    # CUDA major.minor the installed torch was built for, "cpu"/"rocm..."
+    # for other builds, None when unknown
+    torch = env.packages.get("torch")
+    version = _parse(torch) if torch else None
+    if version is None:
+        return None
+    if version.local:
+        match = _CUDA_TAG_RE.match(version.local)
+        return f"{match.group(1)}.{match.group(2)}" if match else version.local
+    runtime = _parse(env.nvidia.get("cuda-runtime", ""))
+    return runtime.family if runtime is not None else None
+
+
+def _filter_value(field, text):
+    version = _parse(text)
+    if version is None:
+        return text
+    if field == "triton":
+        # triton-windows publishes 3.4.0.post20 for triton 3.4.0
+        return ".".join(str(part) for part in (version.release + (0, 0))[:3])
+    return version.public
+
+
+def environment_filters(env):
+    # Filter selections describing the environment, "Any" where unknown
+    selected = dict.fromkeys(FILTER_FIELDS, "Any")
+    for name, field in DETECTED_PROJECTS.items():
+        if field is not None and name in env.packages and selected[field] == "Any":
+            selected[field] = _filter_value(field, env.packages[name])
+    cuda = torch_cuda_family(env)
+    if cuda is not None and _parse(cuda) is not None:
+        selected["cuda"] = cuda
+    if env.python:
+        selected["python"] = env.python
+    return selected
+
+
+def current_platform():
+    return "windows" if sys.platform == "win32" else "linux"
+
+
+def check_environment(engine, env, platform=None):
+    # Mismatches between the installed versions and CompatibilityData, for
+    # an environment on platform ("linux"/"windows", default: this one)
+    platform = platform if platform is not None else current_platform()
+    data = engine.data
+    selected = environment_filters(env)
+    torch = selected["torch"]
+    if torch == "Any":
+        return [Mismatch("torch", None, "torch is not installed")]
+    installed_torch = env.packages["torch"]
+    builds = [tc for tc in data.torch_cuda if tc.torch == torch]
+    if not builds:
+        return [Mismatch("torch", installed_torch, f"torch {torch} is not in the compatibility data")]
+
+    mismatches = []
+    cuda = torch_cuda_family(env)
+    if cuda is None:
+        mismatches.append(Mismatch("torch", installed_torch, "cannot tell which CUDA version torch was built for"))
+    elif _parse(cuda) is None:
+        return [Mismatch("torch", installed_torch, f"torch {torch} is a {cuda} build, not a CUDA build")]
+    else:
+        builds = [tc for tc in builds if tc.cuda.family == cuda]
+        if not builds:
+            return [Mismatch("torch", installed_torch, f"torch {torch} has no CUDA {cuda} build in the data")]
+
+    ecosystem = data.torch_ecosystem.get(torch, {})
+    for name in ("torchvision", "torchaudio"):
+        installed = env.packages.get(name)
+        expected = ecosystem.get(name)
+        if installed and expected and _filter_value(name, installed) != expected:
+            mismatches.append(Mismatch(name, installed, f"torch {torch} needs {name} {expected}"))
+
+    base = {field: selected[field] for field in ("torch", "python", "cuda")}
+    stack = " + ".join(f"{field} {value}" for field, value in base.items() if value != "Any")
+    if not engine.resolve(Filters.from_selection(**base)):
+        mismatches.append(Mismatch("python", env.python, f"no compatible combination for {stack}"))
+        return mismatches
+
+    # Add-ons one at a time, so each mismatch names its own package
+    for name, field in DETECTED_PROJECTS.items():
+        if field not in ADDON_FIELDS or name not in env.packages:
+            continue
+        if field == "fa2" and platform != FA2_PLATFORM:
+            # Linux flash-attn builds aren't tracked, so nothing to check
+            continue
+        filters = Filters.from_selection(**base, **{field: selected[field]})
+        if not engine.resolve(filters):
+            mismatches.append(Mismatch(name, env.packages[name], f"not compatible with {stack}"))
+
+    sympy = env.packages.get("sympy")
+    for pt in data.triton_by_torch.get(torch, ())[:1]:
+        if sympy and pt.sympy and not compile_specifier(pt.sympy)(_filter_value("sympy", sympy)):
+            mismatches.append(Mismatch("sympy", sympy, f"torch {torch} needs sympy{pt.sympy}"))
+
+    cudnn = env.nvidia.get("cudnn")
+    expected = {tc.cudnn for tc in builds if tc.cudnn}
+    if cudnn and expected and _filter_value("cudnn", cudnn) not in expected:
+        mismatches.append(Mismatch("nvidia-cudnn", cudnn,
+                                   f"torch {torch} was built against cuDNN {', '.join(sorted(expected))}"))
+    return mismatches
+
+
+def is_environment(path):
+    return (os.path.isfile(os.path.join(path, "pyvenv.cfg"))
+            or os.path.isdir(os.path.join(path, "conda-meta")))
+
+
+def _child_environments(path):
+    try:
+        children = sorted(entry.path for entry in os.scandir(path) if entry.is_dir())
+    except OSError:
+        return []
+    return [child for child in children if is_environment(child)]
+
+
+def find_environments(path):
+    # path itself when it is an environment, the environments directly
+    # under it, and the "envs" of conda installations among those
+    found = [path] if is_environment(path) else []
+    found.extend(_child_environments(os.path.join(path, "envs")))
+    for child in _child_environments(path):
+        found.append(child)
+        found.extend(_child_environments(os.path.join(child, "envs")))
+    return found
+
+
+def site_directories(prefix):
+    # lib/pythonX.Y/site-packages (POSIX venvs and conda), Lib/site-packages
+    # (Windows)
+    found = []
+    for lib in ("lib", "lib64"):
+        try:
+            names = sorted(os.listdir(os.path.join(prefix, lib)))
+        except OSError:
+            continue
+        for name in names:
+            path = os.path.join(prefix, lib, name, "site-packages")
+            if name.startswith("python") and os.path.isdir(path):
+                found.append(path)
+    path = os.path.join(prefix, "Lib", "site-packages")
+    if os.path.isdir(path) and path not in found:
+        found.append(path)
+    return found
+
+
+def _pyvenv_python(prefix):
+    # "version = 3.12.3" (venv) or "version_info = 3.12.3.final.0" (virtualenv)
+    try:
+        with open(os.path.join(prefix, "pyvenv.cfg"), encoding="utf-8") as f:
+            for line in f:
+                key, _, value = line.partition("=")
+                if key.strip() in ("version", "version_info"):
+                    parts = value.strip().split(".")
+                    if len(parts) >= 2:
+                        return f"{parts[0]}.{parts[1]}"
+    except OSError:
+        pass
+    return None
+
+
+def scan_prefix(prefix):
+    paths = site_directories(prefix)
+    python = None
+    if not any(_PYTHON_DIR_RE.search(path) for path in paths):
+        python = _pyvenv_python(prefix)
+    return scan_environment(paths, python)
+
+
+def audit_environments(engine, prefixes, workers=AUDIT_WORKERS, platform=None):
+    # Yields (prefix, InstalledEnvironment, mismatches) in prefixes order
+    from concurrent.futures import ThreadPoolExecutor
+
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    prefixes = list(prefixes)
+    if len(prefixes) < 2 or workers == 1:
+        for prefix in prefixes:
+            env = scan_prefix(prefix)
+            yield prefix, env, check_environment(engine, env, platform)
+        return
+    with ThreadPoolExecutor(min(workers, len(prefixes))) as pool:
+        for prefix, env in zip(prefixes, pool.map(scan_prefix, prefixes)):
+            yield prefix, env, check_environment(engine, env, platform)
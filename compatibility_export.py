@@ -0,0 +1,282 @@
+# Qt-free report formatting shared by the GUI export buttons and the CLI.
+#
+# export_report streams a report straight from engine results (an iterable
+# of CompatibleCombination, e.g. CompatibilityEngine.iter_combinations) to a
+# file object, EXPORT_CHUNK_ROWS rows per write:
+#
+#   ascii  the plain text report the GUI has always exported
+#   md     the same report as Markdown
+#   html   the same report as a standalone HTML page
+#   csv    the Compatible Combinations table only
+#   jsonl  one JSON object per line: the filters, then every combination,
+#          then every metapackage row, each tagged with "type"
+
+from compatibility_engine import COMBINATION_HEADERS
+
+EXPORT_FORMATS = ("ascii", "md", "html", "csv", "jsonl")
+EXPORT_SUFFIXES = {"ascii": ".txt", "md": ".md", "html": ".html", "csv": ".csv", "jsonl": ".jsonl"}
+EXPORT_CHUNK_ROWS = 256
+
+REPORT_TITLE = "PyTorch CUDA Compatibility Checker - Export"
+NO_COMBINATIONS = "No compatible combinations found."
+NO_METAPACKAGES = "No metapackage data available."
+
+
+def format_ascii_table(headers, rows):
+    if not headers:
+        return ""
+    return "\n".join(iter_ascii_table(headers, rows, ascii_widths(headers, rows)))
+
+
+def ascii_widths(headers, rows):
+    col_widths = [len(h) for h in headers]
+    for row in rows:
+        for i, cell in enumerate(row):
+            col_widths[i] = max(col_widths[i], len(cell))
+    return col_widths
+
+
+def iter_ascii_table(headers, rows, col_widths):
+    # Lines of an ASCII table; col_widths must fit every cell, so rows can
+    # be a generator when the widths are known up front
+    separator = "+" + "+".join("-" * (w + 2) for w in col_widths) + "+"
+    def format_row(cells):
+        parts = []
+        for cell, w in zip(cells, col_widths):
+            parts.append(f" {cell:<{w}} ")
+        return "|" + "|".join(parts) + "|"
+    yield separator
+    yield format_row(headers)
+    yield separator
+    for row in rows:
+        yield format_row(row)
+    yield separator
+
+
+def _chunked(out, lines):
+    # One write per EXPORT_CHUNK_ROWS lines
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            out.write("\n".join(chunk) + "\n")
+            chunk = []
+    if chunk:
+        out.write("\n".join(chunk) + "\n")
+
+
+def _html(text):
+    import html
+    return html.escape(text)
+
+
+def _md(text):
+    return text.replace("|", "\\|")
+
+
+class _ReportWriter:
+    # One subclass per format; export_report drives the sections. Every
+    # subclass writes the combinations section in combinations(rows), rows
+    # being an iterator of display cell lists (CompatibleCombination for
+    # structured writers); the other sections are optional.
+    def __init__(self, out, widths):
+        self.out = out
+        self.widths = widths
+
+    def begin(self, filters):
+        pass
+
+    def metapackages(self, view):
+        pass
+
+    def end(self):
+        pass
+
+
+class _AsciiReport(_ReportWriter):
+    def begin(self, filters):
+        lines = [REPORT_TITLE, "=" * 44, ""]
+        if filters:
+            lines.append("Active Filters:")
+            lines.extend(f"  {name}: {value}" for name, value in filters)
+            lines.append("")
+        lines.extend(["Compatible Combinations", "-" * 23])
+        self.out.write("\n".join(lines) + "\n")
+
+    def combinations(self, rows):
+        first = next(rows, None)
+        if first is None:
+            self.out.write(NO_COMBINATIONS + "\n")
+            return
+        rows = _prepend(first, rows)
+        if self.widths is None:
+            rows = list(rows)
+            widths = ascii_widths(COMBINATION_HEADERS, rows)
+        else:
+            widths = self.widths
+        _chunked(self.out, iter_ascii_table(COMBINATION_HEADERS, rows, widths))
+
+    def metapackages(self, view):
+        self.out.write("\nCUDA Metapackages\n" + "-" * 17 + "\n")
+        if view is None:
+            self.out.write(NO_METAPACKAGES + "\n")
+        else:
+            self.out.write(format_ascii_table(*view) + "\n")
+
+
+class _MarkdownReport(_ReportWriter):
+    def begin(self, filters):
+        lines = [f"# {REPORT_TITLE}", ""]
+        if filters:
+            lines.append("## Active Filters")
+            lines.append("")
+            lines.extend(f"- **{name}:** {_md(value)}" for name, value in filters)
+            lines.append("")
+        lines.append("## Compatible Combinations")
+        lines.append("")
+        self.out.write("\n".join(lines) + "\n")
+
+    def _table(self, headers, rows):
+        yield "| " + " | ".join(_md(h) for h in headers) + " |"
+        yield "|" + "---|" * len(headers)
+        for row in rows:
+            yield "| " + " | ".join(_md(cell) for cell in row) + " |"
+
+    def combinations(self, rows):
+        first = next(rows, None)
+        if first is None:
+            self.out.write(NO_COMBINATIONS + "\n")
+            return
+        _chunked(self.out, self._table(COMBINATION_HEADERS, _prepend(first, rows)))
+
+    def metapackages(self, view):
+        self.out.write("\n## CUDA Metapackages\n\n")
+        if view is None:
+            self.out.write(NO_METAPACKAGES + "\n")
+        else:
+            _chunked(self.out, self._table(*view))
+
+
+class _HtmlReport(_ReportWriter):
+    def begin(self, filters):
+        lines = ["<!DOCTYPE html>", '<html><head><meta charset="utf-8">',
+                 f"<title>{_html(REPORT_TITLE)}</title>",
+                 "<style>table{border-collapse:collapse}td,th{border:1px solid #999;padding:2px 8px}</style>",
+                 "</head><body>", f"<h1>{_html(REPORT_TITLE)}</h1>"]
+        if filters:
+            lines.append("<h2>Active Filters</h2><ul>")
+            lines.extend(f"<li><b>{_html(name)}:</b> {_html(value)}</li>" for name, value in filters)
+            lines.append("</ul>")
+        lines.append("<h2>Compatible Combinations</h2>")
+        self.out.write("\n".join(lines) + "\n")
+
+    def _table(self, headers, rows):
+        yield "<table>"
+        yield "<tr>" + "".join(f"<th>{_html(h)}</th>" for h in headers) + "</tr>"
+        for row in rows:
+            yield "<tr>" + "".join(f"<td>{_html(cell)}</td>" for cell in row) + "</tr>"
+        yield "</table>"
+
+    def combinations(self, rows):
+        first = next(rows, None)
+        if first is None:
+            self.out.write(f"<p>{NO_COMBINATIONS}</p>\n")
+            return
+        _chunked(self.out, self._table(COMBINATION_HEADERS, _prepend(first, rows)))
+
+    def metapackages(self, view):
+        self.out.write("<h2>CUDA Metapackages</h2>\n")
+        if view is None:
+            self.out.write(f"<p>{NO_METAPACKAGES}</p>\n")
+        else:
+            _chunked(self.out, self._table(*view))
+
+    def end(self):
+        self.out.write("</body></html>\n")
+
+
+class _CsvReport(_ReportWriter):
+    def combinations(self, rows):
+        # csv.writer writes every row separately, so buffer a chunk first
+        import csv
+        import io
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(COMBINATION_HEADERS)
+        for i, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if i % EXPORT_CHUNK_ROWS == 0:
+                self.out.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+        self.out.write(buffer.getvalue())
+
+
+class _JsonLinesReport(_ReportWriter):
+    # Structured records instead of display cells; see export_report
+    structured = True
+
+    def begin(self, filters):
+        import json
+        self.out.write(json.dumps({"type": "filters", "filters": dict(filters or ())}) + "\n")
+
+    def combinations(self, rows):
+        import json
+        _chunked(self.out, (json.dumps({"type": "combination", **row.as_json()}) for row in rows))
+
+    def metapackages(self, view):
+        import json
+        if view is None:
+            return
+        headers, rows = view
+        _chunked(self.out, (json.dumps({"type": "metapackage", "package": row[0],
+                                        "versions": dict(zip(headers[1:], row[1:]))}) for row in rows))
+
+
+_WRITERS = {"ascii": _AsciiReport, "md": _MarkdownReport, "html": _HtmlReport,
+            "csv": _CsvReport, "jsonl": _JsonLinesReport}
+
+
+def _prepend(first, rows):
+    yield first
+    yield from rows
+
+
+def _metapackages_for(view, cudas):
+    # Keep only the metapackage columns of CUDA releases in the exported
+    # combinations (the all-releases view otherwise has one per release)
+    if view is None or not cudas:
+        return view
+    headers, rows = view
+    keep = [0] + [i for i in range(1, len(headers)) if headers[i] in cudas]
+    if len(keep) == 1:
+        return view
+    return [headers[i] for i in keep], [[row[i] for i in keep] for row in rows]
+
+
+def export_report(out, fmt, combinations, metapackages=None, filters=None, widths=None):
+    # Streams a report to out and returns the number of combinations written.
+    # combinations: iterable of CompatibleCombination, consumed once.
+    # metapackages: (headers, rows) from CompatibilityEngine.metapackage_view.
+    # filters: (label, value) pairs for the "Active Filters" section.
+    # widths: ASCII column widths that fit every row (e.g. from the matrix's
+    # longest_cells); without them an ASCII export buffers the rows first.
+    writer = _WRITERS[fmt](out, widths)
+    cudas = set()
+    count = 0
+
+    def tracked():
+        nonlocal count
+        for row in combinations:
+            cudas.add(row.cuda)
+            count += 1
+            yield row
+
+    rows = tracked()
+    if not getattr(writer, "structured", False):
+        rows = (row.display_cells() for row in rows)
+    writer.begin(filters)
+    writer.combinations(rows)
+    writer.metapackages(_metapackages_for(metapackages, cudas))
+    writer.end()
+    return count
@@ -0,0 +1,750 @@
+import ast
+import copy
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import pickle
+import re
+from datetime import date
+
+from compatibility_data import DATA_DIR, DATA_FORMAT, DATA_PATH, dump_pickle
+from compatibility_environment import normalize_name, nvidia_component
+from compatibility_versions import Version
+
+# Offline ingestion of the ground-truth files COMPATIBILITY.py cites into
+# compatibility_data.json. A ground-truth directory holds one file per
+# upstream tag, named after its source and tag:
+#
+#   torch_generate_binary_build_matrix_v2.9.1.py   the script (its literals are read)
+#   torch_generate_binary_build_matrix_v2.9.1.json its {"include": [...]} output
+#   fa2_windows_build-wheels_v2.8.3.yml            kingbri1 build matrix of a release
+#   xformers_wheels_v0.0.33.post2.yml              torch_version and CU_VERSIONS
+#   xformers_flash_v0.0.33.post2.py                FLASH_VER_MIN / FLASH_VER_LAST
+#   bnb_python-package_0.49.2.yml                  cuda_version matrix of build-cuda
+#
+# Each file is parsed on its own into "facts" (plain dicts), cached by
+# content hash so only new or edited files are parsed again, in a process
+# pool when there are many. The facts then update the current tables: the
+# rows of every tag found are replaced, while what the sources don't state
+# (Windows cuDNN support, assumed builds, sympy pins, notes, torchvision
+# pairings, bitsandbytes Python ranges) is kept from the existing rows. A
+# new torch release needs a triton pin, which only the matrix JSON output
+# carries; without one the release is left out altogether.
+# The Linux FA2 publish.yml has no table of its own (flash_attention holds
+# the Windows release assets) and the xformers setup-build-cuda toolkit is
+# informational, so neither is ingested.
+
+INGEST_CACHE_PATH = os.path.join(DATA_DIR, "compatibility_ingest.cache")
+INGEST_CACHE_FORMAT = 1
+# A ground-truth file parses in a few milliseconds and a typical release
+# changes only one or two tags, while a pool takes tens of milliseconds to
+# start; only a wide change, such as a first run or a parser bump, is worth
+# spreading over workers
+INGEST_INLINE_LIMIT = 8
+INGEST_CHUNK_SIZE = 4
+
+_TAG = r"v?(?P<tag>\d[\w.]*?)"
+# (kind, file name pattern); kinds are applied in this order, torch first
+# since the other tables take their CUDA versions from torch_cuda
+SOURCES = (
+    ("torch", re.compile(r"^torch_generate_binary_build_matrix_%s\.(?P<ext>py|json)$" % _TAG)),
+    ("fa2_windows", re.compile(r"^fa2_windows_build-wheels_%s\.ya?ml$" % _TAG)),
+    ("xformers", re.compile(r"^xformers_(?P<part>wheels|flash)_%s\.(?:ya?ml|py)$" % _TAG)),
+    ("bitsandbytes", re.compile(r"^bnb_python-package_%s\.ya?ml$" % _TAG)),
+)
+
+
+def classify(filename):
+    # (kind, tag) of a ground-truth file name, or None
+    for kind, pattern in SOURCES:
+        match = pattern.match(filename)
+        if match:
+            return kind, match.group("tag")
+    return None
+
+
+# ---------------------------------------------------------------------------
+# File formats
+
+def _strip_comment(line):
+    quote = None
+    for i, char in enumerate(line):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "#" and (i == 0 or line[i - 1] in " \t"):
+            return line[:i]
+    return line
+
+
+def _split_top(text, separator):
+    # Splits at separators outside quotes and brackets
+    parts, depth, quote, start = [], 0, None, 0
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char in "[{":
+            depth += 1
+        elif char in "]}":
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _scalar(text):
+    text = text.strip()
+    if text.startswith("[") and text.endswith("]"):
+        inner = text[1:-1].strip()
+        return [_scalar(part) for part in _split_top(inner, ",") if part.strip()] if inner else []
+    if text.startswith("{") and text.endswith("}"):
+        found = {}
+        for part in _split_top(text[1:-1], ","):
+            key, _, value = part.partition(":")
+            if key.strip():
+                found[_scalar(key)] = _scalar(value)
+        return found
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "'\"":
+        return text[1:-1]
+    return text
+
+
+def _key_value(content):
+    # ("key", "value text") of a "key: value" line, or None
+    quote = None
+    for i, char in enumerate(content):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == ":" and (i + 1 == len(content) or content[i + 1] in " \t"):
+            return _scalar(content[:i]), content[i + 1:].strip()
+        elif char in "[{" and i == 0:
+            return None
+    return None
+
+
+def _yaml_lines(text):
+    # (indent, content) of the meaningful lines: comments dropped, block
+    # scalar bodies (run: | scripts) skipped and multi-line flow sequences
+    # joined
+    lines = []
+    raw = text.splitlines()
+    i = 0
+    while i < len(raw):
+        line = _strip_comment(raw[i]).rstrip()
+        i += 1
+        content = line.lstrip()
+        if not content or content in ("---", "..."):
+            continue
+        indent = len(line) - len(content)
+        while content.count("[") > content.count("]") and i < len(raw):
+            content += " " + _strip_comment(raw[i]).strip()
+            i += 1
+        if re.search(r"(?:^|:\s|-\s)[|>][-+0-9]*$", content):
+            # The body is dropped, so "run: |" reads as "run:" with no value
+            content = re.sub(r"[|>][-+0-9]*$", "", content).rstrip() or "-"
+            while i < len(raw) and (not raw[i].strip() or len(raw[i]) - len(raw[i].lstrip()) > indent):
+                i += 1
+        lines.append([indent, content])
+    return lines
+
+
+def _yaml_block(lines, pos, indent):
+    content = lines[pos][1]
+    if content != "-" and not content.startswith("- ") and _key_value(content) is None:
+        # A value on the line after its key ("cuda_version:\n  [...]")
+        return _scalar(content), pos + 1
+    if content == "-" or content.startswith("- "):
+        items = []
+        while pos < len(lines) and lines[pos][0] == indent and (lines[pos][1] == "-" or lines[pos][1].startswith("- ")):
+            text = lines[pos][1][2:].strip()
+            if not text:
+                pos += 1
+                if pos < len(lines) and lines[pos][0] > indent:
+                    value, pos = _yaml_block(lines, pos, lines[pos][0])
+                else:
+                    value = None
+            elif _key_value(text) is not None:
+                # "- key: value" opens a mapping indented past the dash
+                lines[pos] = [indent + 2, text]
+                value, pos = _yaml_block(lines, pos, indent + 2)
+            else:
+                value = _scalar(text)
+                pos += 1
+            items.append(value)
+        return items, pos
+
+    mapping = {}
+    while pos < len(lines) and lines[pos][0] == indent:
+        pair = _key_value(lines[pos][1])
+        if pair is None:
+            raise ValueError(f"unsupported YAML line: {lines[pos][1]!r}")
+        key, text = pair
+        pos += 1
+        if text:
+            mapping[key] = _scalar(text)
+        elif pos < len(lines) and (lines[pos][0] > indent or (
+                lines[pos][0] == indent and lines[pos][1].startswith("- "))):
+            mapping[key], pos = _yaml_block(lines, pos, lines[pos][0])
+        else:
+            mapping[key] = None
+    return mapping, pos
+
+
+def parse_yaml(text):
+    # The YAML subset GitHub workflow matrices are written in: block
+    # mappings and sequences, flow sequences and mappings, quoted and plain
+    # scalars (kept as strings, so 3.10 stays "3.10")
+    lines = _yaml_lines(text)
+    if not lines:
+        return {}
+    value, _ = _yaml_block(lines, 0, lines[0][0])
+    return value
+
+
+def _expect(value, kind, what):
+    # Shape check on a parsed document, so a malformed file is reported as a
+    # ValueError instead of failing on the first attribute lookup
+    if not isinstance(value, kind):
+        expected = kind[0] if isinstance(kind, tuple) else kind
+        names = {dict: "a mapping", list: "a list", str: "a string"}
+        raise ValueError(f"{what} must be {names.get(expected, expected.__name__)}, not {type(value).__name__}")
+    return value
+
+
+def workflow_matrices(document):
+    # {job name: strategy.matrix} of a workflow
+    jobs = _expect(_expect(document, dict, "a workflow").get("jobs") or {}, dict, "jobs")
+    return {name: job["strategy"]["matrix"] for name, job in jobs.items()
+            if isinstance(job, dict) and isinstance(job.get("strategy"), dict)
+            and isinstance(job["strategy"].get("matrix"), dict)}
+
+
+def expand_matrix(matrix):
+    # GitHub Actions semantics: the product of the other keys, minus the
+    # exclude entries, then include entries extend the product combinations
+    # they match or are added as new ones
+    keys = [key for key in matrix if key not in ("include", "exclude")]
+    values = [matrix[key] if isinstance(matrix[key], list) else [matrix[key]] for key in keys]
+    combos = [dict(zip(keys, combo)) for combo in itertools.product(*values)] if keys else []
+    for exclude in _entries(matrix, "exclude"):
+        combos = [combo for combo in combos if any(combo.get(k) != v for k, v in exclude.items())]
+    product = combos[:]
+    for include in _entries(matrix, "include"):
+        matching = [combo for combo in product
+                    if all(combo[k] == v for k, v in include.items() if k in keys)]
+        if matching:
+            for combo in matching:
+                combo.update((k, v) for k, v in include.items() if k not in keys)
+        else:
+            combos.append(dict(include))
+    return combos
+
+
+def _entries(matrix, key):
+    # The include or exclude list of a matrix, each entry a mapping
+    entries = _expect(matrix.get(key) or [], list, f"matrix {key}")
+    return [_expect(entry, dict, f"a matrix {key} entry") for entry in entries]
+
+
+def _statements(text, names):
+    # The top-level statements starting with one of names: each runs until
+    # the next line at column 0 that doesn't close a bracket. Parsing just
+    # these is many times faster than parsing the whole file.
+    lines = text.splitlines()
+    starts = re.compile(r"^(?:%s)\s*(?::[^=]*)?=" % "|".join(map(re.escape, names)))
+    picked = []
+    i = 0
+    while i < len(lines):
+        if not starts.match(lines[i]):
+            i += 1
+            continue
+        picked.append(lines[i])
+        i += 1
+        while i < len(lines) and (not lines[i].strip() or lines[i][0] in " \t)]}#"):
+            picked.append(lines[i])
+            i += 1
+    return "\n".join(picked) + "\n"
+
+
+def python_literals(text, names):
+    # The module-level NAME = <literal> assignments of names in a Python
+    # source, read with ast.literal_eval so nothing in the file runs; a call
+    # with one literal argument (parse_version("2.7.1")) stands for that
+    # argument
+    found = {}
+    try:
+        tree = ast.parse(_statements(text, names))
+    except SyntaxError:
+        tree = ast.parse(text)
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, value = [node.target], node.value
+        else:
+            continue
+        targets = [target for target in targets if isinstance(target, ast.Name) and target.id in names]
+        if not targets:
+            continue
+        if isinstance(value, ast.Call) and len(value.args) == 1 and not value.keywords:
+            value = value.args[0]
+        try:
+            literal = ast.literal_eval(value)
+        except ValueError:
+            continue
+        for target in targets:
+            found[target.id] = literal
+    return found
+
+
+def parse_requirements(text):
+    # {component: version} of a PYTORCH_EXTRA_INSTALL_REQUIREMENTS string:
+    # "nvidia-cudnn-cu12==9.10.2.21; platform_system == 'Linux' | ...";
+    # nvidia wheels by component ("cudnn", "cuda-runtime")
+    pins = {}
+    for requirement in (text or "").split("|"):
+        name, _, rest = requirement.split(";")[0].partition("==")
+        name = normalize_name(name.strip())
+        if not name or not rest.strip():
+            continue
+        if name.startswith("nvidia-"):
+            name = nvidia_component(name)
+        pins.setdefault(name, rest.strip())
+    return pins
+
+
+def _sorted_versions(values):
+    return sorted(set(values), key=lambda v: Version(v).key)
+
+
+def _moniker(cuda):
+    # "12.8" or "12.8.1" -> "cu128"
+    version = Version(cuda)
+    return f"cu{version.major}{version.minor}"
+
+
+# ---------------------------------------------------------------------------
+# Parsers: (tag, file name, text) -> facts, independent of every other file
+
+def _torch_build(facts, arch, cuda, requirements):
+    pins = parse_requirements(_expect(requirements, str, "install requirements") if requirements else None)
+    build = facts["builds"].setdefault(_moniker(arch), {})
+    build.update((key, value) for key, value in (
+        ("family", Version(arch).family), ("cuda", cuda), ("cudnn", pins.get("cudnn")),
+        ("components", {k: v for k, v in pins.items() if k != "triton"} or None)) if value)
+    if pins.get("triton"):
+        facts["triton"] = pins["triton"]
+
+
+def parse_torch_matrix(tag, filename, text):
+    facts = {"python": [], "triton": None, "builds": {}}
+    if filename.endswith(".py"):
+        literals = python_literals(text, ("CUDA_ARCHES", "CUDA_ARCHES_FULL_VERSION",
+                                          "PYTORCH_EXTRA_INSTALL_REQUIREMENTS", "FULL_PYTHON_VERSIONS"))
+        full = _expect(literals.get("CUDA_ARCHES_FULL_VERSION") or {}, dict, "CUDA_ARCHES_FULL_VERSION")
+        requirements = _expect(literals.get("PYTORCH_EXTRA_INSTALL_REQUIREMENTS") or {}, dict,
+                               "PYTORCH_EXTRA_INSTALL_REQUIREMENTS")
+        for arch in _expect(literals.get("CUDA_ARCHES") or [], (list, tuple), "CUDA_ARCHES"):
+            _torch_build(facts, arch, full.get(arch), requirements.get(arch))
+        pythons = _expect(literals.get("FULL_PYTHON_VERSIONS") or [], (list, tuple), "FULL_PYTHON_VERSIONS")
+    else:
+        document = json.loads(text)
+        entries = document.get("include", []) if isinstance(document, dict) else document
+        pythons = []
+        for entry in _expect(entries, list, "the build matrix"):
+            _expect(entry, dict, "a build matrix entry")
+            if entry.get("gpu_arch_type") != "cuda" or entry.get("package_type") not in ("manywheel", "wheel"):
+                continue
+            _torch_build(facts, entry["gpu_arch_version"], None, entry.get("pytorch_extra_install_requirements"))
+            pythons.append(entry.get("python_version", ""))
+    # Free-threaded builds ("3.13t") aren't separate Python versions here
+    facts["python"] = _sorted_versions(p for p in pythons if re.match(r"^\d+\.\d+$", p))
+    if not facts["builds"]:
+        raise ValueError("no CUDA builds found")
+    return facts
+
+
+def _matrix_value(combo, *names):
+    for name in names:
+        if combo.get(name) is not None:
+            return str(combo[name])
+    return None
+
+
+def parse_fa2_windows(tag, filename, text):
+    wheels = {}
+    for matrix in workflow_matrices(parse_yaml(text)).values():
+        for combo in expand_matrix(matrix):
+            torch = _matrix_value(combo, "torch", "torch-version", "torch_version")
+            cuda = _matrix_value(combo, "cuda", "cuda-version", "cuda_version")
+            python = _matrix_value(combo, "pyver", "python-version", "python")
+            os_name = _matrix_value(combo, "os") or "windows"
+            if torch and cuda and python and os_name.startswith("windows"):
+                wheels.setdefault(f"{_moniker(cuda)} {torch}", []).append(python)
+    if not wheels:
+        raise ValueError("no Windows torch/cuda/python build matrix found")
+    return {"wheels": {key: _sorted_versions(pythons) for key, pythons in wheels.items()}}
+
+
+def parse_xformers(tag, filename, text):
+    if filename.endswith(".py"):
+        literals = python_literals(text, ("FLASH_VER_MIN", "FLASH_VER_LAST"))
+        bounds = [literals.get("FLASH_VER_MIN"), literals.get("FLASH_VER_LAST")]
+        if None in bounds:
+            raise ValueError("FLASH_VER_MIN / FLASH_VER_LAST not found")
+        return {"fa2": "-".join(".".join(map(str, b)) if isinstance(b, tuple) else str(b) for b in bounds)}
+    # CU_VERSIONS sits in a "run: |" Python script of the workflow, so both
+    # values are read from the text
+    cu = re.search(r"CU_VERSIONS\s*=\s*(\[[^\]]*\])", text)
+    torch = re.search(r"torch_version\s*(?:[:=]|\bin\b)\s*(\[[^\]]*\]|['\"]?[\d.]+['\"]?)", text)
+    if cu is None or torch is None:
+        raise ValueError("CU_VERSIONS or torch_version not found")
+    torch_versions = _scalar(torch.group(1))
+    if isinstance(torch_versions, list):
+        if not torch_versions:
+            raise ValueError("torch_version lists no versions")
+        torch_versions = _sorted_versions(torch_versions)[-1]
+    monikers = [str(cu) if str(cu).startswith("cu") else f"cu{cu}" for cu in ast.literal_eval(cu.group(1))]
+    return {"torch": torch_versions, "monikers": monikers}
+
+
+def parse_bitsandbytes(tag, filename, text):
+    matrices = workflow_matrices(parse_yaml(text))
+    matrix = matrices.get("build-cuda") or next(
+        (m for m in matrices.values() if "cuda_version" in m), None)
+    if not matrix or not matrix.get("cuda_version"):
+        raise ValueError("no cuda_version matrix found")
+    versions = matrix["cuda_version"]
+    return {"cuda": _sorted_versions(versions if isinstance(versions, list) else [versions])}
+
+
+PARSERS = {"torch": parse_torch_matrix, "fa2_windows": parse_fa2_windows,
+           "xformers": parse_xformers, "bitsandbytes": parse_bitsandbytes}
+
+
+def _parse_job(job):
+    # Runs in the workers: (key, facts or None, error or None)
+    key, kind, tag, filename, text = job
+    try:
+        return key, PARSERS[kind](tag, filename, text), None
+    except (ValueError, KeyError, TypeError, SyntaxError) as e:
+        return key, None, f"{filename}: {e}"
+
+
+# ---------------------------------------------------------------------------
+# Merging facts into the tables
+
+def _merge(a, b):
+    # Facts of several files for one tag: dicts merge, lists union, and
+    # missing values never override known ones
+    if isinstance(a, dict) and isinstance(b, dict):
+        merged = dict(a)
+        for key, value in b.items():
+            merged[key] = _merge(a[key], value) if key in a else value
+        return merged
+    if isinstance(a, list) and isinstance(b, list):
+        return a + [item for item in b if item not in a]
+    return a if b is None else b
+
+
+def _replace_groups(rows, version_of, groups, belongs=None):
+    # rows with the rows of every tag in groups ({tag: new rows}) replaced,
+    # in one pass: a tag's new rows take the place of its old ones, or for
+    # a new tag go before the first row of an older one (the tables list
+    # newest first). belongs(row) limits which old rows are replaced.
+    belongs = belongs or (lambda row: True)
+    present = {version_of(row) for row in rows if belongs(row)}
+    new = sorted((tag for tag in groups if tag not in present), key=lambda tag: Version(tag).key, reverse=True)
+    out = []
+    placed = set()
+    for row in rows:
+        tag = version_of(row)
+        key = Version(tag).key
+        while new and Version(new[0]).key > key:
+            out.extend(groups[new.pop(0)])
+        if tag in groups and belongs(row):
+            if tag not in placed:
+                out.extend(groups[tag])
+                placed.add(tag)
+            continue
+        out.append(row)
+    for tag in new:
+        out.extend(groups[tag])
+    return out
+
+
+def _release_for(components, metapackages):
+    # The CUDA release whose metapackage versions agree with the most pins,
+    # None when no release or several equally good ones match
+    scores = {}
+    for cuda, packages in metapackages.items():
+        scores[cuda] = sum(1 for k, v in components.items() if packages.get(k) == v)
+    best = max(scores.values(), default=0)
+    found = [cuda for cuda, score in scores.items() if score == best]
+    return found[0] if best and len(found) == 1 else None
+
+
+def _ascending(facts_by_tag):
+    return sorted(facts_by_tag.items(), key=lambda item: Version(item[0]).key)
+
+
+def _apply_torch(document, facts_by_tag, warnings):
+    old = {(row["torch"], row["wheel"]): row for row in document["torch_cuda"]}
+    # Latest known CUDA per wheel moniker, for builds a file leaves open
+    by_moniker = {}
+    for row in sorted(document["torch_cuda"], key=lambda row: Version(row["torch"]).key):
+        by_moniker[row["wheel"]] = row["cuda"]
+    triton_rows = {row["torch"]: row for row in document["torch_python_triton"]}
+    builds_by_torch = {}
+    triton_by_torch = {}
+
+    for torch, facts in _ascending(facts_by_tag):
+        if torch not in document["torch_ecosystem"]:
+            warnings.append(f"torch {torch}: add its torchvision/torchaudio versions to torch_ecosystem by hand")
+        previous_triton = triton_rows.get(torch)
+        triton = facts.get("triton") or (previous_triton or {}).get("triton")
+        if not triton:
+            # A torch version without its torch_python_triton row would have
+            # builds but no Python versions; the matrix script reads the pin
+            # from triton_version.txt, its JSON output carries it
+            warnings.append(f"torch {torch}: no triton pin in the sources (ingest the matrix JSON output), "
+                            f"torch {torch} left out")
+            continue
+        rows = []
+        for moniker, build in sorted(facts["builds"].items(), key=lambda item: Version(item[1]["family"]).key,
+                                     reverse=True):
+            previous = old.get((torch, moniker)) or {}
+            cuda = (build.get("cuda") or _release_for(build.get("components") or {}, document["cuda_metapackages"])
+                    or previous.get("cuda") or by_moniker.get(moniker))
+            cudnn = build.get("cudnn") or previous.get("cudnn")
+            if not cuda or not cudnn:
+                warnings.append(f"torch {torch} {moniker}: CUDA or cuDNN version unknown, build left out")
+                continue
+            # cuDNN 9.x for CUDA 13.x is Linux-only
+            windows = previous.get("windows", Version(cuda).major < 13)
+            rows.append({"torch": torch, "wheel": moniker, "cuda": cuda, "cudnn": cudnn, "windows": windows})
+            by_moniker[moniker] = cuda
+        if not rows:
+            continue
+        builds_by_torch[torch] = rows
+
+        previous = previous_triton
+        if previous is None:
+            # sympy pins come from PyTorch's CI requirements, not the build
+            # matrix; the previous release's pin is the best guess
+            older = [row for version, row in triton_rows.items() if Version(version).key < Version(torch).key]
+            older = max(older, key=lambda row: Version(row["torch"]).key) if older else None
+            row = {"torch": torch, "cuda_versions": [], "python": [], "triton": triton, "triton_compat": [triton],
+                   "sympy": older["sympy"] if older else None}
+        else:
+            row = dict(previous)
+            if triton != previous["triton"]:
+                row["triton_compat"] = _sorted_versions(previous["triton_compat"] + [triton])
+        row["triton"] = triton
+        row["cuda_versions"] = _sorted_versions(build["family"] for build in facts["builds"].values())
+        row["python"] = facts["python"] or row["python"]
+        triton_rows[torch] = row
+        triton_by_torch[torch] = [row]
+
+    document["torch_cuda"] = _replace_groups(document["torch_cuda"], lambda row: row["torch"], builds_by_torch)
+    document["torch_python_triton"] = _replace_groups(document["torch_python_triton"], lambda row: row["torch"],
+                                                      triton_by_torch)
+
+
+def _torch_cuda(document):
+    return {(row["torch"], row["wheel"]): row["cuda"] for row in document["torch_cuda"]}
+
+
+def _apply_fa2_windows(document, facts_by_tag, warnings):
+    cudas = _torch_cuda(document)
+    wheels_by_fa2 = {}
+    builds_by_fa2 = {}
+    for fa2, facts in _ascending(facts_by_tag):
+        wheels = wheels_by_fa2[fa2] = []
+        builds = builds_by_fa2[fa2] = []
+        for key, pythons in sorted(facts["wheels"].items(), key=lambda item: Version(item[0].split()[1]).key):
+            moniker, torch = key.split()
+            wheels.append({"fa2": fa2, "wheel": moniker, "torch": torch, "python": pythons})
+            cuda = cudas.get((torch, moniker))
+            if cuda is None:
+                warnings.append(f"flash-attn {fa2}: no torch {torch} {moniker} build in torch_cuda, rows left out")
+                continue
+            builds.extend({"fa2": fa2, "python": python, "torch": torch, "cuda": cuda, "assumed": False}
+                          for python in pythons)
+    document["fa2_windows_wheels"] = _replace_groups(document["fa2_windows_wheels"], lambda row: row["fa2"],
+                                                     wheels_by_fa2)
+    # Assumed rows are curated by hand and stay
+    document["flash_attention"] = _replace_groups(document["flash_attention"], lambda row: row["fa2"],
+                                                  builds_by_fa2, lambda row: not row.get("assumed"))
+
+
+def _apply_xformers(document, facts_by_tag, warnings):
+    cudas = _torch_cuda(document)
+    previous_rows = {row["xformers"]: row for row in document["xformers"]}
+    rows = {}
+    for xformers, facts in _ascending(facts_by_tag):
+        previous = previous_rows.get(xformers)
+        row = dict(previous) if previous else {"xformers": xformers, "torch": None, "fa2": None, "cuda": [],
+                                               "notes": ""}
+        if facts.get("torch"):
+            row["torch"] = facts["torch"]
+        if facts.get("fa2"):
+            row["fa2"] = facts["fa2"]
+        if facts.get("monikers") and row["torch"]:
+            found = [cudas.get((row["torch"], moniker)) for moniker in facts["monikers"]]
+            # Only CUDA 12+ builds are tracked
+            row["cuda"] = _sorted_versions(cuda for cuda in found if cuda and Version(cuda).major >= 12)
+        if not row["torch"] or not row["fa2"]:
+            warnings.append(f"xformers {xformers}: needs both its wheels.yml and flash.py, row left out")
+            continue
+        rows[xformers] = [row]
+    document["xformers"] = _replace_groups(document["xformers"], lambda row: row["xformers"], rows)
+
+
+def _apply_bitsandbytes(document, facts_by_tag, warnings):
+    known = {row["bnb"]: row for row in document["bitsandbytes"]}
+    rows = {}
+    for bnb, facts in _ascending(facts_by_tag):
+        previous = known.get(bnb)
+        if previous is None:
+            # The Python range comes from pyproject.toml, not the workflow;
+            # the previous release's range is the best guess, or the next
+            # release's for one older than every known row
+            key = Version(bnb).key
+            older = [row for version, row in known.items() if Version(version).key < key]
+            if older:
+                nearest = max(older, key=lambda row: Version(row["bnb"]).key)
+            elif known:
+                nearest = min(known.values(), key=lambda row: Version(row["bnb"]).key)
+                warnings.append(f"bitsandbytes {bnb}: Python range taken from {nearest['bnb']}, "
+                                f"check its pyproject.toml")
+            else:
+                warnings.append(f"bitsandbytes {bnb}: Python range unknown, row left out")
+                continue
+            previous = {"bnb": bnb, "cuda": [], "python": nearest["python"], "assumed_cuda": []}
+        row = known[bnb] = dict(previous, cuda=facts["cuda"])
+        rows[bnb] = [row]
+    document["bitsandbytes"] = _replace_groups(document["bitsandbytes"], lambda row: row["bnb"], rows)
+
+
+APPLIERS = {"torch": _apply_torch, "fa2_windows": _apply_fa2_windows,
+            "xformers": _apply_xformers, "bitsandbytes": _apply_bitsandbytes}
+
+
+def apply_facts(document, facts_by_tag):
+    # New document with the facts ({(kind, tag): facts}) applied; returns
+    # (document, warnings, names of the tables that changed)
+    updated = copy.deepcopy(document)
+    warnings = []
+    for kind, _ in SOURCES:
+        found = {tag: facts for (k, tag), facts in facts_by_tag.items() if k == kind}
+        if found:
+            APPLIERS[kind](updated, found, warnings)
+    changed = [table for table in document if updated.get(table) != document[table]]
+    return updated, warnings, changed
+
+
+# ---------------------------------------------------------------------------
+# compatibility_data.json
+
+def dump_document(document):
+    # The layout of compatibility_data.json: one table row per line
+    def dump(value, depth):
+        expand = (isinstance(value, dict) and depth < 2) or (isinstance(value, list) and depth < 3)
+        if not expand or not value:
+            return json.dumps(value, ensure_ascii=False)
+        pad = "  " * (depth + 1)
+        if isinstance(value, dict):
+            items = [f"{pad}{json.dumps(k, ensure_ascii=False)}: {dump(v, depth + 1)}" for k, v in value.items()]
+            return "{\n" + ",\n".join(items) + "\n" + "  " * depth + "}"
+        items = [pad + dump(v, depth + 1) for v in value]
+        return "[\n" + ",\n".join(items) + "\n" + "  " * depth + "]"
+
+    return dump(document, 0) + "\n"
+
+
+def _read_cache(path):
+    try:
+        with open(path, "rb") as f:
+            format_, entries = pickle.load(f)
+    except Exception:
+        return {}
+    return entries if format_ == INGEST_CACHE_FORMAT else {}
+
+
+def collect_facts(directory, processes=None, cache_path=INGEST_CACHE_PATH):
+    # Parses the ground-truth files under directory. Returns ({(kind, tag):
+    # facts}, warnings, (files, parsed, cached, skipped)).
+    cache = _read_cache(cache_path) if cache_path else {}
+    jobs = []
+    found = []
+    skipped = 0
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        for name in sorted(names):
+            source = classify(name)
+            if source is None:
+                skipped += 1
+                continue
+            with open(os.path.join(root, name), "rb") as f:
+                raw = f.read()
+            # The file name is part of the key: it carries the tag and format
+            key = (name, hashlib.sha256(raw).hexdigest())
+            found.append((key, source))
+            if key not in cache:
+                jobs.append((key, source[0], source[1], name, raw.decode("utf-8", errors="replace")))
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(jobs) < INGEST_INLINE_LIMIT:
+        results = list(map(_parse_job, jobs))
+    else:
+        with multiprocessing.Pool(min(processes, len(jobs))) as pool:
+            results = pool.map(_parse_job, jobs, chunksize=INGEST_CHUNK_SIZE)
+
+    warnings = []
+    for key, facts, error in results:
+        cache[key] = (facts, error)
+    facts_by_tag = {}
+    for key, source in found:
+        facts, error = cache[key]
+        if error:
+            warnings.append(error)
+        elif source in facts_by_tag:
+            facts_by_tag[source] = _merge(facts_by_tag[source], facts)
+        else:
+            facts_by_tag[source] = facts
+    if cache_path and (jobs or len(cache) != len(found)):
+        # Entries of files no longer present are dropped
+        dump_pickle(cache_path, (INGEST_CACHE_FORMAT, {key: cache[key] for key, _ in found}))
+    return facts_by_tag, warnings, (len(found) + skipped, len(jobs), len(found) - len(jobs), skipped)
+
+
+def ingest(directory, output=DATA_PATH, processes=None, cache_path=INGEST_CACHE_PATH, today=None):
+    # Updates the data file at output from the ground-truth directory and
+    # returns (counts, warnings, changed tables); the file is rewritten only
+    # when a table changed
+    facts_by_tag, warnings, counts = collect_facts(directory, processes, cache_path)
+    with open(output, encoding="utf-8") as f:
+        document = json.load(f)
+    if document.get("format") != DATA_FORMAT:
+        raise ValueError(f"Unsupported compatibility data format: {document.get('format')!r}")
+    updated, apply_warnings, changed = apply_facts(document, facts_by_tag)
+    if changed:
+        updated["data_version"] = (today or date.today()).isoformat()
+        tmp_path = f"{output}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(dump_document(updated))
+        os.replace(tmp_path, output)
+    return counts, warnings + apply_warnings, changed
@@ -0,0 +1,274 @@
+import os
+from collections import namedtuple
+
+from compatibility_versions import Version
+
+# Install instructions for compatible combinations: the pip commands behind
+# the GUI's "Copy Install Commands" menu, and lockfiles for whole result
+# sets, one per stack and platform in every requested format:
+#
+#   requirements  pip requirements file (pip install -r)
+#   constraints   pip constraints file, bare pins only (pip install -c)
+#   uv            pyproject.toml fragment pinning torch to its PyTorch index
+#   conda         environment.yml installing the pins through pip
+#
+# The per-row facts (wheel moniker, triton and sympy pins, FA2 Windows
+# wheel URL) are worked out once per distinct input, and lockfiles already
+# on disk with the same content are left untouched.
+
+PLATFORMS = ("linux", "windows")
+LOCKFILE_FORMATS = ("requirements", "constraints", "uv", "conda")
+LOCKFILE_NAMES = {"requirements": "requirements.txt", "constraints": "constraints.txt",
+                  "uv": "pyproject.toml", "conda": "environment.yml"}
+TORCH_INDEX_URL = "https://download.pytorch.org/whl/"
+FA2_WINDOWS_RELEASES = "https://github.com/kingbri1/flash-attention/releases"
+MANIFEST_NAME = "manifest.json"
+
+InstallPlan = namedtuple("InstallPlan", (
+    "platform", "torch", "torchvision", "torchaudio", "python", "cuda", "moniker",
+    "triton_package", "triton", "sympy", "fa2", "fa2_url", "xformers", "bnb"))
+
+
+class InstallPlanner:
+    def __init__(self, data):
+        self.data = data
+        self._monikers = {}
+        self._sympy = {}
+        self._fa2_urls = {}
+
+    def moniker(self, cuda):
+        # Wheel moniker from the CUDA version, e.g. "12.8.1" -> "cu128"
+        moniker = self._monikers.get(cuda)
+        if moniker is None:
+            version = Version(cuda)
+            moniker = self._monikers[cuda] = f"cu{version.major}{version.minor}"
+        return moniker
+
+    def sympy(self, torch, triton):
+        key = (torch, triton)
+        if key not in self._sympy:
+            rows = self.data.triton_by_torch.get(torch, ())
+            match = next((pt for pt in rows if pt.triton == triton), rows[0] if rows else None)
+            self._sympy[key] = match.sympy if match is not None else None
+        return self._sympy[key]
+
+    def fa2_windows_url(self, fa2_ver, moniker, torch_ver, python_ver):
+        key = (fa2_ver, moniker, torch_ver, python_ver)
+        if key not in self._fa2_urls:
+            self._fa2_urls[key] = self._find_fa2_windows_url(fa2_ver, moniker, torch_ver, python_ver)
+        return self._fa2_urls[key]
+
+    def _find_fa2_windows_url(self, fa2_ver, moniker, torch_ver, python_ver):
+        py_nodot = python_ver.replace(".", "")
+        key = (fa2_ver, moniker, torch_ver)
+        # Direct match
+        available = self.data.fa2_windows_wheels.get(key)
+        if not available:
+            # Fallback for assumed compatibility (e.g., torch 2.9.1 -> try 2.9.0)
+            torch = Version(torch_ver)
+            base_torch = f"{torch.major}.{torch.minor}.0"
+            key = (fa2_ver, moniker, base_torch)
+            available = self.data.fa2_windows_wheels.get(key)
+        if available and python_ver in available:
+            return (f"{FA2_WINDOWS_RELEASES}/download/"
+                    f"v{fa2_ver}/flash_attn-{fa2_ver}%2B{moniker}torch{key[2]}"
+                    f"cxx11abiFALSE-cp{py_nodot}-cp{py_nodot}-win_amd64.whl")
+        return None
+
+    def plan(self, combo, platform):
+        # What to install for one CompatibleCombination; add-ons take their
+        # newest listed version
+        moniker = self.moniker(combo.cuda)
+        fa2 = combo.fa2_versions[0] if combo.fa2_versions else None
+        fa2_url = None
+        if fa2 and platform == "windows":
+            fa2_url = self.fa2_windows_url(fa2, moniker, combo.torch, combo.python)
+        return InstallPlan(
+            platform=platform,
+            torch=combo.torch,
+            torchvision=combo.torchvision,
+            torchaudio=combo.torchaudio,
+            python=combo.python,
+            cuda=combo.cuda,
+            moniker=moniker,
+            triton_package="triton-windows" if platform == "windows" else "triton",
+            triton=combo.triton_pin,
+            sympy=self.sympy(combo.torch, combo.triton_pin),
+            fa2=fa2,
+            fa2_url=fa2_url,
+            xformers=combo.xformers_versions[0] if combo.xformers_versions else None,
+            bnb=combo.bnb_versions[0] if combo.bnb_versions else None,
+        )
+
+
+def pip_commands(plan):
+    # The text of the GUI's "Copy Install Commands" menu entries
+    lines = []
+    lines.append(f"# PyTorch {plan.torch} + CUDA {plan.cuda} ({plan.moniker})")
+    lines.append(f"pip install torch=={plan.torch} torchvision=={plan.torchvision} torchaudio=={plan.torchaudio} "
+                 f"--index-url {TORCH_INDEX_URL}{plan.moniker}")
+
+    if plan.triton:
+        lines.append("")
+        if plan.platform == "windows":
+            lines.append("# Triton (Windows)")
+        else:
+            lines.append("# Triton")
+        lines.append(f"pip install {plan.triton_package}=={plan.triton}")
+
+    if plan.sympy:
+        lines.append("")
+        lines.append("# Sympy")
+        lines.append(f'pip install "sympy{plan.sympy}"')
+
+    # Flash Attention 2
+    if plan.fa2:
+        lines.append("")
+        if plan.platform == "linux":
+            lines.append("# Flash Attention 2")
+            lines.append(f"pip install flash-attn=={plan.fa2}")
+        elif plan.fa2_url:
+            lines.append("# Flash Attention 2 (Windows wheel from kingbri1/flash-attention)")
+            lines.append(f"pip install {plan.fa2_url}")
+        else:
+            lines.append("# Flash Attention 2 (no pre-built Windows wheel found for this combination)")
+            lines.append(f"# Check: {FA2_WINDOWS_RELEASES}")
+
+    if plan.xformers:
+        lines.append("")
+        lines.append("# Xformers")
+        lines.append(f"pip install xformers=={plan.xformers}")
+
+    if plan.bnb:
+        lines.append("")
+        lines.append("# bitsandbytes")
+        lines.append(f"pip install bitsandbytes=={plan.bnb}")
+
+    return "\n".join(lines)
+
+
+def _requirements(plan, pins_only=False):
+    # (requirement lines, notes) shared by the lockfile formats
+    lines = [f"torch=={plan.torch}", f"torchvision=={plan.torchvision}", f"torchaudio=={plan.torchaudio}"]
+    notes = []
+    if plan.triton:
+        lines.append(f"{plan.triton_package}=={plan.triton}")
+    if plan.sympy:
+        lines.append(f"sympy{plan.sympy}")
+    if plan.fa2:
+        if plan.platform == "windows" and not pins_only:
+            if plan.fa2_url:
+                lines.append(f"flash-attn @ {plan.fa2_url}")
+            else:
+                notes.append(f"flash-attn {plan.fa2}: no pre-built Windows wheel, see {FA2_WINDOWS_RELEASES}")
+        else:
+            lines.append(f"flash-attn=={plan.fa2}")
+    if plan.xformers:
+        lines.append(f"xformers=={plan.xformers}")
+    if plan.bnb:
+        lines.append(f"bitsandbytes=={plan.bnb}")
+    return lines, notes
+
+
+def _header(plan):
+    return f"PyTorch {plan.torch} ({plan.moniker}), Python {plan.python}, {plan.platform}"
+
+
+def render_requirements(plan):
+    lines, notes = _requirements(plan)
+    head = [f"# {_header(plan)}"] + [f"# {note}" for note in notes]
+    head.append(f"--extra-index-url {TORCH_INDEX_URL}{plan.moniker}")
+    return "\n".join(head + lines) + "\n"
+
+
+def render_constraints(plan):
+    lines, _ = _requirements(plan, pins_only=True)
+    return "\n".join([f"# {_header(plan)}"] + lines) + "\n"
+
+
+def render_uv(plan):
+    lines, notes = _requirements(plan)
+    index = f"pytorch-{plan.moniker}"
+    out = [f"# {_header(plan)}"] + [f"# {note}" for note in notes]
+    out.append("[project]")
+    out.append(f'requires-python = "=={plan.python}.*"')
+    out.append("dependencies = [")
+    out.extend(f'    "{line}",' for line in lines)
+    out.append("]")
+    out.append("")
+    out.append("[[tool.uv.index]]")
+    out.append(f'name = "{index}"')
+    out.append(f'url = "{TORCH_INDEX_URL}{plan.moniker}"')
+    out.append("explicit = true")
+    out.append("")
+    out.append("[tool.uv.sources]")
+    for package in ("torch", "torchvision", "torchaudio"):
+        out.append(f'{package} = {{ index = "{index}" }}')
+    return "\n".join(out) + "\n"
+
+
+def render_conda(plan):
+    lines, notes = _requirements(plan)
+    out = [f"# {_header(plan)}"] + [f"# {note}" for note in notes]
+    out.append(f"name: torch{plan.torch}-{plan.moniker}-py{plan.python.replace('.', '')}")
+    out.append("channels:")
+    out.append("  - conda-forge")
+    out.append("dependencies:")
+    out.append(f"  - python={plan.python}")
+    out.append("  - pip")
+    out.append("  - pip:")
+    out.append(f"    - --extra-index-url {TORCH_INDEX_URL}{plan.moniker}")
+    out.extend(f'    - "{line}"' for line in lines)
+    return "\n".join(out) + "\n"
+
+
+RENDERERS = {"requirements": render_requirements, "constraints": render_constraints,
+             "uv": render_uv, "conda": render_conda}
+
+
+def stack_name(plan):
+    return f"torch{plan.torch}-cuda{plan.cuda}-py{plan.python.replace('.', '')}-{plan.platform}"
+
+
+def write_lockfiles(data, combinations, out_dir, formats=LOCKFILE_FORMATS, platforms=PLATFORMS):
+    # Writes <out_dir>/<format>/<stack>-<name> for every combination and
+    # platform, plus a manifest mapping each stack to its files. Files whose
+    # content is already on disk are left untouched, so re-running after a
+    # data update only rewrites what changed. Returns
+    # (stacks, written, unchanged).
+    import hashlib
+    import json
+
+    planner = InstallPlanner(data)
+    manifest = {}
+    stacks = written = unchanged = 0
+    for fmt in formats:
+        os.makedirs(os.path.join(out_dir, fmt), exist_ok=True)
+
+    for combo in combinations:
+        for platform in platforms:
+            plan = planner.plan(combo, platform)
+            name = stack_name(plan)
+            stacks += 1
+            files = manifest[name] = {}
+            for fmt in formats:
+                content = RENDERERS[fmt](plan).encode("utf-8")
+                path = f"{fmt}/{name}-{LOCKFILE_NAMES[fmt]}"
+                target = os.path.join(out_dir, path)
+                try:
+                    with open(target, "rb") as f:
+                        same = f.read() == content
+                except OSError:
+                    same = False
+                if same:
+                    unchanged += 1
+                else:
+                    with open(target, "wb") as f:
+                        f.write(content)
+                    written += 1
+                files[fmt] = {"path": path, "sha256": hashlib.sha256(content).hexdigest()}
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump({"data_version": data.data_version, "stacks": manifest}, f, indent=1, sort_keys=True)
+        f.write("\n")
+    return stacks, written, unchanged
@@ -0,0 +1,259 @@
+import asyncio
+import json
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from compatibility_engine import CompatibilityEngine, ResultCache
+from compatibility_batch import spec_to_filters
+
+# Small HTTP/1.1 JSON service around one warm CompatibilityEngine, so build
+# agents don't each pay for loading CompatibilityData:
+#
+#   GET /combos?torch=2.9.1&python=3.12     compatible combinations
+#   GET /metapackages                       every CUDA release
+#   GET /metapackages/12.8.1                one CUDA release
+#
+# Query parameters are the batch spec keys (torch, python, cuda, fa2,
+# xformers, triton, bnb, windows_only), taking versions or specifier sets
+# (torch=>=2.8,<2.11 URL-encoded); repeating one selects several values.
+# windows_only is a single flag (1/true/yes).
+# Every response carries an ETag derived from the data version and content
+# hash, so clients can revalidate with If-None-Match. Rendered responses are
+# kept in an LRU keyed by the normalized request, and connections are kept
+# alive unless the client asks otherwise. Request bodies are read and
+# discarded so they are never parsed as a following request; a body that
+# can't be framed, or any method other than GET/HEAD, closes the connection.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+RESPONSE_CACHE_SIZE = 1024
+MAX_HEADER_BYTES = 16384
+MAX_BODY_BYTES = 65536
+IDLE_TIMEOUT = 30
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Content Too Large", 431: "Request Header Fields Too Large"}
+
+
+class QueryService:
+    def __init__(self, engine=None, cache_size=RESPONSE_CACHE_SIZE):
+        self.engine = engine if engine is not None else CompatibilityEngine()
+        self.cache = ResultCache(cache_size)
+        self._generation = None
+
+    @property
+    def etag(self):
+        data = self.engine.data
+        return f'"{data.data_version}-{(data.content_hash or "")[:16]}"'
+
+    def response(self, target):
+        # (status, body bytes) for a request target, cached by normalized route
+        if self._generation != self.engine.data.generation:
+            self.cache.clear()
+            self._generation = self.engine.data.generation
+        parts = urlsplit(target)
+        try:
+            key = (parts.path.rstrip("/") or "/", tuple(sorted(parse_qsl(parts.query))))
+        except ValueError:
+            return 400, _error_body("malformed query string")
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = self.render(*key)
+            self.cache.put(key, cached)
+        return cached
+
+    def render(self, path, params):
+        data = self.engine.data
+        if path == "/combos":
+            spec = {}
+            for name, value in params:
+                # Repeated parameters are a multi-value selection
+                spec.setdefault(name, []).append(value)
+            if len(spec.get("windows_only", ())) == 1:
+                # A flag rather than a selection; spec_to_filters rejects a repeat
+                spec["windows_only"] = spec["windows_only"][0]
+            try:
+                filters = spec_to_filters(spec)
+            except ValueError as e:
+                return 400, _error_body(str(e))
+            rows = self.engine.resolve(filters)
+            return 200, _body({"data_version": data.data_version, "matches": len(rows),
+                               "combinations": [row.as_json() for row in rows]})
+        if path == "/metapackages":
+            return 200, _body({"data_version": data.data_version,
+                               "metapackages": data.cuda_metapackages})
+        if path.startswith("/metapackages/"):
+            cuda = unquote(path[len("/metapackages/"):])
+            if cuda not in data.cuda_metapackages:
+                return 404, _error_body(f"no metapackage data for CUDA {cuda}")
+            return 200, _body({"data_version": data.data_version,
+                               "metapackages": {cuda: data.cuda_metapackages[cuda]}})
+        return 404, _error_body(f"unknown path {path}")
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+                except asyncio.LimitOverrunError:
+                    writer.write(_response(431, _error_body("request headers too large"), None, False))
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    writer.write(_response(400, _error_body("malformed request line"), None, False))
+                    break
+                headers = {}
+                lengths = set()
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        name = name.strip().lower()
+                        headers[name] = value.strip()
+                        if name == "content-length":
+                            lengths.add(value.strip())
+
+                # Consume the body before answering, so its bytes can't be
+                # taken for the next request on this connection
+                problem = _body_problem(headers, lengths)
+                if problem is not None:
+                    writer.write(_response(*problem, None, False))
+                    break
+                length = int(lengths.pop()) if lengths else 0
+                if length:
+                    try:
+                        await asyncio.wait_for(reader.readexactly(length), IDLE_TIMEOUT)
+                    except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                        break
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                if method not in ("GET", "HEAD"):
+                    status, body = 405, _error_body(f"method {method} not allowed")
+                    etag = None
+                    keep_alive = False
+                else:
+                    status, body = self.response(target)
+                    etag = self.etag if status == 200 else None
+                    if etag is not None and headers.get("if-none-match") == etag:
+                        status, body = 304, b""
+                writer.write(_response(status, body, etag, keep_alive, head_only=method == "HEAD"))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        async with server:
+            await server.serve_forever()
+
+
+def _body_problem(headers, lengths):
+    # (status, body) when the request body can't be framed by Content-Length
+    if "transfer-encoding" in headers:
+        return 400, _error_body("chunked request bodies are not supported")
+    if len(lengths) > 1:
+        return 400, _error_body("conflicting Content-Length headers")
+    if lengths:
+        text = next(iter(lengths))
+        if not text.isdigit():
+            return 400, _error_body("malformed Content-Length")
+        if int(text) > MAX_BODY_BYTES:
+            return 413, _error_body("request body too large")
+    return None
+
+
+def _body(document):
+    return json.dumps(document).encode("utf-8")
+
+
+def _error_body(message):
+    return _body({"error": message})
+
+
+def _response(status, body, etag, keep_alive, head_only=False):
+    head = [f"HTTP/1.1 {status} {REASONS[status]}",
+            f"Content-Length: {len(body)}",
+            "Connection: " + ("keep-alive" if keep_alive else "close")]
+    if status != 304:
+        head.append("Content-Type: application/json")
+    if etag is not None:
+        head.append(f"ETag: {etag}")
+        head.append("Cache-Control: no-cache")
+    raw = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1")
+    return raw if head_only or status == 304 else raw + body
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    service = QueryService()
+    print(f"Serving compatibility data {service.engine.data.data_version} on http://{host}:{port}")
+    try:
+        asyncio.run(service.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _bench_connection(host, port, targets, latencies, loop):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for target in targets:
+            request = f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1")
+            start = loop.time()
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(loop.time() - start)
+    finally:
+        writer.close()
+
+
+async def _bench(host, port, targets, connections, requests):
+    loop = asyncio.get_running_loop()
+    latencies = []
+    # The first requests % connections connections take one extra request;
+    # connections left without any are not opened
+    share, extra = divmod(requests, connections)
+    per_connection = [[targets[(c + i * connections) % len(targets)] for i in range(share + (c < extra))]
+                      for c in range(connections)]
+    start = loop.time()
+    await asyncio.gather(*(_bench_connection(host, port, batch, latencies, loop)
+                           for batch in per_connection if batch))
+    return loop.time() - start, latencies
+
+
+def bench_targets(engine):
+    # A realistic mix: every torch x python pin, open queries and metapackages
+    masks = engine.matrix.masks
+    targets = ["/combos", "/metapackages"]
+    targets += [f"/combos?torch={torch}&python={python}"
+                for torch in masks["torch"] for python in masks["python"]]
+    targets += [f"/combos?cuda={cuda}" for cuda in masks["cuda"]]
+    targets += [f"/metapackages/{cuda}" for cuda in engine.data.cuda_metapackages]
+    return targets
+
+
+def benchmark(url, targets, connections=8, requests=5000):
+    # Replays targets over keep-alive connections to a running service;
+    # returns (requests per second, p50 ms, p99 ms)
+    if requests < 1 or connections < 1:
+        raise ValueError("benchmark needs at least one request and one connection")
+    parts = urlsplit(url)
+    elapsed, latencies = asyncio.run(_bench(parts.hostname or DEFAULT_HOST, parts.port or DEFAULT_PORT,
+                                            targets, connections, requests))
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return len(latencies) / elapsed, percentile(0.50), percentile(0.99)
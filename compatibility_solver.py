@@ -0,0 +1,177 @@
+import heapq
+from collections import namedtuple
+
+from compatibility_engine import CompatibilityMatrix, Filters, filter_accepts
+from compatibility_versions import Version
+
+# Picks the best stack for a set of partial pins instead of listing every
+# combination. Candidates are scored lexicographically by an objective, a
+# tuple of criterion names (higher is better for each):
+#
+#   torch       newest torch
+#   fa2         newest Flash Attention 2 build available
+#   exact_cuda  newest xformers/bitsandbytes built for the exact CUDA patch
+#               (no "~" markers)
+#   verified    newest FA2/bitsandbytes not assumed from a nearby build
+#               (no "*" markers)
+#   cuda        newest CUDA
+#   python      newest python
+#
+# The add-on criteria look at the versions that would be installed: the
+# newest of each add-on that its filter accepts, not the newest built.
+#
+# The search walks torch versions, then CUDA builds, newest first, and
+# only joins the rows of a CUDA build whose optimistic score can still beat
+# the k-th best stack found so far.
+
+CRITERIA = ("torch", "fa2", "exact_cuda", "verified", "cuda", "python")
+DEFAULT_OBJECTIVE = CRITERIA
+
+RECOMMENDATION_HEADERS = ["PyTorch", "Python", "CUDA", "cuDNN", "Triton",
+                          "Flash Attn 2", "Xformers", "bitsandbytes", "Win cuDNN"]
+
+
+class Recommendation(namedtuple("Recommendation", ("combination", "score", "fa2", "xformers", "bnb"))):
+    # What would be installed from a combination: the newest add-on versions
+    # the filters admit
+    __slots__ = ()
+
+    def display_cells(self):
+        # Cell text in RECOMMENDATION_HEADERS order, with the same markers as
+        # the Compatible Combinations view
+        row = self.combination
+        fa2 = xformers = bnb = "-"
+        if self.fa2:
+            fa2 = self.fa2 + ("*" if self.fa2 in row.fa2_assumed else "")
+        if self.xformers:
+            xformers = self.xformers + ("~" if row.xformers_patch_diff else "")
+        if self.bnb:
+            bnb = self.bnb + ("~" if self.bnb in row.bnb_patch_diff else "*" if self.bnb in row.bnb_assumed else "")
+        return [row.torch, row.python, row.cuda, row.cudnn, row.triton_pin,
+                fa2, xformers, bnb, row.windows_support]
+
+    def as_json(self):
+        return {"fa2": self.fa2, "xformers": self.xformers, "bnb": self.bnb,
+                "combination": self.combination.as_json()}
+
+
+def _newest(versions):
+    return max(versions, key=Version) if versions else None
+
+
+def _key(version):
+    return Version(version).key if version else ()
+
+
+def parse_objective(text):
+    objective = tuple(name.strip() for name in text.split(",") if name.strip())
+    for name in objective:
+        if name not in CRITERIA:
+            raise ValueError(f"unknown criterion {name!r}; expected one of {', '.join(CRITERIA)}")
+    return objective
+
+
+class StackSolver:
+    def __init__(self, engine, objective=DEFAULT_OBJECTIVE):
+        self.engine = engine
+        self.objective = objective
+        self.expanded = 0
+        self.pruned = 0
+
+        data = engine.data
+        self._builds = {}
+        for tc in data.torch_cuda:
+            self._builds.setdefault(tc.torch, []).append(tc)
+        for builds in self._builds.values():
+            builds.sort(key=lambda tc: tc.cuda.key, reverse=True)
+        self._torches = sorted(self._builds, key=lambda torch: torch.key, reverse=True)
+
+        # Optimistic per-node values for the criteria not yet decided
+        self._fa2_best = {}
+        for (torch, _, cuda), builds in data.fa2_by_torch_python_cuda.items():
+            for build in builds:
+                for key in ((torch, cuda), torch):
+                    self._fa2_best[key] = max(self._fa2_best.get(key, ()), _key(build.fa2))
+        self._python_best = {torch: max((_key(py) for pt in rows for py in pt.python), default=())
+                             for torch, rows in data.triton_by_torch.items()}
+
+    @staticmethod
+    def add_ons(row, filters=None):
+        # (fa2, xformers, bnb) to install with row: the newest version of each
+        # that its filter accepts, so a pinned add-on is the one scored
+        picks = []
+        for field, versions in (("fa2", row.fa2_versions), ("xformers", row.xformers_versions),
+                                ("bnb", row.bnb_versions)):
+            selected = getattr(filters, field) if filters is not None else None
+            if selected is not None:
+                versions = [v for v in versions if filter_accepts(field, selected, v)]
+            picks.append(_newest(versions))
+        return picks
+
+    def score(self, row, filters=None):
+        fa2, _, bnb = self.add_ons(row, filters)
+        values = {
+            "torch": row.torch.key,
+            "fa2": _key(fa2),
+            "exact_cuda": -(bool(row.xformers_patch_diff) + (bnb in row.bnb_patch_diff)),
+            "verified": -((fa2 in row.fa2_assumed) + (bnb in row.bnb_assumed)),
+            "cuda": row.cuda.key,
+            "python": row.python.key,
+        }
+        return tuple(values[name] for name in self.objective)
+
+    def bound(self, torch, tc=None):
+        # Best score any row under this node could reach
+        values = {
+            "torch": torch.key,
+            "fa2": self._fa2_best.get(torch if tc is None else (torch, tc.cuda), ()),
+            "exact_cuda": 0,
+            "verified": 0,
+            "cuda": self._builds[torch][0].cuda.key if tc is None else tc.cuda.key,
+            "python": self._python_best.get(torch, ()),
+        }
+        if tc is not None:
+            _, patch_diff = self.engine.get_xformers_for_torch_cuda(torch, tc.cuda)
+            values["exact_cuda"] = -patch_diff
+        return tuple(values[name] for name in self.objective)
+
+    def solve(self, filters=None, k=1):
+        # The k best stacks matching filters, best first
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        filters = filters if filters is not None else Filters()
+        self.expanded = self.pruned = 0
+        best = []  # min-heap of (score, -order, row); best[0] is the k-th best
+        order = 0
+
+        def beaten(bound):
+            if len(best) == k and bound <= best[0][0]:
+                self.pruned += 1
+                return True
+            return False
+
+        for torch in self._torches:
+            if filters.torch is not None and not filter_accepts("torch", filters.torch, torch):
+                continue
+            if beaten(self.bound(torch)):
+                continue
+            for tc in self._builds[torch]:
+                if filters.cuda is not None and not filter_accepts("cuda", filters.cuda, tc.cuda):
+                    continue
+                if filters.windows_only and not tc.windows:
+                    continue
+                if beaten(self.bound(torch, tc)):
+                    continue
+                self.expanded += 1
+                for row in self.engine.iter_joined_rows((tc,)):
+                    if not CompatibilityMatrix.matches(row, filters):
+                        continue
+                    entry = (self.score(row, filters), -order, row)
+                    order += 1
+                    if len(best) < k:
+                        heapq.heappush(best, entry)
+                    elif entry > best[0]:
+                        heapq.heapreplace(best, entry)
+
+        ranked = sorted(best, reverse=True)
+        return [Recommendation(row, score, *self.add_ons(row, filters)) for score, _, row in ranked]
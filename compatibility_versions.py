@@ -0,0 +1,201 @@
+import re
+from functools import lru_cache
+
+# Version strings parsed once into interned, comparable objects.
+#
+# Version subclasses str so it can be used anywhere the tables used plain
+# strings (dict keys, combo box items, JSON output): equality and hashing
+# are those of the original text, while <, <=, >, >= compare by version.
+
+_VERSION_RE = re.compile(
+    r"^v?(?P<release>\d+(?:\.\d+)*)"
+    r"(?:[-_.]?(?P<pre_l>a|b|rc)(?P<pre_n>\d*))?"
+    r"(?:[-_.]?post(?P<post>\d*))?"
+    r"(?:[-_.]?dev(?P<dev>\d*))?"
+    r"(?:\+(?P<local>[a-zA-Z0-9.]+))?$")
+
+_PRE_RANK = {"a": 0, "b": 1, "rc": 2}
+
+_interned = {}
+
+
+class Version(str):
+    def __new__(cls, text):
+        if isinstance(text, Version):
+            return text
+        version = _interned.get(text)
+        if version is not None:
+            return version
+        match = _VERSION_RE.match(text)
+        if match is None:
+            raise ValueError(f"Invalid version: {text!r}")
+
+        version = super().__new__(cls, text)
+        release = tuple(int(p) for p in match.group("release").split("."))
+        version.release = release
+        version.major = release[0]
+        version.minor = release[1] if len(release) > 1 else 0
+        version.patch = release[2] if len(release) > 2 else 0
+        version.family = f"{version.major}.{version.minor}"
+        version.pre = (match.group("pre_l"), int(match.group("pre_n") or 0)) if match.group("pre_l") else None
+        version.post = int(match.group("post") or 0) if match.group("post") is not None else None
+        version.dev = int(match.group("dev") or 0) if match.group("dev") is not None else None
+        version.local = match.group("local")
+        version.public = text.split("+", 1)[0]
+        version.key = _sort_key(version)
+        _interned[text] = version
+        return version
+
+    def __lt__(self, other):
+        return self.key < Version(other).key
+
+    def __le__(self, other):
+        return self.key <= Version(other).key
+
+    def __gt__(self, other):
+        return self.key > Version(other).key
+
+    def __ge__(self, other):
+        return self.key >= Version(other).key
+
+    __eq__ = str.__eq__
+    __hash__ = str.__hash__
+
+
+def _sort_key(version):
+    # PEP 440 ordering: dev < pre < final < post, trailing zeros ignored
+    release = version.release
+    while len(release) > 1 and release[-1] == 0:
+        release = release[:-1]
+    if version.pre is not None:
+        pre = (0, _PRE_RANK[version.pre[0]], version.pre[1])
+    elif version.dev is not None and version.post is None:
+        pre = (-1,)
+    else:
+        pre = (1,)
+    post = (version.post,) if version.post is not None else (-1,)
+    dev = (0, version.dev) if version.dev is not None else (1,)
+    local = ()
+    if version.local:
+        local = tuple((1, int(p), "") if p.isdigit() else (0, 0, p)
+                      for p in version.local.replace("-", ".").replace("_", ".").split("."))
+    return release, pre, post, dev, local
+
+
+def intern_versions(values):
+    return [Version(v) for v in values]
+
+
+def parse_version_range(text):
+    # "2.7.1-2.8.4" -> (Version("2.7.1"), Version("2.8.4")), bounds inclusive
+    low, _, high = text.partition("-")
+    low = Version(low.strip())
+    return low, Version(high.strip()) if high else low
+
+
+# PEP 440 specifier sets as filter values: ">=2.8,<2.11", "~=3.12", "==12.*".
+# Clauses separated by "," must all hold; alternatives separated by "|" are
+# a multi-value selection ("3.11|3.12", ">=2.9|==2.7.1"). A leading project
+# name ("torch>=2.8") is ignored. Each text is compiled into a predicate
+# over versions; the most recent SPECIFIER_CACHE_SIZE are kept, so typing
+# into the GUI's editable filters doesn't grow the cache without bound.
+
+_SPECIFIER_CHARS = frozenset("<>=!~*,|")
+_CLAUSE_RE = re.compile(r"^\s*(?:[A-Za-z_][A-Za-z0-9_.-]*\s*(?=[<>=!~]))?(?P<op>===|==|!=|~=|<=|>=|<|>)?\s*(?P<version>\S+)\s*$")
+
+SPECIFIER_CACHE_SIZE = 256
+
+
+def is_specifier(text):
+    # Plain versions never contain any of the operator characters
+    return not _SPECIFIER_CHARS.isdisjoint(text)
+
+
+def _public_key(version):
+    # Sort key without the local label, which ordered comparisons ignore
+    return version.key[:4]
+
+
+def _padded(release, length):
+    return release + (0,) * (length - len(release))
+
+
+def _same_release(a, b):
+    length = max(len(a), len(b))
+    return _padded(a, length) == _padded(b, length)
+
+
+def _clause(op, text, bare_family):
+    if op is None:
+        if bare_family:
+            family = Version(text).release[:2]
+            return lambda v: _padded(v.release, 2)[:2] == _padded(family, 2)
+        op = "=="
+    if op == "===":
+        return lambda v: v == text
+    if text.endswith(".*"):
+        if op not in ("==", "!="):
+            raise ValueError(f"Wildcard only allowed with == and !=: {op}{text}")
+        prefix = Version(text[:-2]).release
+        length = len(prefix)
+        if op == "==":
+            return lambda v: _padded(v.release, length)[:length] == prefix
+        return lambda v: _padded(v.release, length)[:length] != prefix
+
+    spec = Version(text)
+    key = _public_key(spec)
+    if op in ("==", "!="):
+        # Candidate local labels are ignored unless the specifier has one
+        if spec.local:
+            equal = lambda v: v.key == spec.key
+        else:
+            equal = lambda v: _public_key(v) == key
+        return equal if op == "==" else (lambda v: not equal(v))
+    if op == "~=":
+        if len(spec.release) < 2:
+            raise ValueError(f"~= needs at least two release segments: ~={text}")
+        prefix = spec.release[:-1]
+        length = len(prefix)
+        return lambda v: _public_key(v) >= key and _padded(v.release, length)[:length] == prefix
+    if op == ">=":
+        return lambda v: _public_key(v) >= key
+    if op == "<=":
+        return lambda v: _public_key(v) <= key
+    if op == ">":
+        # Excludes the post-releases of the specifier itself (>2.8 rejects
+        # 2.8.post1, >2.8rc1 rejects 2.8rc1.post1 but admits 2.8)
+        if spec.post is None and spec.dev is None:
+            return lambda v: _public_key(v) > key and not (
+                v.post is not None and v.pre == spec.pre and _same_release(v.release, spec.release))
+        return lambda v: _public_key(v) > key
+    # Excludes the pre-releases of the specifier itself (<2.9 rejects
+    # 2.9.0rc1, <2.9.post1 rejects 2.9.post1.dev0 but admits 2.9.0rc1):
+    # everything from its .dev0 up
+    if spec.pre is None and spec.dev is None:
+        key = _public_key(Version(f"{spec.public}.dev0"))
+    return lambda v: _public_key(v) < key
+
+
+@lru_cache(maxsize=SPECIFIER_CACHE_SIZE)
+def compile_specifier(text, bare_family=False):
+    # Predicate for a specifier text; raises ValueError if it doesn't parse.
+    # bare_family makes a bare version match its whole major.minor family
+    # (how the CUDA filter treats "12.8.1").
+    alternatives = []
+    for alternative in text.split("|"):
+        clauses = []
+        for clause in alternative.split(","):
+            match = _CLAUSE_RE.match(clause)
+            if match is None:
+                raise ValueError(f"Invalid version specifier: {clause.strip()!r}")
+            clauses.append(_clause(match.group("op"), match.group("version"), bare_family))
+        alternatives.append(clauses)
+
+    def accepts(value):
+        try:
+            version = Version(value)
+        except ValueError:
+            return False
+        return any(all(clause(version) for clause in clauses) for clauses in alternatives)
+
+    return accepts
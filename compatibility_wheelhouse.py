@@ -0,0 +1,233 @@
+import os
+import pickle
+from collections import namedtuple
+from sys import intern
+from urllib.parse import unquote
+
+from compatibility_data import DATA_DIR, dump_pickle
+from compatibility_environment import normalize_name
+from compatibility_install import InstallPlanner
+from compatibility_versions import compile_specifier
+
+# Index of a local wheelhouse (a directory tree of mirrored *.whl files),
+# to tell which compatible combinations can be installed from it offline.
+#
+# Wheel filenames are parsed once (PEP 427, including the "+cu128" local
+# tags of the PyTorch index and the kingbri1 FA2 Windows wheels such as
+# flash_attn-2.8.3+cu128torch2.7.0cxx11abiFALSE-cp312-cp312-win_amd64.whl)
+# and bucketed by (project, version), each bucket holding the local,
+# python, ABI and platform tags of its wheels. The index is pickled (next to
+# compatibility_data.cache by default, so writing it never touches the
+# wheelhouse's own mtimes) and updated incrementally: a directory is listed
+# again only when its mtime changed, so an unchanged wheelhouse costs one
+# stat per directory. Symlinked subdirectories are not followed, so a link
+# back up the tree can't make the walk endless.
+
+WHEELHOUSE_INDEX_FORMAT = 1
+PLATFORM_TAG_PREFIXES = {"linux": ("manylinux", "linux"), "windows": ("win",)}
+
+WheelFile = namedtuple("WheelFile", ("project", "version", "local", "python", "abi", "platform", "path"))
+
+
+def default_index_path(root):
+    import hashlib
+    return os.path.join(DATA_DIR, f"wheelhouse-{hashlib.sha1(root.encode('utf-8')).hexdigest()[:12]}.cache")
+
+
+def parse_wheel_filename(filename):
+    # WheelFile for a {name}-{version}(-{build})?-{python}-{abi}-{platform}.whl
+    # filename, or None if it isn't one
+    if not filename.endswith(".whl"):
+        return None
+    parts = filename[:-len(".whl")].split("-")
+    if len(parts) not in (5, 6):
+        return None
+    name, version, python, abi, platform = parts[0], parts[1], parts[-3], parts[-2], parts[-1]
+    public, _, local = version.partition("+")
+    # The tags repeat across the wheelhouse; interned, the pickled index
+    # stores each one once
+    return WheelFile(intern(normalize_name(name)), public, intern(local), intern(python), intern(abi),
+                     intern(platform), filename)
+
+
+def python_compatible(wheel, python):
+    # Whether a wheel's python/ABI tags install on python "X.Y"
+    major, _, minor = python.partition(".")
+    for tag in wheel.python.split("."):
+        if tag in (f"cp{major}{minor}", f"py{major}{minor}", f"py{major}"):
+            return True
+        # cp39-abi3 wheels install on every CPython >= 3.9
+        if wheel.abi == "abi3" and tag.startswith(f"cp{major}") and tag[len(major) + 2:].isdigit():
+            if int(tag[len(major) + 2:]) <= int(minor):
+                return True
+    return False
+
+
+def platform_compatible(wheel, platform):
+    prefixes = PLATFORM_TAG_PREFIXES[platform]
+    return any(tag == "any" or tag.startswith(prefixes) for tag in wheel.platform.split("."))
+
+
+class WheelhouseIndex:
+    def __init__(self, root, index_path=None):
+        self.root = os.path.abspath(root)
+        self.index_path = index_path if index_path is not None else default_index_path(self.root)
+        # Wheels are kept as plain tuples in WheelFile field order (they
+        # unpickle several times faster than namedtuples); find() returns
+        # WheelFile records.
+        # relative directory -> (mtime_ns, subdirectories, wheels)
+        self.directories = {}
+        # (project, version) -> [wheel]
+        self.buckets = {}
+        # project -> [version], built on demand
+        self._versions = None
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, "rb") as f:
+                header, state = pickle.load(f)
+        except Exception:
+            return
+        if header == (WHEELHOUSE_INDEX_FORMAT, self.root):
+            self.directories, self.buckets = state
+            self._versions = None
+
+    def save(self):
+        # In an unwritable location everything is listed again next time
+        dump_pickle(self.index_path, ((WHEELHOUSE_INDEX_FORMAT, self.root), (self.directories, self.buckets)))
+
+    def update(self):
+        # Lists the directories whose mtime changed since the last update,
+        # moves their wheels in and out of the buckets and saves the index
+        # if anything changed; returns how many directories were listed
+        previous = self.directories
+        directories = {}
+        listed = 0
+        pending = [""]
+        while pending:
+            relative = pending.pop()
+            path = os.path.join(self.root, relative)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            entry = previous.get(relative)
+            if entry is None or entry[0] != mtime:
+                entry = self._list(relative, path, mtime)
+                if relative in previous:
+                    self._remove(previous[relative][2])
+                self._add(entry[2])
+                listed += 1
+            directories[relative] = entry
+            pending.extend(entry[1])
+        for relative in previous.keys() - directories.keys():
+            self._remove(previous[relative][2])
+
+        if listed or directories.keys() != previous.keys():
+            self.directories = directories
+            self.save()
+        return listed
+
+    @staticmethod
+    def _list(relative, path, mtime):
+        subdirectories = []
+        wheels = []
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            entries = []
+        for item in entries:
+            if item.name.endswith(".whl"):
+                wheel = parse_wheel_filename(item.name)
+                if wheel is not None:
+                    wheels.append(tuple(wheel[:-1]) + (os.path.join(relative, item.name),))
+            elif item.is_dir(follow_symlinks=False) and not item.name.startswith("."):
+                subdirectories.append(os.path.join(relative, item.name))
+        return mtime, tuple(subdirectories), tuple(wheels)
+
+    def _add(self, wheels):
+        self._versions = None
+        buckets = self.buckets
+        for wheel in wheels:
+            key = wheel[:2]
+            if key in buckets:
+                buckets[key].append(wheel)
+            else:
+                buckets[key] = [wheel]
+
+    def _remove(self, wheels):
+        self._versions = None
+        for wheel in wheels:
+            found = self.buckets.get(wheel[:2], [])
+            if wheel in found:
+                found.remove(wheel)
+                if not found:
+                    del self.buckets[wheel[:2]]
+
+    def __len__(self):
+        return sum(len(wheels) for _, _, wheels in self.directories.values())
+
+    def find(self, project, version, local=None, python=None, platform=None):
+        # Wheels of one release; local None accepts any local tag
+        candidates = self.buckets.get((normalize_name(project), version), ())
+        wheels = map(WheelFile._make, candidates)
+        return [wheel for wheel in wheels
+                if (local is None or wheel.local == local)
+                and (python is None or python_compatible(wheel, python))
+                and (platform is None or platform_compatible(wheel, platform))]
+
+    def versions(self, project):
+        if self._versions is None:
+            self._versions = {}
+            for name, version in self.buckets:
+                self._versions.setdefault(name, []).append(version)
+        return self._versions.get(normalize_name(project), [])
+
+    def find_specifier(self, project, specifier, python=None, platform=None):
+        accepts = compile_specifier(specifier)
+        return [wheel for version in self.versions(project) if accepts(version)
+                for wheel in self.find(project, version, None, python, platform)]
+
+
+def required_wheels(plan):
+    # (project, version, local tag or None for any, requirement text) for
+    # what an InstallPlan installs; the torch wheels must be the ones of the
+    # PyTorch index for the plan's CUDA build
+    required = [(project, version, plan.moniker, f"{project}=={version}+{plan.moniker}")
+                for project, version in (("torch", plan.torch), ("torchvision", plan.torchvision),
+                                         ("torchaudio", plan.torchaudio))]
+    if plan.triton:
+        required.append((plan.triton_package, plan.triton, None, f"{plan.triton_package}=={plan.triton}"))
+    if plan.fa2 and plan.fa2_url:
+        wheel = parse_wheel_filename(unquote(plan.fa2_url.rsplit("/", 1)[1]))
+        required.append((wheel.project, wheel.version, wheel.local, wheel.path))
+    elif plan.fa2:
+        required.append(("flash-attn", plan.fa2, None, f"flash-attn=={plan.fa2}"))
+    if plan.xformers:
+        required.append(("xformers", plan.xformers, None, f"xformers=={plan.xformers}"))
+    if plan.bnb:
+        required.append(("bitsandbytes", plan.bnb, None, f"bitsandbytes=={plan.bnb}"))
+    return required
+
+
+class WheelhouseChecker:
+    # Missing wheels per combination, memoized per install plan
+    def __init__(self, index, data, platform):
+        self.index = index
+        self.planner = InstallPlanner(data)
+        self.platform = platform
+        self._missing = {}
+
+    def missing(self, combo):
+        plan = self.planner.plan(combo, self.platform)
+        found = self._missing.get(plan)
+        if found is None:
+            found = []
+            for project, version, local, text in required_wheels(plan):
+                if not self.index.find(project, version, local, plan.python, self.platform):
+                    found.append(text)
+            if plan.sympy and not self.index.find_specifier("sympy", plan.sympy, plan.python, self.platform):
+                found.append(f"sympy{plan.sympy}")
+            found = self._missing[plan] = tuple(found)
+        return found
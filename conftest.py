@@ -0,0 +1,3 @@
+# test_compatibility.py is the GUI script, not a test module; the tests
+# live in tests/ and import the flat modules from this directory
+collect_ignore = ["test_compatibility.py"]
@@ -1,271 +1,24 @@
 import sys
 import os
+import io
 import tempfile
+import threading
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                                QHBoxLayout, QGridLayout, QLabel, QComboBox,
                                QCheckBox, QPushButton, QTableWidget,
-                               QTableWidgetItem, QTabWidget, QGroupBox,
-                               QAbstractItemView, QMenu)
-from PySide6.QtCore import Qt, QSettings, QUrl
+                               QTableWidgetItem, QTableView, QTabWidget, QGroupBox,
+                               QAbstractItemView, QMenu, QMessageBox, QFileDialog)
+from PySide6.QtCore import (Qt, QSettings, QUrl, QAbstractTableModel, QModelIndex,
+                            QObject, QRunnable, QThreadPool, QTimer, Signal)
 from PySide6.QtGui import QFont, QColor, QDesktopServices, QAction
 
-class CompatibilityData:
-    def __init__(self):
-        self.windows_notes = """
-CUDA MATCHING:
-- Torch wheels (cu126, cu128, etc.) match CUDA by major.minor family (e.g. cu130 matches any 13.0.x).
-  The "CUDA (tested)" column shows the specific version PyTorch tested against.
-
-cuDNN:
-- The cuDNN column is informational — it shows what PyTorch tested with, not a requirement.
-  Actual cuDNN compatibility is determined by CUDA version: 9.x for CUDA 12.x (Win+Linux), 9.x for CUDA 13.x (Linux only).
-
-WINDOWS:
-- cu126/cu128/cu129 have full cuDNN on Windows. CUDA 13.x wheels (cu130+) lack cuDNN (Linux-only).
-
-TRITON:
-- PyTorch hard-pins a specific triton version. The triton-windows repo says patch versions within a minor are compatible.
-
-FLASH ATTENTION 2 (WINDOWS):
-- Windows FA2 wheels from kingbri1/flash-attention. Data last verified: April 3, 2026.
-  Check https://github.com/kingbri1/flash-attention/releases for latest available wheels.
-
-MARKERS:
-- * = Assumed compatible (not officially tested)     ~ = CUDA patch version differs (same major.minor)
-"""
-
-        self.torch_cuda = [
-            {"torch": "2.11.0", "wheel": "cu130", "cuda": "13.0.2", "cudnn": "9.19.0.56", "windows": False},
-            {"torch": "2.11.0", "wheel": "cu129", "cuda": "12.9.1", "cudnn": "9.17.1.4", "windows": True},
-            {"torch": "2.11.0", "wheel": "cu128", "cuda": "12.8.1", "cudnn": "9.19.0.56", "windows": True},
-            {"torch": "2.11.0", "wheel": "cu126", "cuda": "12.6.3", "cudnn": "9.10.2.21", "windows": True},
-            {"torch": "2.10.0", "wheel": "cu130", "cuda": "13.0.0", "cudnn": "9.15.1.9", "windows": False},
-            {"torch": "2.10.0", "wheel": "cu129", "cuda": "12.9.1", "cudnn": "9.10.2.21", "windows": True},
-            {"torch": "2.10.0", "wheel": "cu128", "cuda": "12.8.1", "cudnn": "9.10.2.21", "windows": True},
-            {"torch": "2.10.0", "wheel": "cu126", "cuda": "12.6.3", "cudnn": "9.10.2.21", "windows": True},
-            {"torch": "2.9.1", "wheel": "cu130", "cuda": "13.0.0", "cudnn": "9.13.0.50", "windows": False},
-            {"torch": "2.9.1", "wheel": "cu129", "cuda": "12.9.1", "cudnn": "9.10.2.21", "windows": True},
-            {"torch": "2.9.1", "wheel": "cu128", "cuda": "12.8.1", "cudnn": "9.10.2.21", "windows": True},
-            {"torch": "2.9.1", "wheel": "cu126", "cuda": "12.6.3", "cudnn": "9.10.2.21", "windows": True},
-            {"torch": "2.9.0", "wheel": "cu130", "cuda": "13.0.0", "cudnn": "9.13.0.50", "windows": False},
-            {"torch": "2.9.0", "wheel": "cu128", "cuda": "12.8.1", "cudnn": "9.10.2.21", "windows": True},
-            {"torch": "2.9.0", "wheel": "cu126", "cuda": "12.6.3", "cudnn": "9.10.2.21", "windows": True},
-            {"torch": "2.8.0", "wheel": "cu129", "cuda": "12.9.1", "cudnn": "9.10.2.21", "windows": True},
-            {"torch": "2.8.0", "wheel": "cu128", "cuda": "12.8.1", "cudnn": "9.10.2.21", "windows": True},
-            {"torch": "2.8.0", "wheel": "cu126", "cuda": "12.6.3", "cudnn": "9.10.2.21", "windows": True},
-            {"torch": "2.7.1", "wheel": "cu128", "cuda": "12.8.0", "cudnn": "9.7.1.26", "windows": True},
-            {"torch": "2.7.1", "wheel": "cu126", "cuda": "12.6.3", "cudnn": "9.5.1.17", "windows": True},
-            {"torch": "2.7.1", "wheel": "cu118", "cuda": "11.8.0", "cudnn": "9.1.0.70", "windows": True},
-            {"torch": "2.7.0", "wheel": "cu128", "cuda": "12.8.0", "cudnn": "9.7.1.26", "windows": True},
-            {"torch": "2.7.0", "wheel": "cu126", "cuda": "12.6.3", "cudnn": "9.5.1.17", "windows": True},
-            {"torch": "2.7.0", "wheel": "cu118", "cuda": "11.8.0", "cudnn": "9.1.0.70", "windows": True},
-            {"torch": "2.6.0", "wheel": "cu126", "cuda": "12.6.3", "cudnn": "9.5.1.17", "windows": True},
-            {"torch": "2.6.0", "wheel": "cu124", "cuda": "12.4.1", "cudnn": "9.1.0.70", "windows": True},
-            {"torch": "2.6.0", "wheel": "cu118", "cuda": "11.8.0", "cudnn": "9.1.0.70", "windows": True},
-        ]
-
-        # cuda_versions uses major.minor (e.g. "12.4") to match against
-        # the full versions in torch_cuda (e.g. "12.4.1") via major.minor extraction
-        self.torch_python_triton = [
-            {"torch": "2.11.0", "cuda_versions": ["12.6", "12.8", "12.9", "13.0"],
-             "python": ["3.10", "3.11", "3.12", "3.13", "3.14"], "triton": "3.6.0", "triton_compat": ["3.6.0"], "sympy": ">=1.13.3"},
-            {"torch": "2.10.0", "cuda_versions": ["12.6", "12.8", "12.9", "13.0"],
-             "python": ["3.10", "3.11", "3.12", "3.13", "3.14"], "triton": "3.6.0", "triton_compat": ["3.6.0"], "sympy": ">=1.13.3"},
-            {"torch": "2.9.1", "cuda_versions": ["12.6", "12.8", "12.9", "13.0"], 
-             "python": ["3.10", "3.11", "3.12", "3.13", "3.14"], "triton": "3.5.1", "triton_compat": ["3.5.0", "3.5.1"], "sympy": ">=1.13.3"},
-            {"torch": "2.9.0", "cuda_versions": ["12.6", "12.8", "13.0"],
-             "python": ["3.10", "3.11", "3.12", "3.13", "3.14"], "triton": "3.5.0", "triton_compat": ["3.5.0", "3.5.1"], "sympy": ">=1.13.3"},
-            {"torch": "2.8.0", "cuda_versions": ["12.6", "12.8", "12.9"], 
-             "python": ["3.9", "3.10", "3.11", "3.12", "3.13"], "triton": "3.4.0", "triton_compat": ["3.4.0"], "sympy": ">=1.13.3"},
-            {"torch": "2.7.1", "cuda_versions": ["12.6", "12.8"], 
-             "python": ["3.9", "3.10", "3.11", "3.12", "3.13"], "triton": "3.3.1", "triton_compat": ["3.3.0", "3.3.1"], "sympy": ">=1.13.3"},
-            {"torch": "2.7.0", "cuda_versions": ["12.6", "12.8"], 
-             "python": ["3.9", "3.10", "3.11", "3.12", "3.13"], "triton": "3.3.0", "triton_compat": ["3.3.0", "3.3.1"], "sympy": ">=1.13.3"},
-            {"torch": "2.6.0", "cuda_versions": ["12.4", "12.6"], 
-             "python": ["3.9", "3.10", "3.11", "3.12", "3.13"], "triton": "3.2.0", "triton_compat": ["3.2.0"], "sympy": "1.13.1"},
-        ]
-
-        self.torch_ecosystem = {
-            "2.11.0": {"torchvision": "0.26.0", "torchaudio": "2.11.0"},
-            "2.10.0": {"torchvision": "0.25.0", "torchaudio": "2.10.0"},
-            "2.9.1": {"torchvision": "0.24.1", "torchaudio": "2.9.1"},
-            "2.9.0": {"torchvision": "0.24.0", "torchaudio": "2.9.0"},
-            "2.8.0": {"torchvision": "0.23.0", "torchaudio": "2.8.0"},
-            "2.7.1": {"torchvision": "0.22.1", "torchaudio": "2.7.1"},
-            "2.7.0": {"torchvision": "0.22.0", "torchaudio": "2.7.0"},
-            "2.6.0": {"torchvision": "0.21.0", "torchaudio": "2.6.0"},
-        }
-
-        # Windows Flash Attention 2 compatibility data
-        # Ground truth: release assets from https://github.com/kingbri1/flash-attention/releases
-        # Build matrix: build-wheels.yml (workflow_dispatch, manually triggered)
-        # LAST VERIFIED: April 3, 2026
-        # CUDA values here match the torch_cuda entries (for matching), not the FA2 build CUDA.
-        self.flash_attention = [
-            {"fa2": "2.8.3", "python": "3.10", "torch": "2.9.1", "cuda": "12.8.1", "assumed": True},
-            {"fa2": "2.8.3", "python": "3.11", "torch": "2.9.1", "cuda": "12.8.1", "assumed": True},
-            {"fa2": "2.8.3", "python": "3.12", "torch": "2.9.1", "cuda": "12.8.1", "assumed": True},
-            {"fa2": "2.8.3", "python": "3.13", "torch": "2.9.1", "cuda": "12.8.1", "assumed": True},
-            {"fa2": "2.8.3", "python": "3.11", "torch": "2.6.0", "cuda": "12.4.1", "assumed": False},
-            {"fa2": "2.8.3", "python": "3.10", "torch": "2.7.0", "cuda": "12.8.0", "assumed": False},
-            {"fa2": "2.8.3", "python": "3.11", "torch": "2.7.0", "cuda": "12.8.0", "assumed": False},
-            {"fa2": "2.8.3", "python": "3.12", "torch": "2.7.0", "cuda": "12.8.0", "assumed": False},
-            {"fa2": "2.8.3", "python": "3.13", "torch": "2.7.0", "cuda": "12.8.0", "assumed": False},
-            {"fa2": "2.8.3", "python": "3.10", "torch": "2.8.0", "cuda": "12.8.1", "assumed": False},
-            {"fa2": "2.8.3", "python": "3.11", "torch": "2.8.0", "cuda": "12.8.1", "assumed": False},
-            {"fa2": "2.8.3", "python": "3.12", "torch": "2.8.0", "cuda": "12.8.1", "assumed": False},
-            {"fa2": "2.8.3", "python": "3.13", "torch": "2.8.0", "cuda": "12.8.1", "assumed": False},
-            {"fa2": "2.8.3", "python": "3.10", "torch": "2.9.0", "cuda": "12.8.1", "assumed": False},
-            {"fa2": "2.8.3", "python": "3.11", "torch": "2.9.0", "cuda": "12.8.1", "assumed": False},
-            {"fa2": "2.8.3", "python": "3.12", "torch": "2.9.0", "cuda": "12.8.1", "assumed": False},
-            {"fa2": "2.8.3", "python": "3.13", "torch": "2.9.0", "cuda": "12.8.1", "assumed": False},
-            {"fa2": "2.8.2", "python": "3.10", "torch": "2.6.0", "cuda": "12.4.1", "assumed": False},
-            {"fa2": "2.8.2", "python": "3.11", "torch": "2.6.0", "cuda": "12.4.1", "assumed": False},
-            {"fa2": "2.8.2", "python": "3.12", "torch": "2.6.0", "cuda": "12.4.1", "assumed": False},
-            {"fa2": "2.8.2", "python": "3.13", "torch": "2.6.0", "cuda": "12.4.1", "assumed": False},
-            {"fa2": "2.8.2", "python": "3.10", "torch": "2.7.0", "cuda": "12.8.0", "assumed": False},
-            {"fa2": "2.8.2", "python": "3.11", "torch": "2.7.0", "cuda": "12.8.0", "assumed": False},
-            {"fa2": "2.8.2", "python": "3.12", "torch": "2.7.0", "cuda": "12.8.0", "assumed": False},
-            {"fa2": "2.8.2", "python": "3.13", "torch": "2.7.0", "cuda": "12.8.0", "assumed": False},
-            {"fa2": "2.8.2", "python": "3.10", "torch": "2.8.0", "cuda": "12.8.1", "assumed": False},
-            {"fa2": "2.8.2", "python": "3.11", "torch": "2.8.0", "cuda": "12.8.1", "assumed": False},
-            {"fa2": "2.8.2", "python": "3.12", "torch": "2.8.0", "cuda": "12.8.1", "assumed": False},
-            {"fa2": "2.8.2", "python": "3.13", "torch": "2.8.0", "cuda": "12.8.1", "assumed": False},
-        ]
-
-        # FA2 Windows wheel availability: (fa2_version, cu_moniker, torch_build_version) -> [python_versions]
-        # Used to construct download URLs from https://github.com/kingbri1/flash-attention/releases
-        # Ground truth: build-wheels.yml from kingbri1/flash-attention (main branch)
-        # LAST VERIFIED: April 3, 2026 — Windows FA2 data may be outdated; check releases for latest wheels
-        self.fa2_windows_wheels = {
-            ("2.8.3", "cu124", "2.6.0"): ["3.11"],
-            ("2.8.3", "cu128", "2.7.0"): ["3.10", "3.11", "3.12", "3.13"],
-            ("2.8.3", "cu128", "2.8.0"): ["3.10", "3.11", "3.12", "3.13"],
-            ("2.8.3", "cu128", "2.9.0"): ["3.10", "3.11", "3.12", "3.13"],
-            ("2.8.2", "cu124", "2.6.0"): ["3.10", "3.11", "3.12", "3.13"],
-            ("2.8.2", "cu128", "2.7.0"): ["3.10", "3.11", "3.12", "3.13"],
-            ("2.8.2", "cu128", "2.8.0"): ["3.10", "3.11", "3.12", "3.13"],
-        }
-
-        # Starting with v0.0.35, xformers declares torch>=2.10 (upward compatible).
-        # v0.0.34 pyproject.toml says torch>=2.10, but the published PyPI wheel metadata
-        # pins torch==2.10.0 (exact). Only v0.0.35+ truly allows torch>=2.10.
-        # "torch_min" indicates upward compatibility (torch >= stated version).
-        # Ground truth: wheels.yml (torch + CU_VERSIONS), flash.py (FA2 range),
-        #               setup-build-cuda/action.yml (CUDA build toolkit)
-        # CUDA values use torch_cuda versions for each CU moniker (for matching).
-        # The xformers build toolkit may differ (e.g. cu126 builds with CUDA 12.8.1 from v0.0.31+).
-        self.xformers = [
-            {"xformers": "0.0.35", "torch": "2.10.0", "torch_min": True, "fa2": "2.7.1-2.8.4",
-             "cuda": ["12.6.3", "12.8.1", "13.0.0"], "notes": ""},
-            {"xformers": "0.0.34", "torch": "2.10.0", "fa2": "2.7.1-2.8.4",
-             "cuda": ["12.6.3", "12.8.1", "13.0.0"], "notes": ""},
-            {"xformers": "0.0.33.post2", "torch": "2.9.1", "fa2": "2.7.1-2.8.4",
-             "cuda": ["12.6.3", "12.8.1", "13.0.0"], "notes": ""},
-            {"xformers": "0.0.33.post1", "torch": "2.9.0", "fa2": "2.7.1-2.8.4",
-             "cuda": ["12.6.3", "12.8.1", "13.0.0"], "notes": ""},
-            {"xformers": "0.0.33", "torch": "2.9.0", "fa2": "2.7.1-2.8.4",
-             "cuda": ["12.6.3", "12.8.1", "13.0.0"], "notes": ""},
-            {"xformers": "0.0.32.post2", "torch": "2.8.0", "fa2": "2.7.1-2.8.2",
-             "cuda": ["12.6.3", "12.8.1", "12.9.1"], "notes": ""},
-            {"xformers": "0.0.32.post1", "torch": "2.8.0", "fa2": "2.7.1-2.8.2",
-             "cuda": ["12.6.3", "12.8.1", "12.9.1"], "notes": ""},
-            {"xformers": "0.0.32", "torch": "2.8.0", "fa2": "2.7.1-2.8.2",
-             "cuda": ["12.6.3", "12.8.1", "12.9.1"], "notes": "Bug"},
-            {"xformers": "0.0.31.post1", "torch": "2.7.1", "fa2": "2.7.1-2.8.0",
-             "cuda": ["12.6.3", "12.8.0"], "notes": ""},
-            {"xformers": "0.0.31", "torch": "2.7.1", "fa2": "2.7.1-2.8.0",
-             "cuda": ["12.6.3", "12.8.0"], "notes": ""},
-            {"xformers": "0.0.30", "torch": "2.7.0", "fa2": "2.7.1-2.7.4",
-             "cuda": ["12.6.3", "12.8.0"], "notes": ""},
-            {"xformers": "0.0.29.post3", "torch": "2.6.0", "fa2": "2.7.1-2.7.2",
-             "cuda": ["12.4.1", "12.6.3"], "notes": ""},
-            {"xformers": "0.0.29.post2", "torch": "2.6.0", "fa2": "2.7.1-2.7.2",
-             "cuda": ["12.4.1", "12.6.3"], "notes": ""},
-        ]
-
-        # Ground truth: python-package.yml from tagged releases in bitsandbytes-foundation/bitsandbytes
-        # CUDA versions from cuda_version matrix in build-cuda job (builds Linux, Windows, ARM).
-        # Python: py3 wheels (version-agnostic); supported range from requires-python in pyproject.toml.
-        self.bitsandbytes = [
-            {"bnb": "0.49.2", "cuda": ["11.8.0", "12.0.1", "12.1.1", "12.2.2", "12.3.2", "12.4.1", "12.5.1", "12.6.3", "12.8.1", "12.9.1", "13.0.2"],
-             "python": ["3.10", "3.11", "3.12", "3.13", "3.14"], "assumed_cuda": []},
-            {"bnb": "0.49.1", "cuda": ["11.8.0", "12.0.1", "12.1.1", "12.2.2", "12.3.2", "12.4.1", "12.5.1", "12.6.3", "12.8.1", "12.9.1", "13.0.2"],
-             "python": ["3.10", "3.11", "3.12", "3.13", "3.14"], "assumed_cuda": []},
-            {"bnb": "0.49.0", "cuda": ["11.8.0", "12.0.1", "12.1.1", "12.2.2", "12.3.2", "12.4.1", "12.5.1", "12.6.3", "12.8.1", "12.9.1", "13.0.2"],
-             "python": ["3.10", "3.11", "3.12", "3.13", "3.14"], "assumed_cuda": []},
-            {"bnb": "0.48.2", "cuda": ["11.8.0", "12.0.1", "12.1.1", "12.2.2", "12.3.2", "12.4.1", "12.5.1", "12.6.3", "12.8.1", "12.9.1", "13.0.1"],
-             "python": ["3.9", "3.10", "3.11", "3.12", "3.13"], "assumed_cuda": []},
-            {"bnb": "0.48.1", "cuda": ["11.8.0", "12.0.1", "12.1.1", "12.2.2", "12.3.2", "12.4.1", "12.5.1", "12.6.3", "12.8.1", "12.9.1", "13.0.1"],
-             "python": ["3.9", "3.10", "3.11", "3.12", "3.13"], "assumed_cuda": []},
-            {"bnb": "0.48.0", "cuda": ["11.8.0", "12.0.1", "12.1.1", "12.2.2", "12.3.2", "12.4.1", "12.5.1", "12.6.3", "12.8.1", "12.9.1", "13.0.1"],
-             "python": ["3.9", "3.10", "3.11", "3.12", "3.13"], "assumed_cuda": []},
-            {"bnb": "0.47.0", "cuda": ["11.8.0", "12.0.1", "12.1.1", "12.2.2", "12.3.2", "12.4.1", "12.5.1", "12.6.3", "12.8.1", "12.9.1"],
-             "python": ["3.9", "3.10", "3.11", "3.12", "3.13"], "assumed_cuda": []},
-        ]
-
-        self.cuda_metapackages = {
-            "12.6.3": {
-                "cuda-nvrtc": "12.6.85", "cuda-runtime": "12.6.77", "cuda-nvcc": "12.6.85",
-                "cuda-cupti": "12.6.80", "cublas": "12.6.4.1", "cufft": "11.3.0.4",
-                "curand": "10.3.7.77", "cusolver": "11.7.1.2", "cusparse": "12.5.4.2",
-                "nvtx": "12.6.77", "nvjitlink": "12.6.85"
-            },
-            "12.8.0": {
-                "cuda-nvrtc": "12.8.61", "cuda-runtime": "12.8.57", "cuda-nvcc": "12.8.61",
-                "cuda-cupti": "12.8.57", "cublas": "12.8.3.14", "cufft": "11.3.3.41",
-                "curand": "10.3.9.55", "cusolver": "11.7.2.55", "cusparse": "12.5.7.53",
-                "nvtx": "12.8.55", "nvjitlink": "12.8.61"
-            },
-            "12.8.1": {
-                "cuda-nvrtc": "12.8.93", "cuda-runtime": "12.8.90", "cuda-nvcc": "12.8.93",
-                "cuda-cupti": "12.8.90", "cublas": "12.8.4.1", "cufft": "11.3.3.83",
-                "curand": "10.3.9.90", "cusolver": "11.7.3.90", "cusparse": "12.5.8.93",
-                "nvtx": "12.8.90", "nvjitlink": "12.8.93"
-            },
-            "12.9.1": {
-                "cuda-nvrtc": "12.9.86", "cuda-runtime": "12.9.79", "cuda-nvcc": "12.9.86",
-                "cuda-cupti": "12.9.79", "cublas": "12.9.1.4", "cufft": "11.4.1.4",
-                "curand": "10.3.10.19", "cusolver": "11.7.5.82", "cusparse": "12.5.10.65",
-                "nvtx": "12.9.79", "nvjitlink": "12.9.86"
-            },
-            "13.0.0": {
-                "cuda-nvrtc": "13.0.48", "cuda-runtime": "13.0.48", "cuda-nvcc": "13.0.48",
-                "cuda-cupti": "13.0.48", "cublas": "13.0.0.19", "cufft": "12.0.0.15",
-                "curand": "10.4.0.35", "cusolver": "12.0.3.29", "cusparse": "12.6.2.49",
-                "nvtx": "13.0.39", "nvjitlink": "13.0.39"
-            },
-            "13.0.2": {
-                "cuda-nvrtc": "13.0.88", "cuda-runtime": "13.0.96", "cuda-nvcc": "13.0.88",
-                "cuda-cupti": "13.0.85", "cublas": "13.1.0.3", "cufft": "12.0.0.61",
-                "curand": "10.4.0.35", "cusolver": "12.0.4.66", "cusparse": "12.6.3.3",
-                "nvtx": "13.0.85", "nvjitlink": "13.0.88"
-            },
-            "13.1.0": {
-                "cuda-nvrtc": "13.1.80", "cuda-runtime": "13.1.80", "cuda-nvcc": "13.1.80",
-                "cuda-cupti": "13.1.75", "cublas": "13.2.0.9", "cufft": "12.1.0.31",
-                "curand": "10.4.1.34", "cusolver": "12.0.7.41", "cusparse": "12.7.2.19",
-                "nvtx": "13.1.68", "nvjitlink": "13.1.80"
-            },
-            "13.1.1": {
-                "cuda-nvrtc": "13.1.115", "cuda-runtime": "13.1.80", "cuda-nvcc": "13.1.115",
-                "cuda-cupti": "13.1.115", "cublas": "13.2.1.1", "cufft": "12.1.0.78",
-                "curand": "10.4.1.81", "cusolver": "12.0.9.81", "cusparse": "12.7.3.1",
-                "nvtx": "13.1.115", "nvjitlink": "13.1.115"
-            },
-            "13.2.0": {
-                "cuda-nvrtc": "13.2.51", "cuda-runtime": "13.2.51", "cuda-nvcc": "13.2.51",
-                "cuda-cupti": "13.2.23", "cublas": "13.3.0.5", "cufft": "12.2.0.37",
-                "curand": "10.4.2.51", "cusolver": "12.1.0.51", "cusparse": "12.7.9.17",
-                "nvtx": "13.2.20", "nvjitlink": "13.2.51"
-            },
-            "13.2.1": {
-                "cuda-nvrtc": "13.2.78", "cuda-runtime": "13.2.75", "cuda-nvcc": "13.2.78",
-                "cuda-cupti": "13.2.75", "cublas": "13.4.0.1", "cufft": "12.2.0.46",
-                "curand": "10.4.2.55", "cusolver": "12.2.0.1", "cusparse": "12.7.10.1",
-                "nvtx": "13.2.75", "nvjitlink": "13.2.78"
-            }
-        }
+from compatibility_data import CompatibilityData
+from compatibility_engine import COMBINATION_COLUMNS, COMBINATION_HEADERS, CompatibilityEngine, Filters
+from compatibility_environment import check_environment, environment_filters, scan_environment
+from compatibility_export import export_report
+from compatibility_install import InstallPlanner, pip_commands, write_lockfiles
+from compatibility_solver import RECOMMENDATION_HEADERS, StackSolver
+from compatibility_wheelhouse import WheelhouseChecker, WheelhouseIndex
 
 
 def get_settings_path():
@@ -273,11 +26,167 @@ def get_settings_path():
     return os.path.join(script_dir, "settings.ini")
 
 
+ASSUMED_BG, ASSUMED_FG = QColor(255, 165, 0), QColor(0, 0, 0)
+PATCH_DIFF_BG, PATCH_DIFF_FG = QColor(100, 149, 237), QColor(255, 255, 255)
+NO_CUDNN_BG, NO_CUDNN_FG = QColor(255, 200, 100), QColor(0, 0, 0)
+WHEELHOUSE_OK_BG, WHEELHOUSE_OK_FG = QColor(144, 238, 144), QColor(0, 0, 0)
+WHEELHOUSE_MISSING_BG, WHEELHOUSE_MISSING_FG = QColor(255, 160, 160), QColor(0, 0, 0)
+PATCH_DIFF_TIP = "~ = CUDA patch version differs (built against a different patch version but same major.minor)"
+SPECIFIER_TIP = ("Pick a version or type a PEP 440 specifier set, e.g. >=2.8,<2.11 or ~=3.12 or ==12.*\n"
+                 "Separate alternatives with |, e.g. 3.11|3.12")
+
+# Filter changes within this window are coalesced into one recompute
+UPDATE_DEBOUNCE_MS = 40
+# Alternatives listed under the recommended stack
+RECOMMEND_TOP = 5
+
+
+class QuerySignals(QObject):
+    finished = Signal(int, object)
+
+
+class QueryWorker(QRunnable):
+    # Resolves one filter state off the UI thread. Superseded requests are
+    # skipped if they haven't started yet and ignored if they finish late.
+    def __init__(self, engine, lock, filters, request_id, is_current):
+        super().__init__()
+        self.engine = engine
+        self.lock = lock
+        self.filters = filters
+        self.request_id = request_id
+        self.is_current = is_current
+        self.signals = QuerySignals()
+
+    def run(self):
+        if not self.is_current(self.request_id):
+            return
+        with self.lock:
+            view = self.engine.query(self.filters)
+        self.signals.finished.emit(self.request_id, view)
+
+
+class CombinationTableModel(QAbstractTableModel):
+    # Read-only view over the engine's result rows. Text, colors and
+    # tooltips are produced on demand in data(), so only visible cells
+    # cost anything. An empty result shows a single "Message" cell.
+    HEADER_TOOLTIPS = {
+        4: ("The CUDA major.minor family compatible with this torch wheel.\n"
+            "This is what the CUDA dropdown filters against.\n"
+            "Any CUDA patch version in this family is considered compatible."),
+        5: ("The exact CUDA version PyTorch was built/tested against.\n"
+            "Informational only — not used for filtering."),
+        6: ("The cuDNN version PyTorch tested with (informational only).\n"
+            "Actual cuDNN compatibility is determined by your CUDA version."),
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = ()
+        # WheelhouseChecker marking the PyTorch column, once one is picked
+        self.wheelhouse = None
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def set_wheelhouse(self, checker):
+        self.wheelhouse = checker
+        if self.rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, 0))
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows) or 1
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(COMBINATION_HEADERS) if self.rows else 1
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation != Qt.Horizontal:
+            return section + 1 if role == Qt.DisplayRole else None
+        if role == Qt.DisplayRole:
+            return COMBINATION_HEADERS[section] if self.rows else "Message"
+        if role == Qt.ToolTipRole and self.rows:
+            return self.HEADER_TOOLTIPS.get(section)
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if not self.rows:
+            return "No compatible combinations found" if role == Qt.DisplayRole else None
+
+        combo = self.rows[index.row()]
+        col = index.column()
+        if role == Qt.DisplayRole:
+            return getattr(combo, COMBINATION_COLUMNS[col])
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role in (Qt.BackgroundRole, Qt.ForegroundRole, Qt.ToolTipRole):
+            if col == 0 and self.wheelhouse is not None:
+                style = self._wheelhouse_style(combo)
+            else:
+                style = self._cell_style(combo, col)
+            if style is not None:
+                return style[(Qt.BackgroundRole, Qt.ForegroundRole, Qt.ToolTipRole).index(role)]
+        return None
+
+    def _wheelhouse_style(self, combo):
+        missing = self.wheelhouse.missing(combo)
+        if not missing:
+            return WHEELHOUSE_OK_BG, WHEELHOUSE_OK_FG, "Every wheel of this stack is in the wheelhouse"
+        return (WHEELHOUSE_MISSING_BG, WHEELHOUSE_MISSING_FG,
+                "Missing from the wheelhouse:\n" + "\n".join(missing))
+
+    @staticmethod
+    def _cell_style(combo, col):
+        # (background, foreground, tooltip) for highlighted cells
+        if col == 6:
+            return (None, None,
+                    f"PyTorch tested with cuDNN {combo.cudnn}.\n"
+                    f"This is informational — cuDNN compatibility is\n"
+                    f"determined by your CUDA version, not torch.")
+        if col == 8 and combo.fa2_has_assumed:
+            return ASSUMED_BG, ASSUMED_FG, "* = Assumed compatible (patch version, not officially tested)"
+        if col == 9 and combo.xf_has_patch_diff:
+            return PATCH_DIFF_BG, PATCH_DIFF_FG, PATCH_DIFF_TIP
+        if col == 10:
+            if combo.bnb_has_patch_diff:
+                return PATCH_DIFF_BG, PATCH_DIFF_FG, PATCH_DIFF_TIP
+            if combo.bnb_has_assumed:
+                return ASSUMED_BG, ASSUMED_FG, "* = Assumed compatible (not officially tested)"
+        if col == 11 and not combo.windows:
+            return NO_CUDNN_BG, NO_CUDNN_FG, "Wheel exists but cuDNN 9.x for CUDA 13.x is Linux-only"
+        return None
+
+
 class CompatibilityChecker(QMainWindow):
     def __init__(self):
         super().__init__()
         self.settings = QSettings(get_settings_path(), QSettings.IniFormat)
         self.data = CompatibilityData()
+        self.engine = CompatibilityEngine(self.data)
+        self.install_planner = InstallPlanner(self.data)
+
+        # The engine isn't thread-safe (query() narrows from the last view and
+        # fills the result cache, the matrix builds its caches lazily): queries
+        # run one at a time on the pool, and every engine call holds
+        # _engine_lock so the UI thread never overlaps a running query
+        self._engine_lock = threading.Lock()
+        self._query_pool = QThreadPool(self)
+        self._query_pool.setMaxThreadCount(1)
+        self._request_id = 0
+        self._current_view = None
+        self._installed_nvidia = {}
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(UPDATE_DEBOUNCE_MS)
+        self._update_timer.timeout.connect(self._start_query)
+
         self.init_ui()
         self._block_updates = True
         self.load_settings()
@@ -318,7 +227,7 @@ class CompatibilityChecker(QMainWindow):
         # Row 0: PyTorch, Python, CUDA, Windows Only
         self.torch_combo = QComboBox()
         self.torch_combo.addItem("Any")
-        self.torch_combo.addItems(sorted(set(x["torch"] for x in self.data.torch_cuda), reverse=True))
+        self.torch_combo.addItems(sorted(set(x.torch for x in self.data.torch_cuda), reverse=True))
         self.torch_combo.setMinimumWidth(130)
         self.torch_combo.currentTextChanged.connect(self.update_compatibility)
 
@@ -326,14 +235,14 @@ class CompatibilityChecker(QMainWindow):
         self.python_combo.addItem("Any")
         all_python = set()
         for item in self.data.torch_python_triton:
-            all_python.update(item["python"])
+            all_python.update(item.python)
         self.python_combo.addItems(sorted(all_python, reverse=True))
         self.python_combo.setMinimumWidth(130)
         self.python_combo.currentTextChanged.connect(self.update_compatibility)
 
         self.cuda_combo = QComboBox()
         self.cuda_combo.addItem("Any")
-        all_cuda = set(x["cuda"] for x in self.data.torch_cuda)
+        all_cuda = set(x.cuda for x in self.data.torch_cuda)
         all_cuda.update(self.data.cuda_metapackages.keys())
         self.cuda_combo.addItems(sorted(all_cuda, reverse=True))
         self.cuda_combo.setMinimumWidth(130)
@@ -354,13 +263,13 @@ class CompatibilityChecker(QMainWindow):
         # Row 1: Flash Attn 2, Xformers, Triton, bitsandbytes
         self.fa2_combo = QComboBox()
         self.fa2_combo.addItem("Any")
-        self.fa2_combo.addItems(sorted(set(x["fa2"] for x in self.data.flash_attention), reverse=True))
+        self.fa2_combo.addItems(sorted(set(x.fa2 for x in self.data.flash_attention), reverse=True))
         self.fa2_combo.setMinimumWidth(130)
         self.fa2_combo.currentTextChanged.connect(self.update_compatibility)
 
         self.xformers_combo = QComboBox()
         self.xformers_combo.addItem("Any")
-        self.xformers_combo.addItems([x["xformers"] for x in self.data.xformers])
+        self.xformers_combo.addItems([x.xformers for x in self.data.xformers])
         self.xformers_combo.setMinimumWidth(130)
         self.xformers_combo.currentTextChanged.connect(self.update_compatibility)
 
@@ -368,14 +277,14 @@ class CompatibilityChecker(QMainWindow):
         self.triton_combo.addItem("Any")
         all_triton = set()
         for item in self.data.torch_python_triton:
-            all_triton.update(item["triton_compat"])
+            all_triton.update(item.triton_compat)
         self.triton_combo.addItems(sorted(all_triton, reverse=True))
         self.triton_combo.setMinimumWidth(130)
         self.triton_combo.currentTextChanged.connect(self.update_compatibility)
 
         self.bnb_combo = QComboBox()
         self.bnb_combo.addItem("Any")
-        self.bnb_combo.addItems([x["bnb"] for x in self.data.bitsandbytes])
+        self.bnb_combo.addItems([x.bnb for x in self.data.bitsandbytes])
         self.bnb_combo.setMinimumWidth(130)
         self.bnb_combo.currentTextChanged.connect(self.update_compatibility)
 
@@ -388,6 +297,22 @@ class CompatibilityChecker(QMainWindow):
         grid.addWidget(QLabel("bitsandbytes:"), 1, 6, Qt.AlignRight)
         grid.addWidget(self.bnb_combo, 1, 7)
 
+        self.filter_combos = {
+            "torch": self.torch_combo,
+            "python": self.python_combo,
+            "cuda": self.cuda_combo,
+            "fa2": self.fa2_combo,
+            "xformers": self.xformers_combo,
+            "triton": self.triton_combo,
+            "bnb": self.bnb_combo,
+        }
+
+        # Combos also take typed specifier sets and "|"-separated alternatives
+        for combo in self.filter_combos.values():
+            combo.setEditable(True)
+            combo.setInsertPolicy(QComboBox.NoInsert)
+            combo.setToolTip(SPECIFIER_TIP)
+
         # Let combo columns stretch equally
         for col in (1, 3, 5, 7):
             grid.setColumnStretch(col, 1)
@@ -404,6 +329,24 @@ class CompatibilityChecker(QMainWindow):
         clipboard_btn = QPushButton("Copy to Clipboard")
         clipboard_btn.clicked.connect(self.copy_to_clipboard)
         btn_layout.addWidget(clipboard_btn)
+        recommend_btn = QPushButton("Recommend")
+        recommend_btn.setToolTip("Pick the best stack for the current filters: newest torch, then newest "
+                                 "Flash Attn 2, exact CUDA patch matches and no assumed (*) builds")
+        recommend_btn.clicked.connect(self.recommend_stack)
+        btn_layout.addWidget(recommend_btn)
+        detect_btn = QPushButton("Detect My Environment")
+        detect_btn.setToolTip("Fill in the filters from the packages installed in this Python environment "
+                              "(read from their metadata; torch is not imported)")
+        detect_btn.clicked.connect(self.detect_environment)
+        btn_layout.addWidget(detect_btn)
+        lockfiles_btn = QPushButton("Export Lockfiles")
+        lockfiles_btn.setToolTip("Write pip requirements/constraints, uv and conda files for every listed combination")
+        lockfiles_btn.clicked.connect(self.export_lockfiles)
+        btn_layout.addWidget(lockfiles_btn)
+        wheelhouse_btn = QPushButton("Check Wheelhouse")
+        wheelhouse_btn.setToolTip("Mark which listed combinations can be installed from a folder of downloaded wheels")
+        wheelhouse_btn.clicked.connect(self.check_wheelhouse)
+        btn_layout.addWidget(wheelhouse_btn)
         selection_layout.addLayout(btn_layout)
 
         selection_group.setLayout(selection_layout)
@@ -411,17 +354,32 @@ class CompatibilityChecker(QMainWindow):
 
         self.tabs = QTabWidget()
 
-        self.compat_table = QTableWidget()
+        self.compat_model = CombinationTableModel(self)
+        self.compat_table = QTableView()
+        self.compat_table.setModel(self.compat_model)
         self.compat_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.compat_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.compat_table.horizontalHeader().setStretchLastSection(True)
         self.tabs.addTab(self.compat_table, "Compatible Combinations")
 
+        metapackage_tab = QWidget()
+        metapackage_layout = QVBoxLayout(metapackage_tab)
+        metapackage_layout.setContentsMargins(0, 0, 0, 0)
+        match_layout = QHBoxLayout()
+        match_btn = QPushButton("Match Installed nvidia-* Wheels")
+        match_btn.setToolTip("Find the CUDA release the nvidia-* wheels of this Python environment belong to")
+        match_btn.clicked.connect(self.match_installed_cuda)
+        match_layout.addWidget(match_btn)
+        self.cuda_match_label = QLabel("")
+        self.cuda_match_label.setWordWrap(True)
+        match_layout.addWidget(self.cuda_match_label, 1)
+        metapackage_layout.addLayout(match_layout)
         self.metapackage_table = QTableWidget()
         self.metapackage_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.metapackage_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.metapackage_table.horizontalHeader().setStretchLastSection(True)
-        self.tabs.addTab(self.metapackage_table, "CUDA Metapackages")
+        metapackage_layout.addWidget(self.metapackage_table)
+        self.tabs.addTab(metapackage_tab, "CUDA Metapackages")
 
         layout.addWidget(self.tabs)
 
@@ -454,21 +412,19 @@ class CompatibilityChecker(QMainWindow):
             tab_index = int(self.settings.value("window/tab_index"))
             self.tabs.setCurrentIndex(tab_index)
 
-        filter_combos = {
-            "filters/torch": self.torch_combo,
-            "filters/python": self.python_combo,
-            "filters/cuda": self.cuda_combo,
-            "filters/fa2": self.fa2_combo,
-            "filters/xformers": self.xformers_combo,
-            "filters/triton": self.triton_combo,
-            "filters/bnb": self.bnb_combo,
-        }
-        for key, combo in filter_combos.items():
+        for field, combo in self.filter_combos.items():
+            key = f"filters/{field}"
             if self.settings.contains(key):
                 val = self.settings.value(key)
+                if isinstance(val, list):
+                    # A hand-edited, unquoted "torch>=2.8,<2.11" reads back as a list
+                    val = ",".join(val)
                 idx = combo.findText(val)
                 if idx >= 0:
                     combo.setCurrentIndex(idx)
+                elif val:
+                    # Typed specifier set
+                    combo.setCurrentText(val)
 
         if self.settings.contains("filters/windows_only"):
             self.windows_only_check.setChecked(self.settings.value("filters/windows_only", "true") == "true")
@@ -477,17 +433,16 @@ class CompatibilityChecker(QMainWindow):
         self.settings.setValue("window/geometry", self.saveGeometry())
         self.settings.setValue("window/state", self.saveState())
         self.settings.setValue("window/tab_index", self.tabs.currentIndex())
-        self.settings.setValue("filters/torch", self.torch_combo.currentText())
-        self.settings.setValue("filters/python", self.python_combo.currentText())
-        self.settings.setValue("filters/cuda", self.cuda_combo.currentText())
-        self.settings.setValue("filters/fa2", self.fa2_combo.currentText())
-        self.settings.setValue("filters/xformers", self.xformers_combo.currentText())
-        self.settings.setValue("filters/triton", self.triton_combo.currentText())
-        self.settings.setValue("filters/bnb", self.bnb_combo.currentText())
+        for field, combo in self.filter_combos.items():
+            self.settings.setValue(f"filters/{field}", combo.currentText())
         self.settings.setValue("filters/windows_only", "true" if self.windows_only_check.isChecked() else "false")
 
     def closeEvent(self, event):
         self.save_settings()
+        self._update_timer.stop()
+        self._request_id += 1
+        self._query_pool.clear()
+        self._query_pool.waitForDone()
         super().closeEvent(event)
 
     def reset_selections(self):
@@ -502,113 +457,87 @@ class CompatibilityChecker(QMainWindow):
         self._block_updates = False
         self.update_compatibility()
 
-    def _read_table(self, table):
-        headers = []
-        for col in range(table.columnCount()):
-            header = table.horizontalHeaderItem(col)
-            headers.append(header.text() if header else "")
-        rows = []
-        for row in range(table.rowCount()):
-            cells = []
-            for col in range(table.columnCount()):
-                item = table.item(row, col)
-                cells.append(item.text() if item else "")
-            rows.append(cells)
-        return headers, rows
-
-    def _format_ascii_table(self, headers, rows):
-        if not headers:
-            return ""
-        col_widths = [len(h) for h in headers]
-        for row in rows:
-            for i, cell in enumerate(row):
-                col_widths[i] = max(col_widths[i], len(cell))
-        separator = "+" + "+".join("-" * (w + 2) for w in col_widths) + "+"
-        def format_row(cells):
-            parts = []
-            for cell, w in zip(cells, col_widths):
-                parts.append(f" {cell:<{w}} ")
-            return "|" + "|".join(parts) + "|"
-        lines = [separator, format_row(headers), separator]
-        for row in rows:
-            lines.append(format_row(row))
-        lines.append(separator)
-        return "\n".join(lines)
-
-    def _build_export_content(self):
-        lines = []
-        lines.append("PyTorch CUDA Compatibility Checker - Export")
-        lines.append("=" * 44)
-        lines.append("")
-
-        filters = [
-            ("PyTorch", self.torch_combo.currentText()),
-            ("Python", self.python_combo.currentText()),
-            ("CUDA", self.cuda_combo.currentText()),
-            ("Flash Attn 2", self.fa2_combo.currentText()),
-            ("Xformers", self.xformers_combo.currentText()),
-            ("Triton", self.triton_combo.currentText()),
-            ("bitsandbytes", self.bnb_combo.currentText()),
-            ("Windows Only", "Yes" if self.windows_only_check.isChecked() else "No"),
-        ]
-        lines.append("Active Filters:")
-        for name, val in filters:
-            lines.append(f"  {name}: {val}")
-        lines.append("")
-
-        lines.append("Compatible Combinations")
-        lines.append("-" * 23)
-        compat_headers, compat_rows = self._read_table(self.compat_table)
-        has_compat = compat_rows and not (len(compat_rows) == 1 and len(compat_headers) == 1 and compat_headers[0] == "Message")
-        if has_compat:
-            lines.append(self._format_ascii_table(compat_headers, compat_rows))
-        else:
-            lines.append("No compatible combinations found.")
-        lines.append("")
-
-        lines.append("CUDA Metapackages")
-        lines.append("-" * 17)
-        meta_headers, meta_rows = self._read_table(self.metapackage_table)
-        has_meta = meta_rows and not (len(meta_rows) == 1 and len(meta_headers) == 1 and meta_headers[0] == "Message")
-        if has_meta and has_compat:
-            cuda_col = next((i for i, h in enumerate(compat_headers) if h.startswith("CUDA")), -1)
-            if cuda_col >= 0:
-                compatible_cudas = set(row[cuda_col].rstrip("†") for row in compat_rows)
-                keep_cols = [0]
-                for i in range(1, len(meta_headers)):
-                    if meta_headers[i] in compatible_cudas:
-                        keep_cols.append(i)
-                if len(keep_cols) > 1:
-                    meta_headers = [meta_headers[i] for i in keep_cols]
-                    meta_rows = [[row[i] for i in keep_cols] for row in meta_rows]
-            lines.append(self._format_ascii_table(meta_headers, meta_rows))
-        elif has_meta:
-            lines.append(self._format_ascii_table(meta_headers, meta_rows))
-        else:
-            lines.append("No metapackage data available.")
-        lines.append("")
-
-        return "\n".join(lines)
+    def write_report(self, out, fmt="ascii"):
+        # Streams the current result straight from the engine rows, in any
+        # compatibility_export format
+        filters = [("PyTorch", self.torch_combo.currentText()),
+                   ("Python", self.python_combo.currentText()),
+                   ("CUDA", self.cuda_combo.currentText()),
+                   ("Flash Attn 2", self.fa2_combo.currentText()),
+                   ("Xformers", self.xformers_combo.currentText()),
+                   ("Triton", self.triton_combo.currentText()),
+                   ("bitsandbytes", self.bnb_combo.currentText()),
+                   ("Windows Only", "Yes" if self.windows_only_check.isChecked() else "No")]
+        view = self._current_view
+        # The rows are already in memory, so the ASCII table is sized to them
+        # rather than padded to the matrix-wide widths the CLI streams with
+        export_report(out, fmt, self.compat_model.rows, view.metapackages if view is not None else None,
+                      filters)
 
     def export_to_txt(self):
-        content = self._build_export_content()
-        tmp = tempfile.NamedTemporaryFile(mode="w", suffix=".txt", prefix="torch_cuda_export_",
-                                          delete=False, encoding="utf-8")
-        tmp.write(content)
-        tmp.close()
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", prefix="torch_cuda_export_",
+                                         delete=False, encoding="utf-8") as tmp:
+            self.write_report(tmp)
         QDesktopServices.openUrl(QUrl.fromLocalFile(tmp.name))
 
     def copy_to_clipboard(self):
-        content = self._build_export_content()
-        QApplication.clipboard().setText(content)
+        buffer = io.StringIO()
+        self.write_report(buffer)
+        QApplication.clipboard().setText(buffer.getvalue())
         self.statusBar().showMessage("Copied to clipboard", 3000)
 
+    def detect_environment(self):
+        env = scan_environment()
+        selected = environment_filters(env)
+        self._block_updates = True
+        for field, combo in self.filter_combos.items():
+            idx = combo.findText(selected[field])
+            if idx >= 0:
+                combo.setCurrentIndex(idx)
+            else:
+                combo.setCurrentText(selected[field])
+        self._block_updates = False
+        self.update_compatibility()
+
+        with self._engine_lock:
+            mismatches = check_environment(self.engine, env)
+        if not mismatches:
+            self.statusBar().showMessage("Installed packages match the compatibility data", 5000)
+            return
+        lines = [f"{m.package} {m.installed}: {m.problem}" if m.installed else m.problem for m in mismatches]
+        QMessageBox.warning(self, "Environment Mismatches", "\n".join(lines))
+
+    def recommend_stack(self):
+        with self._engine_lock:
+            picks = StackSolver(self.engine).solve(self.current_filters(), RECOMMEND_TOP)
+        if not picks:
+            self.statusBar().showMessage("No compatible combinations for the current filters", 3000)
+            return
+
+        # Select the recommended row when it's in the table
+        rows = self.compat_model.rows
+        if picks[0].combination in rows:
+            row = rows.index(picks[0].combination)
+            self.tabs.setCurrentWidget(self.compat_table)
+            self.compat_table.selectRow(row)
+            self.compat_table.scrollTo(self.compat_model.index(row, 0))
+
+        def describe(pick):
+            return ", ".join(f"{header} {cell}" for header, cell in zip(RECOMMENDATION_HEADERS, pick.display_cells()))
+
+        lines = [describe(picks[0])]
+        if len(picks) > 1:
+            lines.append("")
+            lines.append("Alternatives:")
+            lines.extend(f"{i}. {describe(pick)}" for i, pick in enumerate(picks[1:], 2))
+        QMessageBox.information(self, "Recommended Stack", "\n".join(lines))
+
     def show_context_menu(self, pos):
         row = self.compat_table.rowAt(pos.y())
         if row < 0:
             return
         # Verify this is a real data row, not the "no results" message
-        if self.compat_table.columnCount() < 12:
+        if not self.compat_model.rows:
             return
         menu = QMenu(self)
         win_action = QAction("Copy Install Commands (Windows)", self)
@@ -619,82 +548,9 @@ class CompatibilityChecker(QMainWindow):
         menu.addAction(linux_action)
         menu.exec(self.compat_table.viewport().mapToGlobal(pos))
 
-    def _get_cell(self, row, col):
-        item = self.compat_table.item(row, col)
-        return item.text() if item else ""
-
     def copy_install_commands(self, row, platform):
-        torch_ver = self._get_cell(row, 0)
-        torchvision_ver = self._get_cell(row, 1)
-        torchaudio_ver = self._get_cell(row, 2)
-        python_ver = self._get_cell(row, 3)
-        cuda_ver = self._get_cell(row, 5)  # CUDA (torch-tested) column
-        fa2_cell = self._get_cell(row, 8)
-        xf_cell = self._get_cell(row, 9)
-        bnb_cell = self._get_cell(row, 10)
-
-        # Derive wheel moniker from CUDA version (e.g., "12.8.1" -> "cu128")
-        cuda_parts = cuda_ver.split(".")
-        moniker = f"cu{cuda_parts[0]}{cuda_parts[1]}"
-
-        # Look up triton pin and sympy from torch_python_triton
-        triton_pin = None
-        sympy_ver = None
-        for pt in self.data.torch_python_triton:
-            if pt["torch"] == torch_ver:
-                triton_pin = pt["triton"]
-                sympy_ver = pt["sympy"]
-                break
-
-        lines = []
-        lines.append(f"# PyTorch {torch_ver} + CUDA {cuda_ver} ({moniker})")
-        lines.append(f"pip install torch=={torch_ver} torchvision=={torchvision_ver} torchaudio=={torchaudio_ver} --index-url https://download.pytorch.org/whl/{moniker}")
-
-        if triton_pin:
-            lines.append("")
-            if platform == "windows":
-                lines.append(f"# Triton (Windows)")
-                lines.append(f"pip install triton-windows=={triton_pin}")
-            else:
-                lines.append(f"# Triton")
-                lines.append(f"pip install triton=={triton_pin}")
-
-        if sympy_ver:
-            lines.append("")
-            lines.append(f"# Sympy")
-            lines.append(f'pip install "sympy{sympy_ver}"')
-
-        # Flash Attention 2
-        if fa2_cell and fa2_cell != "-":
-            fa2_ver = fa2_cell.split(",")[0].strip().rstrip("*")
-            lines.append("")
-            if platform == "linux":
-                lines.append(f"# Flash Attention 2")
-                lines.append(f"pip install flash-attn=={fa2_ver}")
-            else:
-                url = self._get_fa2_windows_url(fa2_ver, moniker, torch_ver, python_ver)
-                if url:
-                    lines.append(f"# Flash Attention 2 (Windows wheel from kingbri1/flash-attention)")
-                    lines.append(f"pip install {url}")
-                else:
-                    lines.append(f"# Flash Attention 2 (no pre-built Windows wheel found for this combination)")
-                    lines.append(f"# Check: https://github.com/kingbri1/flash-attention/releases")
-
-        # Xformers
-        if xf_cell and xf_cell != "-":
-            xf_ver = xf_cell.split(",")[0].strip().rstrip("~")
-            lines.append("")
-            lines.append(f"# Xformers")
-            lines.append(f"pip install xformers=={xf_ver}")
-
-        # bitsandbytes
-        if bnb_cell and bnb_cell != "-":
-            bnb_ver = bnb_cell.split(",")[0].strip().rstrip("*").rstrip("~")
-            lines.append("")
-            lines.append(f"# bitsandbytes")
-            lines.append(f"pip install bitsandbytes=={bnb_ver}")
-
-        content = "\n".join(lines)
+        combo = self.compat_model.rows[row]
+        content = pip_commands(self.install_planner.plan(combo, platform))
         tmp = tempfile.NamedTemporaryFile(mode="w", suffix=".txt",
                                           prefix=f"torch_install_{platform}_",
                                           delete=False, encoding="utf-8")
@@ -702,320 +558,135 @@ class CompatibilityChecker(QMainWindow):
         tmp.close()
         QDesktopServices.openUrl(QUrl.fromLocalFile(tmp.name))
 
-    def _get_fa2_windows_url(self, fa2_ver, moniker, torch_ver, python_ver):
-        py_nodot = python_ver.replace(".", "")
-        key = (fa2_ver, moniker, torch_ver)
-        # Direct match
-        available = self.data.fa2_windows_wheels.get(key)
-        if not available:
-            # Fallback for assumed compatibility (e.g., torch 2.9.1 -> try 2.9.0)
-            base_torch = torch_ver.rsplit(".", 1)[0] + ".0"
-            key = (fa2_ver, moniker, base_torch)
-            available = self.data.fa2_windows_wheels.get(key)
-        if available and python_ver in available:
-            return (f"https://github.com/kingbri1/flash-attention/releases/download/"
-                    f"v{fa2_ver}/flash_attn-{fa2_ver}%2B{moniker}torch{key[2]}"
-                    f"cxx11abiFALSE-cp{py_nodot}-cp{py_nodot}-win_amd64.whl")
-        return None
-
-    def get_bnb_for_cuda_python(self, cuda_version, python_version):
-        cuda_short = '.'.join(cuda_version.split('.')[:2])  # e.g. "13.0"
-        bnb_versions = []
-        bnb_has_assumed = False
-        bnb_has_patch_diff = False
-        for bnb in self.data.bitsandbytes:
-            if python_version not in bnb["python"]:
-                continue
-            if cuda_version in bnb["cuda"]:
-                # Exact match
-                version_str = bnb["bnb"]
-                if cuda_version in bnb.get("assumed_cuda", []):
-                    version_str += "*"
-                    bnb_has_assumed = True
-                bnb_versions.append(version_str)
-            elif any(c.rsplit('.', 1)[0] == cuda_short for c in bnb["cuda"]):
-                # Patch-version-diff match
-                version_str = bnb["bnb"] + "~"
-                bnb_has_patch_diff = True
-                bnb_versions.append(version_str)
-        return bnb_versions, bnb_has_assumed, bnb_has_patch_diff
+    def export_lockfiles(self):
+        out_dir = QFileDialog.getExistingDirectory(self, "Export Lockfiles")
+        if not out_dir:
+            return
+        stacks, written, unchanged = write_lockfiles(self.data, self.compat_model.rows, out_dir)
+        self.statusBar().showMessage(f"Lockfiles for {stacks} stacks: {written} written, "
+                                     f"{unchanged} unchanged", 5000)
+
+    def check_wheelhouse(self):
+        directory = QFileDialog.getExistingDirectory(self, "Check Wheelhouse",
+                                                     self.settings.value("wheelhouse/path", ""))
+        if not directory:
+            return
+        self.settings.setValue("wheelhouse/path", directory)
+        index = WheelhouseIndex(directory)
+        index.update()
+        platform = "windows" if sys.platform == "win32" else "linux"
+        checker = WheelhouseChecker(index, self.data, platform)
+        self.compat_model.set_wheelhouse(checker)
+        rows = self.compat_model.rows
+        complete = sum(not checker.missing(combo) for combo in rows)
+        self.statusBar().showMessage(f"{complete} of {len(rows)} combinations installable from "
+                                     f"{len(index)} wheels ({platform})", 5000)
+
+    def current_filters(self):
+        return Filters.from_selection(
+            torch=self.torch_combo.currentText(),
+            python=self.python_combo.currentText(),
+            cuda=self.cuda_combo.currentText(),
+            fa2=self.fa2_combo.currentText(),
+            xformers=self.xformers_combo.currentText(),
+            triton=self.triton_combo.currentText(),
+            bnb=self.bnb_combo.currentText(),
+            windows_only=self.windows_only_check.isChecked(),
+        )
 
     def update_compatibility(self):
         if getattr(self, '_block_updates', False):
             return
-        torch_sel = self.torch_combo.currentText() if self.torch_combo.currentText() != "Any" else None
-        python_sel = self.python_combo.currentText() if self.python_combo.currentText() != "Any" else None
-        cuda_sel = self.cuda_combo.currentText() if self.cuda_combo.currentText() != "Any" else None
-        fa2_sel = self.fa2_combo.currentText() if self.fa2_combo.currentText() != "Any" else None
-        xformers_sel = self.xformers_combo.currentText() if self.xformers_combo.currentText() != "Any" else None
-        triton_sel = self.triton_combo.currentText() if self.triton_combo.currentText() != "Any" else None
-        bnb_sel = self.bnb_combo.currentText() if self.bnb_combo.currentText() != "Any" else None
-        windows_only = self.windows_only_check.isChecked()
-
-        compatible = []
-
-        for tc in self.data.torch_cuda:
-            if torch_sel and tc["torch"] != torch_sel:
-                continue
-            if cuda_sel:
-                sel_mm = '.'.join(cuda_sel.split('.')[:2])
-                tc_mm = '.'.join(tc["cuda"].split('.')[:2])
-                if sel_mm != tc_mm:
-                    continue
-            if windows_only and not tc.get("windows", True):
-                continue
-
-            matching_pt = [x for x in self.data.torch_python_triton if x["torch"] == tc["torch"]]
-
-            for pt in matching_pt:
-                cuda_major_minor = tc["cuda"].split('.')[:2]
-                cuda_short = '.'.join(cuda_major_minor)
-
-                if cuda_short not in pt["cuda_versions"]:
-                    continue
-
-                if triton_sel and triton_sel not in pt["triton_compat"]:
-                    continue
-
-                for py_ver in pt["python"]:
-                    if python_sel and py_ver != python_sel:
-                        continue
-
-                    fa2_compat = [x for x in self.data.flash_attention 
-                                  if x["torch"] == tc["torch"] and x["python"] == py_ver 
-                                  and x["cuda"] == tc["cuda"]]
-
-                    fa2_versions = []
-                    fa2_has_assumed = False
-                    if fa2_compat:
-                        for fa in fa2_compat:
-                            version_str = fa["fa2"]
-                            if fa.get("assumed", False):
-                                version_str += "*"
-                                fa2_has_assumed = True
-                            fa2_versions.append(version_str)
-                        fa2_versions = list(set(fa2_versions))
-                    else:
-                        fa2_versions = ["-"]
-
-                    if fa2_sel:
-                        matching_fa2 = [x for x in fa2_compat if x["fa2"] == fa2_sel]
-                        if not matching_fa2:
-                            continue
-
-                    # Exact CUDA match for xformers
-                    # torch_min entries (>=0.0.34) match any torch >= their stated version
-                    def xf_torch_match(xf, torch_ver):
-                        if xf.get("torch_min"):
-                            return tuple(int(p) for p in torch_ver.split('.')) >= tuple(int(p) for p in xf["torch"].split('.'))
-                        return xf["torch"] == torch_ver
-
-                    xf_exact = [x for x in self.data.xformers
-                                if xf_torch_match(x, tc["torch"]) and tc["cuda"] in x["cuda"]]
-                    # Patch-version-diff match (same major.minor, different patch)
-                    xf_patch_diff = []
-                    if not xf_exact:
-                        xf_patch_diff = [x for x in self.data.xformers
-                                         if xf_torch_match(x, tc["torch"]) and
-                                         any(xc.rsplit('.', 1)[0] == cuda_short
-                                             for xc in x["cuda"])]
-
-                    xf_has_patch_diff = False
-                    if xf_exact:
-                        xf_versions = [x["xformers"] for x in xf_exact]
-                    elif xf_patch_diff:
-                        xf_versions = [x["xformers"] + "~" for x in xf_patch_diff]
-                        xf_has_patch_diff = True
-                    else:
-                        xf_versions = ["-"]
-
-                    if xformers_sel:
-                        if xformers_sel not in [v.rstrip("~") for v in xf_versions]:
-                            continue
-
-                    bnb_versions, bnb_has_assumed, bnb_has_patch_diff = self.get_bnb_for_cuda_python(tc["cuda"], py_ver)
-                    if not bnb_versions:
-                        bnb_versions = ["-"]
-
-                    if bnb_sel:
-                        matching_bnb = [v for v in bnb_versions if v.replace("*", "").rstrip("~") == bnb_sel]
-                        if not matching_bnb:
-                            continue
-
-                    ecosystem = self.data.torch_ecosystem.get(tc["torch"], {})
-                    torchvision_ver = ecosystem.get("torchvision", "-")
-                    torchaudio_ver = ecosystem.get("torchaudio", "-")
-
-                    windows_support = "Yes" if tc.get("windows", True) else "No (cuDNN)"
-
-                    triton_pin = pt["triton"]
-                    triton_compat_list = pt["triton_compat"]
-                    if len(triton_compat_list) > 1:
-                        triton_display = f"{', '.join(triton_compat_list)} (pin: {triton_pin})"
-                    else:
-                        triton_display = triton_pin
-
-                    cuda_exact = (cuda_sel is None or tc["cuda"] == cuda_sel)
-
-                    compatible.append({
-                        "torch": tc["torch"],
-                        "torchvision": torchvision_ver,
-                        "torchaudio": torchaudio_ver,
-                        "python": py_ver,
-                        "cuda": tc["cuda"],
-                        "cuda_family": '.'.join(tc["cuda"].split('.')[:2]),
-                        "cuda_exact_match": cuda_exact,
-                        "cuda_selected": cuda_sel,
-                        "cudnn": tc["cudnn"],
-                        "triton": triton_display,
-                        "fa2": ", ".join(sorted(fa2_versions, reverse=True)),
-                        "fa2_has_assumed": fa2_has_assumed,
-                        "xformers": ", ".join(xf_versions),
-                        "xf_has_patch_diff": xf_has_patch_diff,
-                        "bnb": ", ".join(bnb_versions),
-                        "bnb_has_assumed": bnb_has_assumed,
-                        "bnb_has_patch_diff": bnb_has_patch_diff,
-                        "windows": windows_support,
-                    })
-
-        self.compat_table.clear()
+        # Restart the debounce timer; the query runs once changes settle
+        self._update_timer.start()
+
+    def _start_query(self):
+        self._request_id += 1
+        # Drop queued queries that haven't started; they're already stale
+        self._query_pool.clear()
+        worker = QueryWorker(self.engine, self._engine_lock, self.current_filters(), self._request_id,
+                             lambda request_id: request_id == self._request_id)
+        worker.signals.finished.connect(self._apply_view)
+        self._query_pool.start(worker)
+
+    def _apply_view(self, request_id, view):
+        if request_id != self._request_id:
+            # A newer filter state is pending; never show an older result
+            return
+        self._current_view = view
+        compatible = view.combinations
+
+        self.compat_model.set_rows(compatible)
         if compatible:
-            self.compat_table.setRowCount(len(compatible))
-            self.compat_table.setColumnCount(12)
-            self.compat_table.setHorizontalHeaderLabels(
-                ["PyTorch", "Torchvision", "Torchaudio", "Python",
-                 "CUDA (compatible)", "CUDA (torch-tested)", "cuDNN (torch-tested)",
-                 "Triton", "Flash Attn 2", "Xformers", "bitsandbytes", "Win cuDNN"])
-
-            # Add header tooltips
-            compat_cuda_hdr = self.compat_table.horizontalHeaderItem(4)
-            compat_cuda_hdr.setToolTip(
-                "The CUDA major.minor family compatible with this torch wheel.\n"
-                "This is what the CUDA dropdown filters against.\n"
-                "Any CUDA patch version in this family is considered compatible.")
-            tested_cuda_hdr = self.compat_table.horizontalHeaderItem(5)
-            tested_cuda_hdr.setToolTip(
-                "The exact CUDA version PyTorch was built/tested against.\n"
-                "Informational only — not used for filtering.")
-            cudnn_hdr = self.compat_table.horizontalHeaderItem(6)
-            cudnn_hdr.setToolTip(
-                "The cuDNN version PyTorch tested with (informational only).\n"
-                "Actual cuDNN compatibility is determined by your CUDA version.")
-
-            for i, combo in enumerate(compatible):
-                def make_item(text):
-                    item = QTableWidgetItem(text)
-                    item.setTextAlignment(Qt.AlignCenter)
-                    return item
-
-                self.compat_table.setItem(i, 0, make_item(combo["torch"]))
-                self.compat_table.setItem(i, 1, make_item(combo["torchvision"]))
-                self.compat_table.setItem(i, 2, make_item(combo["torchaudio"]))
-                self.compat_table.setItem(i, 3, make_item(combo["python"]))
-
-                # CUDA (compatible) — major.minor family
-                self.compat_table.setItem(i, 4, make_item(combo["cuda_family"]))
-
-                # CUDA (torch-tested) — exact version, informational
-                self.compat_table.setItem(i, 5, make_item(combo["cuda"]))
-
-                # cuDNN (torch-tested) — informational
-                cudnn_item = make_item(combo["cudnn"])
-                cudnn_item.setToolTip(
-                    f"PyTorch tested with cuDNN {combo['cudnn']}.\n"
-                    f"This is informational — cuDNN compatibility is\n"
-                    f"determined by your CUDA version, not torch.")
-                self.compat_table.setItem(i, 6, cudnn_item)
-
-                self.compat_table.setItem(i, 7, make_item(combo["triton"]))
-
-                fa2_item = make_item(combo["fa2"])
-                if combo["fa2_has_assumed"]:
-                    fa2_item.setBackground(QColor(255, 165, 0))
-                    fa2_item.setForeground(QColor(0, 0, 0))
-                    fa2_item.setToolTip("* = Assumed compatible (patch version, not officially tested)")
-                self.compat_table.setItem(i, 8, fa2_item)
-
-                xf_item = make_item(combo["xformers"])
-                if combo["xf_has_patch_diff"]:
-                    xf_item.setBackground(QColor(100, 149, 237))
-                    xf_item.setForeground(QColor(255, 255, 255))
-                    xf_item.setToolTip("~ = CUDA patch version differs (built against a different patch version but same major.minor)")
-                self.compat_table.setItem(i, 9, xf_item)
-
-                bnb_item = make_item(combo["bnb"])
-                if combo["bnb_has_patch_diff"]:
-                    bnb_item.setBackground(QColor(100, 149, 237))
-                    bnb_item.setForeground(QColor(255, 255, 255))
-                    bnb_item.setToolTip("~ = CUDA patch version differs (built against a different patch version but same major.minor)")
-                elif combo["bnb_has_assumed"]:
-                    bnb_item.setBackground(QColor(255, 165, 0))
-                    bnb_item.setForeground(QColor(0, 0, 0))
-                    bnb_item.setToolTip("* = Assumed compatible (not officially tested)")
-                self.compat_table.setItem(i, 10, bnb_item)
-
-                windows_item = make_item(combo["windows"])
-                if combo["windows"] == "No (cuDNN)":
-                    windows_item.setBackground(QColor(255, 200, 100))
-                    windows_item.setForeground(QColor(0, 0, 0))
-                    windows_item.setToolTip("Wheel exists but cuDNN 9.x for CUDA 13.x is Linux-only")
-                self.compat_table.setItem(i, 11, windows_item)
-
-            self.compat_table.resizeColumnsToContents()
+            self._resize_compat_columns()
+
+        self.update_metapackages(view.metapackages)
+        self.update_filter_hints(view.facets)
+
+    def _resize_compat_columns(self):
+        # Size columns from the matrix-wide longest text per column instead
+        # of measuring every cell of the current result
+        header = self.compat_table.horizontalHeader()
+        cell_metrics = self.compat_table.fontMetrics()
+        header_metrics = header.fontMetrics()
+        with self._engine_lock:
+            longest = self.engine.matrix.longest_cells()
+        for col, text in enumerate(longest):
+            width = max(cell_metrics.horizontalAdvance(text),
+                        header_metrics.horizontalAdvance(COMBINATION_HEADERS[col]))
+            header.resizeSection(col, width + 24)
+
+    def update_filter_hints(self, facets):
+        # Gray out combo options that would leave no compatible combinations
+        # and show the row count each option would produce as a tooltip
+        for field, combo in self.filter_combos.items():
+            for i in range(1, combo.count()):
+                count = self.engine.facet_count(facets, field, combo.itemText(i))
+                combo.setItemData(i, None if count else QColor(150, 150, 150), Qt.ForegroundRole)
+                combo.setItemData(i, f"{count} compatible combination{'' if count == 1 else 's'}",
+                                  Qt.ToolTipRole)
+
+    def match_installed_cuda(self):
+        self._installed_nvidia = scan_environment().nvidia
+        with self._engine_lock:
+            matches = self.engine.match_cuda_release(self._installed_nvidia)
+        if not matches:
+            self.cuda_match_label.setText("No installed nvidia-* wheels match a known CUDA release")
         else:
-            self.compat_table.setRowCount(1)
-            self.compat_table.setColumnCount(1)
-            self.compat_table.setHorizontalHeaderLabels(["Message"])
-            self.compat_table.setItem(0, 0, QTableWidgetItem("No compatible combinations found"))
-
-        self.update_metapackages(cuda_sel)
-
-    def update_metapackages(self, cuda_version):
+            best = matches[0]
+            text = (f"Installed nvidia-* wheels match CUDA {best.cuda} "
+                    f"({len(best.matched)} of {len(best.matched) + len(best.mismatched)} components)")
+            if best.mismatched:
+                text += "; disagreeing: " + ", ".join(f"{name} {installed} (expected {expected})"
+                                                      for name, installed, expected in best.mismatched)
+            self.cuda_match_label.setText(text)
+        # Redraw so the installed versions are highlighted
+        self.update_metapackages(self._current_view.metapackages if self._current_view is not None else None)
+
+    def update_metapackages(self, view):
         self.metapackage_table.clear()
 
-        if cuda_version:
-            # Single CUDA version selected
-            if cuda_version in self.data.cuda_metapackages:
-                packages = self.data.cuda_metapackages[cuda_version]
-                self.metapackage_table.setRowCount(len(packages))
-                self.metapackage_table.setColumnCount(2)
-                self.metapackage_table.setHorizontalHeaderLabels(["Package", cuda_version])
-
-                for i, (pkg, ver) in enumerate(packages.items()):
-                    pkg_item = QTableWidgetItem(pkg)
-                    pkg_item.setTextAlignment(Qt.AlignCenter)
-                    ver_item = QTableWidgetItem(ver)
-                    ver_item.setTextAlignment(Qt.AlignCenter)
-                    self.metapackage_table.setItem(i, 0, pkg_item)
-                    self.metapackage_table.setItem(i, 1, ver_item)
-
-                self.metapackage_table.resizeColumnsToContents()
-            else:
-                self.metapackage_table.setRowCount(1)
-                self.metapackage_table.setColumnCount(1)
-                self.metapackage_table.setHorizontalHeaderLabels(["Message"])
-                self.metapackage_table.setItem(0, 0, QTableWidgetItem("No metapackage data available for this CUDA version"))
-        else:
-            # "Any" selected — show all CUDA versions as columns
-            cuda_versions = sorted(self.data.cuda_metapackages.keys())
-            package_names = list(next(iter(self.data.cuda_metapackages.values())).keys())
-
-            self.metapackage_table.setRowCount(len(package_names))
-            self.metapackage_table.setColumnCount(1 + len(cuda_versions))
-            self.metapackage_table.setHorizontalHeaderLabels(["Package"] + cuda_versions)
-
-            for i, pkg in enumerate(package_names):
-                pkg_item = QTableWidgetItem(pkg)
-                pkg_item.setTextAlignment(Qt.AlignCenter)
-                self.metapackage_table.setItem(i, 0, pkg_item)
-
-                for col, cv in enumerate(cuda_versions, start=1):
-                    ver = self.data.cuda_metapackages[cv].get(pkg, "-")
-                    ver_item = QTableWidgetItem(ver)
-                    ver_item.setTextAlignment(Qt.AlignCenter)
-                    self.metapackage_table.setItem(i, col, ver_item)
-
-            self.metapackage_table.resizeColumnsToContents()
+        if view is None:
+            self.metapackage_table.setRowCount(1)
+            self.metapackage_table.setColumnCount(1)
+            self.metapackage_table.setHorizontalHeaderLabels(["Message"])
+            self.metapackage_table.setItem(0, 0, QTableWidgetItem("No metapackage data available for this CUDA version"))
+            return
+
+        headers, rows = view
+        self.metapackage_table.setRowCount(len(rows))
+        self.metapackage_table.setColumnCount(len(headers))
+        self.metapackage_table.setHorizontalHeaderLabels(headers)
+        for i, cells in enumerate(rows):
+            for col, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                item.setTextAlignment(Qt.AlignCenter)
+                if col > 0 and self._installed_nvidia.get(cells[0]) == text:
+                    item.setForeground(QColor(0, 128, 0))
+                    item.setToolTip("Installed")
+                self.metapackage_table.setItem(i, col, item)
+
+        self.metapackage_table.resizeColumnsToContents()
 
 
 if __name__ == "__main__":
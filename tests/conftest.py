@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compatibility_data import CompatibilityData
+from compatibility_engine import CompatibilityEngine
+
+
+@pytest.fixture(scope="session")
+def data():
+    return CompatibilityData()
+
+
+@pytest.fixture
+def engine(data):
+    # A fresh engine per test, so cache and narrowing state don't leak
+    return CompatibilityEngine(data)
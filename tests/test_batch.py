@@ -0,0 +1,90 @@
+import io
+import json
+
+import pytest
+
+import compatibility_batch
+from compatibility_batch import read_specs, resolve_batch, spec_to_filters, write_batch
+from compatibility_engine import Filters
+
+
+def _records(specs, **kwargs):
+    return [json.loads(line) for line in resolve_batch(specs, **kwargs)]
+
+
+def _specs(*specs):
+    return [(number, spec, None) for number, spec in enumerate(specs, 1)]
+
+
+def test_records_follow_input_order(engine):
+    specs = _specs({"torch": "2.9.1"}, {"python": "3.12", "cuda": "12.8"}, {"torch": "2.8.0"})
+    records = _records(specs, processes=1)
+    assert [record["line"] for record in records] == [1, 2, 3]
+    for record, (_, spec, _) in zip(records, specs):
+        rows = engine.resolve(Filters.from_selection(**spec))
+        assert record["spec"] == spec
+        assert record["matches"] == len(rows)
+        assert record["combinations"] == [row.as_json() for row in rows]
+
+
+def test_identical_specs_resolve_once(monkeypatch):
+    calls = []
+    resolve = compatibility_batch._resolve
+    monkeypatch.setattr(compatibility_batch, "_resolve", lambda filters: calls.append(filters) or resolve(filters))
+    # The same selection spelled three ways, and a different one in between
+    specs = _specs({"torch": "2.9.1"}, {"python": "3.12"}, {"torch": "2.9.1", "python": None},
+                   {"torch": "2.9.1", "windows_only": "no"})
+    records = _records(specs, processes=1)
+    assert len(calls) == 2
+    assert records[0]["combinations"] == records[2]["combinations"] == records[3]["combinations"]
+    assert records[1]["matches"] != records[0]["matches"]
+
+
+def test_errors_keep_their_place():
+    specs = [(1, {"torch": "2.9.1"}, None), (2, None, "invalid JSON: x"), (3, {"cudnn": "9"}, None),
+             (4, {"torch": ">=2.8,~=3"}, None), (5, {"torch": "2.8.0"}, None)]
+    records = _records(specs, processes=1)
+    assert [record["line"] for record in records] == [1, 2, 3, 4, 5]
+    assert records[1] == {"line": 2, "spec": None, "error": "invalid JSON: x"}
+    assert records[2]["error"] == "unknown filter 'cudnn'"
+    assert "error" in records[3]
+    assert records[0]["matches"] and records[4]["matches"]
+
+
+def test_pool_matches_inline(monkeypatch):
+    specs = _specs(*({"torch": torch, "python": python} for torch in ("2.9.1", "2.8.0", "2.7.1")
+                     for python in ("3.10", "3.11", "3.12", "3.13")))
+    inline = _records(specs, processes=1)
+    monkeypatch.setattr(compatibility_batch, "INLINE_LIMIT", 0)
+    monkeypatch.setattr(compatibility_batch, "BATCH_CHUNK_SIZE", 2)
+    assert _records(specs, processes=2) == inline
+
+
+def test_spec_values():
+    assert spec_to_filters({"python": 3.12, "bnb": ["0.49.2", "0.49.1"], "windows_only": "True"}) == \
+        Filters.from_selection(python="3.12", bnb="0.49.2|0.49.1", windows_only=True)
+    with pytest.raises(ValueError):
+        spec_to_filters({"pytorch": "2.9.1"})
+    with pytest.raises(ValueError):
+        spec_to_filters({"windows_only": ["false"]})
+
+
+def test_read_specs(tmp_path):
+    jsonl = tmp_path / "specs.jsonl"
+    jsonl.write_text('{"torch": "2.9.1"}\n\n[1]\n{oops\n', encoding="utf-8")
+    read = list(read_specs(str(jsonl)))
+    assert read[0] == (1, {"torch": "2.9.1"}, None)
+    assert read[1] == (3, None, "spec must be a JSON object")
+    assert read[2][0] == 4 and read[2][2].startswith("invalid JSON")
+
+    csv = tmp_path / "specs.csv"
+    csv.write_text("torch,python\n2.9.1,3.12\n,3.11\n", encoding="utf-8")
+    assert list(read_specs(str(csv))) == [(2, {"torch": "2.9.1", "python": "3.12"}, None),
+                                          (3, {"torch": "", "python": "3.11"}, None)]
+
+
+def test_write_batch_chunks(monkeypatch):
+    monkeypatch.setattr(compatibility_batch, "WRITE_EVERY", 2)
+    out = io.StringIO()
+    write_batch(iter(["a", "b", "c"]), out)
+    assert out.getvalue() == "a\nb\nc\n"
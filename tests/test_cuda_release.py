@@ -0,0 +1,83 @@
+import io
+import json
+import random
+
+import pytest
+
+from torch_cuda_checker import main
+
+
+def brute_force(data, components):
+    # Every release scored against every component, then ranked
+    results = []
+    for cuda, packages in data.cuda_metapackages.items():
+        matched = tuple(name for name, version in components.items() if packages.get(name) == version)
+        if not matched:
+            continue
+        mismatched = tuple((name, version, packages[name]) for name, version in components.items()
+                           if name in packages and packages[name] != version)
+        results.append((cuda, matched, mismatched))
+    results.sort(key=lambda m: (len(m[1]), -len(m[2]), m[0].key), reverse=True)
+    return results
+
+
+def component_sets(data, count=200, seed=0):
+    # Whole releases, then components drawn from two releases at a time,
+    # sometimes with a version no release has
+    releases = list(data.cuda_metapackages.values())
+    sets = [dict(packages) for packages in releases]
+    rnd = random.Random(seed)
+    for _ in range(count):
+        first, second = rnd.sample(releases, 2)
+        components = {}
+        for name in rnd.sample(sorted(first), rnd.randint(1, len(first))):
+            source = second if name in second and rnd.random() < 0.3 else first
+            components[name] = source[name] if rnd.random() < 0.9 else "0.0.1"
+        sets.append(components)
+    return sets
+
+
+def test_matches_brute_force(data, engine):
+    for components in component_sets(data):
+        found = [(m.cuda, m.matched, m.mismatched) for m in engine.match_cuda_release(components)]
+        assert found == brute_force(data, components), components
+
+
+def test_a_whole_release_ranks_first(data, engine):
+    for cuda, packages in data.cuda_metapackages.items():
+        best = engine.match_cuda_release(packages)[0]
+        assert best.cuda == cuda and best.mismatched == ()
+
+
+def test_unknown_components(engine):
+    assert engine.match_cuda_release({}) == []
+    assert engine.match_cuda_release({"cublas": "0.0.1", "not-a-library": "12.8.4.1"}) == []
+
+
+def _run(*argv):
+    out = io.StringIO()
+    return main(["cuda-release", *argv], out=out), out.getvalue()
+
+
+def test_cli_normalizes_component_names(data):
+    packages = data.cuda_metapackages["12.8.1"]
+    status, text = _run(f"nvidia-cublas-cu12=={packages['cublas']}",
+                        f"NVIDIA_CUDA_RUNTIME_CU12={packages['cuda-runtime']}", "--format", "json")
+    records = json.loads(text)
+    assert status == 0
+    assert sorted(records[0]["matched"]) == ["cublas", "cuda-runtime"]
+    assert records[0]["cuda"].startswith("12.8")
+
+
+def test_cli_reports_disagreeing_components(data):
+    packages = data.cuda_metapackages["12.8.1"]
+    status, text = _run(f"cublas=={packages['cublas']}", f"nvjitlink=={packages['nvjitlink']}", "cufft==0.0.1",
+                        "--format", "json")
+    assert status == 1
+    best = json.loads(text)[0]
+    assert {"component": "cufft", "installed": "0.0.1", "expected": packages["cufft"]} in best["mismatched"]
+
+
+@pytest.mark.parametrize("argument", ["cublas", "==12.8.4.1", "cublas=="])
+def test_cli_rejects_malformed_pins(argument):
+    assert _run(argument)[0] == 2
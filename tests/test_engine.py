@@ -0,0 +1,210 @@
+import random
+
+import pytest
+
+from compatibility_data import CompatibilityData
+from compatibility_engine import CompatibilityEngine, Filters, ResultCache
+
+
+def baseline_rows(data, torch=None, python=None, cuda=None, fa2=None, xformers=None, triton=None, bnb=None,
+                  windows_only=False):
+    # The GUI's original update_compatibility loop over the loaded tables,
+    # returning the cells of every row
+    def family(version):
+        return ".".join(version.split(".")[:2])
+
+    def xf_torch_match(xf, torch_ver):
+        if xf.torch_min:
+            return tuple(int(p) for p in torch_ver.split(".")) >= tuple(int(p) for p in xf.torch.split("."))
+        return xf.torch == torch_ver
+
+    rows = []
+    for tc in data.torch_cuda:
+        if torch and tc.torch != torch:
+            continue
+        if cuda and family(cuda) != family(tc.cuda):
+            continue
+        if windows_only and not tc.windows:
+            continue
+        cuda_short = family(tc.cuda)
+        for pt in data.torch_python_triton:
+            if pt.torch != tc.torch or cuda_short not in pt.cuda_versions:
+                continue
+            if triton and triton not in pt.triton_compat:
+                continue
+            for py_ver in pt.python:
+                if python and py_ver != python:
+                    continue
+                fa2_compat = [x for x in data.flash_attention
+                              if x.torch == tc.torch and x.python == py_ver and x.cuda == tc.cuda]
+                fa2_versions = sorted({x.fa2 + ("*" if x.assumed else "") for x in fa2_compat}, reverse=True)
+                if fa2 and not any(x.fa2 == fa2 for x in fa2_compat):
+                    continue
+
+                xf_exact = [x for x in data.xformers if xf_torch_match(x, tc.torch) and tc.cuda in x.cuda]
+                xf_patch = [] if xf_exact else [x for x in data.xformers if xf_torch_match(x, tc.torch)
+                                                and any(family(c) == cuda_short for c in x.cuda)]
+                xf_versions = [x.xformers for x in xf_exact] or [x.xformers + "~" for x in xf_patch]
+                if xformers and xformers not in [v.rstrip("~") for v in xf_versions]:
+                    continue
+
+                bnb_versions = []
+                for release in data.bitsandbytes:
+                    if py_ver not in release.python:
+                        continue
+                    if tc.cuda in release.cuda:
+                        bnb_versions.append(release.bnb + ("*" if tc.cuda in release.assumed_cuda else ""))
+                    elif any(family(c) == cuda_short for c in release.cuda):
+                        bnb_versions.append(release.bnb + "~")
+                if bnb and bnb not in [v.replace("*", "").rstrip("~") for v in bnb_versions]:
+                    continue
+
+                ecosystem = data.torch_ecosystem.get(tc.torch, {})
+                triton_cell = (f"{', '.join(pt.triton_compat)} (pin: {pt.triton})" if len(pt.triton_compat) > 1
+                               else pt.triton)
+                rows.append([tc.torch, ecosystem.get("torchvision", "-"), ecosystem.get("torchaudio", "-"),
+                             py_ver, cuda_short, tc.cuda, tc.cudnn, triton_cell,
+                             ", ".join(fa2_versions) or "-", ", ".join(xf_versions) or "-",
+                             ", ".join(bnb_versions) or "-", "Yes" if tc.windows else "No (cuDNN)"])
+    return rows
+
+
+def filter_values(data):
+    return {
+        "torch": sorted({tc.torch for tc in data.torch_cuda}),
+        "python": sorted({py for pt in data.torch_python_triton for py in pt.python}),
+        "cuda": sorted({tc.cuda for tc in data.torch_cuda} | set(data.cuda_metapackages)),
+        "fa2": sorted({x.fa2 for x in data.flash_attention}),
+        "xformers": [x.xformers for x in data.xformers],
+        "triton": sorted({t for pt in data.torch_python_triton for t in pt.triton_compat}),
+        "bnb": [x.bnb for x in data.bitsandbytes],
+    }
+
+
+def sample_selections(data, count=300, seed=0):
+    # Every single filter value, then random pairs and triples
+    values = filter_values(data)
+    selections = [{}]
+    for field, options in values.items():
+        selections.extend({field: value} for value in options)
+    rnd = random.Random(seed)
+    for _ in range(count):
+        fields = rnd.sample(sorted(values), rnd.choice((2, 3)))
+        selections.append({field: rnd.choice(values[field]) for field in fields})
+    return [dict(selection, windows_only=windows_only)
+            for selection in selections for windows_only in (False, True)]
+
+
+def test_engine_matches_baseline(data, engine):
+    for selection in sample_selections(data):
+        expected = baseline_rows(data, **selection)
+        found = [row.display_cells() for row in engine.query(Filters.from_selection(**selection)).combinations]
+        assert found == expected, selection
+
+
+@pytest.mark.parametrize("cuda", ["12.8", "12.8.0", "12.8.1"])
+def test_cuda_filter_matches_family(engine, cuda):
+    rows = engine.resolve(Filters.from_selection(cuda=cuda))
+    assert rows and {row.cuda_family for row in rows} == {"12.8"}
+
+
+def test_windows_only(engine):
+    everything = engine.resolve(Filters())
+    windows = engine.resolve(Filters(windows_only=True))
+    assert list(windows) == [row for row in everything if row.windows]
+    assert len(windows) < len(everything)
+
+
+def test_combination_json(engine):
+    row = engine.first(Filters.from_selection(torch="2.9.1", python="3.12", cuda="12.8"))
+    document = row.as_json()
+    assert document["torch"] == "2.9.1" and document["python"] == "3.12" and document["cuda_family"] == "12.8"
+    assert document["fa2"] == list(row.fa2_versions)
+
+
+def test_resolve_and_iter_combinations_agree(data, engine):
+    for selection in sample_selections(data, count=40)[::7]:
+        filters = Filters.from_selection(**selection)
+        rows = engine.resolve(filters)
+        assert list(engine.iter_combinations(filters)) == list(rows)
+        assert list(CompatibilityEngine(data).iter_combinations(filters, limit=3)) == list(rows[:3])
+        assert CompatibilityEngine(data).first(filters) == (rows[0] if rows else None)
+    with pytest.raises(ValueError):
+        engine.iter_combinations(Filters(), limit=-1)
+
+
+def test_narrowing_matches_fresh_queries(data, engine):
+    # Drill down one filter at a time, back out, and switch values; every
+    # step must match what an engine without history resolves
+    steps = [{}, {"torch": "2.9.1"}, {"torch": "2.9.1", "python": "3.12"},
+             {"torch": "2.9.1", "python": "3.12", "windows_only": True},
+             {"torch": "2.9.1", "python": "3.12", "windows_only": True, "cuda": "12.8"},
+             {"torch": "2.9.1", "python": "3.12"}, {"torch": "2.8.0", "python": "3.12"},
+             {"python": ">=3.11", "bnb": "0.49.2"}, {"python": ">=3.11", "bnb": "0.49.2", "torch": "2.9.1|2.8.0"}]
+    for selection in steps:
+        filters = Filters.from_selection(**selection)
+        assert engine.query(filters).combinations == CompatibilityEngine(data).query(filters).combinations
+
+
+def test_narrow_only_tightens(engine):
+    matrix = engine.matrix
+    base = Filters.from_selection(torch="2.9.1")
+    mask = matrix.mask_for(base)
+    tighter = Filters.from_selection(torch="2.9.1", python="3.12", windows_only=True)
+    assert matrix.narrow(base, mask, tighter) == matrix.mask_for(tighter)
+    assert matrix.narrow(base, mask, Filters.from_selection(torch="2.8.0")) is None
+    assert matrix.narrow(tighter, matrix.mask_for(tighter), base) is None
+
+
+def test_result_cache_hits(engine):
+    filters = Filters.from_selection(python="3.12")
+    first = engine.query(filters)
+    engine.query(Filters())
+    assert engine.query(filters) is first
+    assert engine.cache.hits == 1
+
+
+def test_reload_drops_cached_views():
+    data = CompatibilityData()
+    engine = CompatibilityEngine(data)
+    filters = Filters.from_selection(torch="2.9.1")
+    view = engine.query(filters)
+    matrix = engine.matrix
+    data.load()
+    assert engine.query(filters) is not view
+    assert engine.matrix is not matrix
+    assert engine.query(filters).combinations == view.combinations
+
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert len(cache) == 2
+
+
+@pytest.mark.parametrize("selection", [{}, {"torch": "2.9.1"}, {"python": "3.12", "windows_only": True},
+                                       {"cuda": "12.8", "bnb": "0.49.2"}, {"torch": ">=2.8", "fa2": "2.8.3"}])
+def test_facet_counts_match_brute_force(data, engine, selection):
+    # Each facet value counts the rows with that value switched in for the
+    # facet's own selection
+    facets = engine.query(Filters.from_selection(**selection)).facets
+    values = filter_values(data)
+    values["cuda"] = sorted({tc.cuda.family for tc in data.torch_cuda})
+    for field, options in values.items():
+        for value in options:
+            switched = dict(selection, **{field: value})
+            expected = len(engine.resolve(Filters.from_selection(**switched)))
+            assert engine.facet_count(facets, field, value) == expected, (field, value)
+    for windows_only in (False, True):
+        switched = dict(selection, windows_only=windows_only)
+        assert facets["windows_only"][windows_only] == len(engine.resolve(Filters.from_selection(**switched)))
+
+
+def test_facet_count_of_a_full_cuda_version(engine):
+    facets = engine.query(Filters()).facets
+    assert engine.facet_count(facets, "cuda", "12.8.1") == engine.facet_count(facets, "cuda", "12.8") > 0
+    assert engine.facet_count(facets, "cuda", "not a version") == 0
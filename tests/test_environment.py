@@ -0,0 +1,169 @@
+import os
+
+import pytest
+
+from compatibility_environment import (InstalledEnvironment, audit_environments, check_environment,
+                                       environment_filters, find_environments, nvidia_component, scan_environment,
+                                       scan_prefix, torch_cuda_family)
+
+# A stack the data lists: torch 2.9.1 for CUDA 12.8 on python 3.12
+STACK = {"torch": "2.9.1+cu128", "torchvision": "0.24.1+cu128", "torchaudio": "2.9.1+cu128",
+         "triton-windows": "3.5.1.post21", "xformers": "0.0.33.post2", "bitsandbytes": "0.49.2",
+         "flash-attn": "2.8.3", "sympy": "1.14.0"}
+NVIDIA = {"cudnn": "9.10.2.21", "cuda-runtime": "12.8.90"}
+
+
+def install(site, directory, version, metadata="METADATA"):
+    path = site / directory
+    path.mkdir(parents=True)
+    (path / metadata).write_text(f"Metadata-Version: 2.1\nName: x\nVersion: {version}\n\nVersion: 0\n",
+                                 encoding="utf-8")
+
+
+def environment(packages=None, nvidia=None, python="3.12"):
+    return InstalledEnvironment(python, dict(STACK if packages is None else packages),
+                                dict(NVIDIA if nvidia is None else nvidia), ())
+
+
+def test_scan_reads_every_spelling(tmp_path):
+    site = tmp_path / "lib" / "python3.12" / "site-packages"
+    install(site, "torch-2.9.1+cu128.dist-info", "2.9.1+cu128")
+    install(site, "flash_attn-2.8.3.dist-info", "2.8.3")
+    install(site, "Triton_Windows-3.5.1.post21.dist-info", "3.5.1.post21")
+    install(site, "sympy.egg-info", "1.14.0", metadata="PKG-INFO")
+    install(site, "nvidia_cublas_cu12-12.8.4.1.dist-info", "12.8.4.1")
+    install(site, "nvidia_cuda_runtime_cu12-12.8.90.dist-info", "12.8.90")
+    install(site, "numpy-2.3.0.dist-info", "2.3.0")
+    (site / "torchvision").mkdir()
+    env = scan_environment([str(site)])
+    assert env.python == "3.12"
+    assert env.packages == {"torch": "2.9.1+cu128", "flash-attn": "2.8.3", "triton-windows": "3.5.1.post21",
+                            "sympy": "1.14.0"}
+    assert env.nvidia == {"cublas": "12.8.4.1", "cuda-runtime": "12.8.90"}
+
+
+def test_first_site_directory_wins(tmp_path):
+    install(tmp_path / "a", "torch-2.9.1.dist-info", "2.9.1")
+    install(tmp_path / "b", "torch-2.8.0.dist-info", "2.8.0")
+    install(tmp_path / "b", "xformers-0.0.32.dist-info", "0.0.32")
+    env = scan_environment([str(tmp_path / "a"), str(tmp_path / "missing"), str(tmp_path / "b")], python="3.11")
+    assert env.packages == {"torch": "2.9.1", "xformers": "0.0.32"}
+    assert env.python == "3.11"
+
+
+def test_nvidia_component():
+    assert nvidia_component("nvidia-cublas-cu12") == "cublas"
+    assert nvidia_component("nvidia-cuda-runtime-cu12") == "cuda-runtime"
+    assert nvidia_component("nvidia-nvtx") == "nvtx"
+
+
+@pytest.mark.parametrize("torch, nvidia, family", [("2.9.1+cu128", {}, "12.8"), ("2.9.1+cu130", {}, "13.0"),
+                                                   ("2.9.1+cpu", {}, "cpu"),
+                                                   ("2.9.1", {"cuda-runtime": "12.8.90"}, "12.8"),
+                                                   ("2.9.1", {}, None)])
+def test_torch_cuda_family(torch, nvidia, family):
+    assert torch_cuda_family(environment({"torch": torch}, nvidia)) == family
+
+
+def test_environment_filters():
+    selected = environment_filters(environment())
+    assert selected == {"torch": "2.9.1", "python": "3.12", "cuda": "12.8", "fa2": "2.8.3",
+                        "xformers": "0.0.33.post2", "triton": "3.5.1", "bnb": "0.49.2"}
+    assert environment_filters(environment({}, {}, python=None)) == dict.fromkeys(selected, "Any")
+
+
+def test_compatible_stack(engine):
+    assert check_environment(engine, environment(), "windows") == []
+    assert check_environment(engine, environment(), "linux") == []
+
+
+@pytest.mark.parametrize("package, version", [("torchvision", "0.23.0"), ("bitsandbytes", "0.1.0"),
+                                              ("xformers", "0.0.28"), ("sympy", "1.12")])
+def test_mismatched_package(engine, package, version):
+    mismatches = check_environment(engine, environment(dict(STACK, **{package: version})), "linux")
+    assert [(m.package, m.installed) for m in mismatches] == [(package, version)]
+
+
+def test_flash_attention_is_checked_on_windows_only(engine):
+    env = environment(dict(STACK, **{"flash-attn": "2.0.0"}))
+    assert check_environment(engine, env, "linux") == []
+    assert [m.package for m in check_environment(engine, env, "windows")] == ["flash-attn"]
+
+
+def test_cudnn_mismatch(engine):
+    mismatches = check_environment(engine, environment(nvidia={"cudnn": "9.1.0.70"}), "linux")
+    assert [m.package for m in mismatches] == ["nvidia-cudnn"]
+
+
+@pytest.mark.parametrize("packages, problem", [({}, "torch is not installed"),
+                                               ({"torch": "0.4.0"}, "not in the compatibility data"),
+                                               ({"torch": "2.9.1+cpu"}, "not a CUDA build"),
+                                               ({"torch": "2.9.1+cu101"}, "has no CUDA 10.1 build")])
+def test_unusable_torch(engine, packages, problem):
+    [mismatch] = check_environment(engine, environment(packages, {}), "linux")
+    assert mismatch.package == "torch" and problem in mismatch.problem
+
+
+def test_unknown_cuda_build_is_reported_but_checked(engine):
+    mismatches = check_environment(engine, environment(dict(STACK, torch="2.9.1"), {}), "linux")
+    assert [m.problem for m in mismatches] == ["cannot tell which CUDA version torch was built for"]
+
+
+def test_python_without_a_build(engine):
+    mismatches = check_environment(engine, environment(python="3.8"), "linux")
+    assert [m.package for m in mismatches] == ["python"]
+
+
+@pytest.fixture
+def environments(tmp_path):
+    # A venv, a Windows-layout virtualenv, a conda base with one named
+    # environment, and a directory that is none of those
+    venv = tmp_path / "venv"
+    (venv / "lib" / "python3.12" / "site-packages").mkdir(parents=True)
+    (venv / "pyvenv.cfg").write_text("home = /usr/bin\nversion = 3.12.3\n", encoding="utf-8")
+    for name, version in STACK.items():
+        install(venv / "lib" / "python3.12" / "site-packages", f"{name}-{version}.dist-info", version)
+
+    windows = tmp_path / "winenv"
+    install(windows / "Lib" / "site-packages", "torch-2.9.1+cpu.dist-info", "2.9.1+cpu")
+    (windows / "pyvenv.cfg").write_text("version_info = 3.11.9.final.0\n", encoding="utf-8")
+
+    conda = tmp_path / "conda"
+    (conda / "conda-meta").mkdir(parents=True)
+    named = conda / "envs" / "ml"
+    (named / "conda-meta").mkdir(parents=True)
+    install(named / "lib" / "python3.13" / "site-packages", "torch-2.9.1+cu128.dist-info", "2.9.1+cu128")
+
+    (tmp_path / "notes").mkdir()
+    return tmp_path
+
+
+def test_find_environments(environments):
+    root = str(environments)
+    assert find_environments(root) == [str(environments / "conda"), str(environments / "conda" / "envs" / "ml"),
+                                       str(environments / "venv"), str(environments / "winenv")]
+    assert find_environments(str(environments / "venv")) == [str(environments / "venv")]
+    assert find_environments(str(environments / "notes")) == []
+
+
+def test_scan_prefix_reads_the_python_version(environments):
+    assert scan_prefix(str(environments / "venv")).python == "3.12"
+    assert scan_prefix(str(environments / "winenv")).python == "3.11"
+    assert scan_prefix(str(environments / "conda" / "envs" / "ml")).python == "3.13"
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_audit_keeps_prefix_order(engine, environments, workers):
+    prefixes = find_environments(str(environments))
+    results = list(audit_environments(engine, prefixes, workers, platform="windows"))
+    assert [prefix for prefix, _, _ in results] == prefixes
+    problems = {os.path.basename(prefix): [m.problem for m in mismatches] for prefix, _, mismatches in results}
+    assert problems["venv"] == []
+    assert problems["conda"] == ["torch is not installed"]
+    assert "not a CUDA build" in problems["winenv"][0]
+    assert problems["ml"] == []
+
+
+def test_audit_needs_a_worker(engine, environments):
+    with pytest.raises(ValueError):
+        list(audit_environments(engine, [str(environments / "venv")], 0))
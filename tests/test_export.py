@@ -0,0 +1,150 @@
+import csv
+import io
+import json
+from html.parser import HTMLParser
+
+import pytest
+
+import compatibility_export
+from compatibility_engine import COMBINATION_HEADERS, Filters
+from compatibility_export import (EXPORT_FORMATS, NO_COMBINATIONS, NO_METAPACKAGES, REPORT_TITLE, export_report,
+                                  format_ascii_table)
+
+SELECTION = {"torch": "2.9.1", "python": "3.12"}
+LABELS = [("torch", "2.9.1"), ("python", "3.12"), ("windows_only", "No")]
+
+
+def _export(engine, fmt, **kwargs):
+    filters = Filters.from_selection(**SELECTION)
+    out = io.StringIO()
+    count = export_report(out, fmt, engine.iter_combinations(filters), engine.metapackage_view(filters.cuda),
+                          LABELS, **kwargs)
+    return count, out.getvalue()
+
+
+class _Tables(HTMLParser):
+    # Cell text of every <table>, row by row
+    def __init__(self):
+        super().__init__()
+        self.tables = []
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self.tables.append([])
+        elif tag == "tr":
+            self.tables[-1].append([])
+        elif tag in ("td", "th"):
+            self._cell = ""
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th"):
+            self.tables[-1][-1].append(self._cell)
+            self._cell = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell += data
+
+
+@pytest.fixture
+def rows(engine):
+    return [row.display_cells() for row in engine.resolve(Filters.from_selection(**SELECTION))]
+
+
+@pytest.mark.parametrize("fmt", EXPORT_FORMATS)
+def test_every_format_counts_the_rows(engine, rows, fmt):
+    count, text = _export(engine, fmt)
+    assert count == len(rows) > 0
+    assert text.endswith("\n")
+
+
+def test_ascii(engine, rows):
+    _, text = _export(engine, "ascii")
+    assert text.startswith(REPORT_TITLE + "\n")
+    assert "  torch: 2.9.1\n" in text
+    assert format_ascii_table(COMBINATION_HEADERS, rows) in text
+    assert "\nCUDA Metapackages\n" in text
+
+
+def test_ascii_with_known_widths_streams_the_same_table(engine, rows):
+    widths = [len(text) for text in engine.matrix.longest_cells()]
+    _, text = _export(engine, "ascii", widths=widths)
+    table = "\n".join(compatibility_export.iter_ascii_table(COMBINATION_HEADERS, rows, widths))
+    assert table in text
+
+
+def test_markdown(engine, rows):
+    _, text = _export(engine, "md")
+    assert text.startswith(f"# {REPORT_TITLE}\n")
+    assert "- **torch:** 2.9.1" in text
+    header = "| " + " | ".join(COMBINATION_HEADERS) + " |"
+    lines = text.splitlines()
+    start = lines.index(header)
+    assert lines[start + 2:start + 2 + len(rows)] == ["| " + " | ".join(row) + " |" for row in rows]
+
+
+def test_markdown_escapes_pipes():
+    out = io.StringIO()
+    export_report(out, "md", iter(()), None, [("torch", ">=2.8|==2.7.1")])
+    assert "- **torch:** >=2.8\\|==2.7.1" in out.getvalue()
+    assert NO_COMBINATIONS in out.getvalue() and NO_METAPACKAGES in out.getvalue()
+
+
+def test_html(engine, rows):
+    _, text = _export(engine, "html")
+    assert text.startswith("<!DOCTYPE html>") and text.endswith("</body></html>\n")
+    parser = _Tables()
+    parser.feed(text)
+    combinations, metapackages = parser.tables
+    assert combinations == [COMBINATION_HEADERS] + rows
+    assert metapackages[0][0] == "Package"
+
+
+def test_html_escapes():
+    out = io.StringIO()
+    export_report(out, "html", iter(()), None, [("torch", "<2.8")])
+    assert "&lt;2.8" in out.getvalue() and "<2.8" not in out.getvalue()
+
+
+def test_csv(engine, rows, monkeypatch):
+    monkeypatch.setattr(compatibility_export, "EXPORT_CHUNK_ROWS", 2)
+    _, text = _export(engine, "csv")
+    assert list(csv.reader(io.StringIO(text))) == [COMBINATION_HEADERS] + rows
+
+
+def test_jsonl(engine):
+    filters = Filters.from_selection(**SELECTION)
+    _, text = _export(engine, "jsonl")
+    records = [json.loads(line) for line in text.splitlines()]
+    assert records[0] == {"type": "filters", "filters": dict(LABELS)}
+    combinations = [record for record in records if record["type"] == "combination"]
+    assert combinations == [{"type": "combination", **row.as_json()} for row in engine.resolve(filters)]
+    metapackages = [record for record in records if record["type"] == "metapackage"]
+    assert metapackages and len(combinations) + len(metapackages) + 1 == len(records)
+
+
+def test_metapackage_columns_follow_the_exported_combinations(engine):
+    filters = Filters.from_selection(**SELECTION)
+    cudas = {row.cuda for row in engine.resolve(filters)}
+    _, text = _export(engine, "html")
+    parser = _Tables()
+    parser.feed(text)
+    headers = parser.tables[1][0]
+    assert set(headers[1:]) == cudas & set(engine.data.cuda_metapackages)
+
+
+def test_writes_are_chunked(engine, rows, monkeypatch):
+    monkeypatch.setattr(compatibility_export, "EXPORT_CHUNK_ROWS", 4)
+    writes = []
+
+    class Recorder(io.StringIO):
+        def write(self, text):
+            writes.append(text)
+            return super().write(text)
+
+    filters = Filters.from_selection(**SELECTION)
+    export_report(Recorder(), "md", engine.iter_combinations(filters))
+    # Title section, then the table (header, rule and rows) in chunks of four
+    # lines, then the metapackage heading and its placeholder
+    assert len(writes) == 1 + -(-(len(rows) + 2) // 4) + 2
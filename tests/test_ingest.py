@@ -0,0 +1,135 @@
+import json
+import os
+
+import pytest
+
+from compatibility_data import DATA_PATH
+from compatibility_ingest import (_parse_job, apply_facts, dump_document, expand_matrix, parse_bitsandbytes,
+                                  parse_fa2_windows, parse_torch_matrix, parse_yaml, workflow_matrices)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture
+def workflow():
+    return parse_yaml(_fixture("build-wheels.yml"))
+
+
+def test_flow_and_block_sequences(workflow):
+    matrix = workflow_matrices(workflow)["build"]
+    assert matrix["os"] == ["windows-2022"]
+    # A flow sequence over several lines, with a comment inside
+    assert matrix["pyver"] == ["3.10", "3.11", "3.12"]
+    # Block sequence items, double and single quoted
+    assert matrix["cuda"] == ["12.4.1", "12.8.1"]
+    assert workflow["on"] == {"push": {"tags": ["v*"]}}
+
+
+def test_scalars_stay_strings(workflow):
+    assert workflow["jobs"]["build"]["strategy"]["fail-fast"] == "false"
+    assert workflow["jobs"]["build"]["runs-on"] == "${{ matrix.os }}"
+
+
+def test_run_block_body_is_skipped(workflow):
+    # The script's "- this line: ..." and "matrix: [...]" lines are not YAML
+    steps = workflow["jobs"]["build"]["steps"]
+    assert [step.get("name") for step in steps] == [None, "Build", "Upload"]
+    assert steps[1] == {"name": "Build", "run": None, "shell": "bash"}
+    assert steps[2]["with"] == {"name": "wheels-${{ matrix.pyver }}", "path": "dist/*.whl"}
+    assert workflow["jobs"]["publish"]["steps"] == [{"run": "echo done"}]
+
+
+def test_value_on_the_line_after_its_key():
+    document = parse_yaml("jobs:\n  build-cuda:\n    strategy:\n      matrix:\n        cuda_version:\n"
+                          "          [\"12.6.3\", \"12.8.1\",\n           \"13.0.1\"]\n    steps:\n"
+                          "      - run: >-\n          folded\n          text\n      - run: make\n")
+    assert workflow_matrices(document) == {"build-cuda": {"cuda_version": ["12.6.3", "12.8.1", "13.0.1"]}}
+    assert document["jobs"]["build-cuda"]["steps"] == [{"run": None}, {"run": "make"}]
+
+
+def test_expand_matrix_exclude_and_include(workflow):
+    combos = expand_matrix(workflow_matrices(workflow)["build"])
+    pairs = {(combo["cuda"], combo["torch"]) for combo in combos}
+    # exclude removes the cu124 builds of torch 2.7.0
+    assert pairs == {("12.4.1", "2.6.0"), ("12.8.1", "2.6.0"), ("12.8.1", "2.7.0")}
+    # An include matching existing combinations extends them
+    extended = [combo for combo in combos if combo.get("cxx11_abi")]
+    assert sorted(combo["pyver"] for combo in extended) == ["3.10", "3.11", "3.12"]
+    assert all(combo["torch"] == "2.7.0" for combo in extended)
+    # One that matches none is added as a new combination
+    assert {"os": "windows-2022", "pyver": "3.13", "cuda": "12.8.1", "torch": "2.7.0"} in combos
+    assert len(combos) == 10
+
+
+def test_expand_matrix_include_only():
+    assert expand_matrix({"include": [{"a": "1"}, {"a": "2", "b": "x"}]}) == [{"a": "1"}, {"a": "2", "b": "x"}]
+
+
+def test_parse_fa2_windows():
+    facts = parse_fa2_windows("2.8.3", "fa2_windows_build-wheels_v2.8.3.yml", _fixture("build-wheels.yml"))
+    assert facts == {"wheels": {"cu124 2.6.0": ["3.10", "3.11", "3.12"],
+                                "cu128 2.6.0": ["3.10", "3.11", "3.12"],
+                                "cu128 2.7.0": ["3.10", "3.11", "3.12", "3.13"]}}
+
+
+def test_parse_bitsandbytes_rejects_missing_matrix():
+    with pytest.raises(ValueError):
+        parse_bitsandbytes("0.49.2", "bnb_python-package_0.49.2.yml", "jobs:\n  lint:\n    runs-on: x\n")
+
+
+@pytest.mark.parametrize("text", ["- a\n- b\n", "jobs:\n  - build\n", "jobs:\n  build:\n    strategy:\n"
+                                  "      matrix:\n        include: [a]\n"])
+def test_malformed_workflow(text):
+    with pytest.raises(ValueError):
+        parse_bitsandbytes("0.49.2", "bnb_python-package_0.49.2.yml", text)
+
+
+def test_expand_matrix_rejects_entries_that_are_not_mappings():
+    with pytest.raises(ValueError):
+        expand_matrix({"a": ["1"], "exclude": ["a"]})
+    with pytest.raises(ValueError):
+        expand_matrix({"include": {"a": "1"}})
+
+
+@pytest.mark.parametrize("filename, text", [("m.json", '["x"]'), ("m.json", '{"include": 3}'),
+                                            ("m.json", '{"include": ["x"]}'), ("m.py", "CUDA_ARCHES = 3\n")])
+def test_malformed_torch_matrix(filename, text):
+    with pytest.raises(ValueError):
+        parse_torch_matrix("2.9.1", filename, text)
+    # The ingest run records it as that file's error
+    key, facts, error = _parse_job(("k", "torch", "2.9.1", filename, text))
+    assert facts is None and error.startswith(f"{filename}: ")
+
+
+@pytest.fixture
+def document():
+    with open(DATA_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_dump_document_round_trip(document):
+    with open(DATA_PATH, encoding="utf-8") as f:
+        assert dump_document(document) == f.read()
+
+
+def test_torch_without_triton_pin_is_left_out(document):
+    builds = {"family": "12.8", "cuda": "12.8.1", "cudnn": "9.10.2.21"}
+    facts = {("torch", "9.0.0"): {"python": ["3.12"], "triton": None, "builds": {"cu128": builds}}}
+    updated, warnings, changed = apply_facts(document, facts)
+    assert changed == []
+    assert not any(row["torch"] == "9.0.0" for row in updated["torch_cuda"])
+    assert any("torch_ecosystem" in warning for warning in warnings)
+
+
+def test_bitsandbytes_older_than_known_rows(document):
+    oldest = min(document["bitsandbytes"], key=lambda row: tuple(map(int, row["bnb"].split("."))))
+    updated, warnings, changed = apply_facts(document, {("bitsandbytes", "0.1.0"): {"cuda": ["11.8.0"]}})
+    assert changed == ["bitsandbytes"]
+    row = updated["bitsandbytes"][-1]
+    assert row["bnb"] == "0.1.0" and row["python"] == oldest["python"]
+    assert warnings
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+from compatibility_engine import Filters
+from compatibility_install import (LOCKFILE_FORMATS, LOCKFILE_NAMES, MANIFEST_NAME, PLATFORMS, TORCH_INDEX_URL,
+                                   InstallPlanner, pip_commands, render_constraints, render_requirements,
+                                   stack_name, write_lockfiles)
+
+SELECTION = {"torch": "2.9.1", "python": "3.12"}
+
+
+@pytest.fixture
+def rows(engine):
+    return engine.resolve(Filters.from_selection(**SELECTION))
+
+
+def _manifest(out_dir):
+    with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_every_stack_gets_every_format(data, rows, tmp_path):
+    stacks, written, unchanged = write_lockfiles(data, rows, str(tmp_path))
+    assert stacks == len(rows) * len(PLATFORMS)
+    assert (written, unchanged) == (stacks * len(LOCKFILE_FORMATS), 0)
+    manifest = _manifest(tmp_path)
+    assert manifest["data_version"] == data.data_version
+    assert len(manifest["stacks"]) == stacks
+    for name, files in manifest["stacks"].items():
+        assert sorted(files) == sorted(LOCKFILE_FORMATS)
+        for fmt, entry in files.items():
+            assert entry["path"] == f"{fmt}/{name}-{LOCKFILE_NAMES[fmt]}"
+            with open(tmp_path / entry["path"], "rb") as f:
+                assert hashlib.sha256(f.read()).hexdigest() == entry["sha256"]
+
+
+def test_rerun_leaves_unchanged_files_alone(data, rows, tmp_path):
+    _, written, _ = write_lockfiles(data, rows, str(tmp_path))
+    manifest = _manifest(tmp_path)
+    edited = tmp_path / next(iter(manifest["stacks"].values()))["requirements"]["path"]
+    untouched = tmp_path / next(iter(manifest["stacks"].values()))["uv"]["path"]
+    os.utime(untouched, (0, 0))
+    edited.write_text("stale\n", encoding="utf-8")
+
+    stacks, rewritten, unchanged = write_lockfiles(data, rows, str(tmp_path))
+    assert (rewritten, unchanged) == (1, written - 1)
+    assert os.stat(untouched).st_mtime == 0
+    assert edited.read_text(encoding="utf-8") != "stale\n"
+    assert _manifest(tmp_path) == manifest
+
+
+def test_format_and_platform_subsets(data, rows, tmp_path):
+    stacks, written, _ = write_lockfiles(data, rows, str(tmp_path), formats=("constraints",), platforms=("windows",))
+    assert stacks == written == len(rows)
+    assert sorted(os.listdir(tmp_path)) == ["constraints", MANIFEST_NAME]
+    assert all(name.endswith("-windows-constraints.txt") for name in os.listdir(tmp_path / "constraints"))
+
+
+def test_lockfiles_carry_the_install_command_pins(data, rows):
+    planner = InstallPlanner(data)
+    row = rows[0]
+    for platform in PLATFORMS:
+        plan = planner.plan(row, platform)
+        requirements = render_requirements(plan).splitlines()
+        assert f"--extra-index-url {TORCH_INDEX_URL}{plan.moniker}" in requirements
+        assert f"torch=={row.torch}" in requirements
+        assert f"{plan.triton_package}=={row.triton_pin}" in requirements
+        assert stack_name(plan).endswith(f"-py{row.python.replace('.', '')}-{platform}")
+    # On Linux every pin is one the install commands spell out
+    commands = pip_commands(planner.plan(row, "linux"))
+    assert all(line in commands for line in render_constraints(planner.plan(row, "linux")).splitlines()[1:])
+    assert planner.plan(row, "windows").triton_package == "triton-windows"
+
+
+def test_constraints_hold_bare_pins_only(data, rows):
+    planner = InstallPlanner(data)
+    for row in rows:
+        for line in render_constraints(planner.plan(row, "windows")).splitlines()[1:]:
+            assert "@" not in line and not line.startswith("--")
@@ -0,0 +1,148 @@
+import asyncio
+import json
+
+import pytest
+
+from compatibility_data import CompatibilityData
+from compatibility_engine import CompatibilityEngine, Filters
+from compatibility_server import MAX_BODY_BYTES, QueryService
+
+
+@pytest.fixture
+def service(engine):
+    return QueryService(engine)
+
+
+def _document(response):
+    status, body = response
+    return status, json.loads(body)
+
+
+def test_combos(service, engine):
+    status, document = _document(service.response("/combos?torch=2.9.1&python=3.12"))
+    rows = engine.resolve(Filters.from_selection(torch="2.9.1", python="3.12"))
+    assert status == 200
+    assert document["data_version"] == engine.data.data_version
+    assert document["matches"] == len(rows) > 0
+    assert document["combinations"] == [row.as_json() for row in rows]
+
+
+def test_repeated_parameters_select_several_values(service, engine):
+    status, document = _document(service.response("/combos?python=3.11&python=3.12&torch=2.9.1"))
+    assert status == 200
+    assert document["matches"] == len(engine.resolve(Filters.from_selection(python="3.11|3.12", torch="2.9.1")))
+    # Parameter order and a trailing slash don't matter to the response cache
+    assert service.response("/combos/?torch=2.9.1&python=3.11&python=3.12") is \
+        service.response("/combos?python=3.11&python=3.12&torch=2.9.1")
+
+
+@pytest.mark.parametrize("value, windows_only", [("false", False), ("0", False), ("no", False),
+                                                 ("true", True), ("1", True)])
+def test_windows_only_is_one_flag(service, engine, value, windows_only):
+    status, document = _document(service.response(f"/combos?torch=2.9.1&windows_only={value}"))
+    assert status == 200
+    assert document["matches"] == len(engine.resolve(Filters.from_selection(torch="2.9.1",
+                                                                            windows_only=windows_only)))
+
+
+def test_metapackages(service, engine):
+    metapackages = engine.data.cuda_metapackages
+    status, document = _document(service.response("/metapackages"))
+    assert status == 200 and document["metapackages"] == metapackages
+    cuda = next(iter(metapackages))
+    status, document = _document(service.response(f"/metapackages/{cuda}"))
+    assert status == 200 and document["metapackages"] == {cuda: metapackages[cuda]}
+
+
+@pytest.mark.parametrize("target, status", [("/metapackages/1.0", 404), ("/nowhere", 404),
+                                            ("/combos?cudnn=9", 400), ("/combos?torch=%3E%3D2.8,~%3D3", 400),
+                                            ("/combos?windows_only=0&windows_only=1", 400)])
+def test_errors(service, target, status):
+    found, document = _document(service.response(target))
+    assert found == status and "error" in document
+
+
+def test_reload_clears_responses():
+    service = QueryService(CompatibilityEngine(CompatibilityData()))
+    response = service.response("/metapackages")
+    assert service.response("/metapackages") is response
+    service.engine.data.load()
+    assert service.response("/metapackages") is not response
+
+
+async def _exchange(service, raw, responses=1):
+    # Sends raw bytes over one connection; returns [(status, headers, body)]
+    server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(raw)
+        await writer.drain()
+        results = []
+        for _ in range(responses):
+            lines = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+            status = int(lines[0].split(" ")[1])
+            headers = dict(line.split(": ", 1) for line in lines[1:] if line)
+            body = b""
+            if status != 304 and not raw.startswith(b"HEAD"):
+                body = await reader.readexactly(int(headers["Content-Length"]))
+            results.append((status, headers, body))
+        # Nothing else may follow: the server closes or waits for the next request
+        extra = await asyncio.wait_for(reader.read(), 1) if results[-1][1]["Connection"] == "close" else b""
+        assert extra == b""
+        return results
+    finally:
+        writer.close()
+        server.close()
+        await server.wait_closed()
+
+
+def _run(service, raw, responses=1):
+    return asyncio.run(_exchange(service, raw, responses))
+
+
+def test_etag_revalidation(service):
+    request = b"GET /combos?torch=2.9.1 HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n"
+    [(status, headers, body)] = _run(service, request)
+    assert status == 200 and headers["ETag"] == service.etag
+    assert json.loads(body)["matches"] > 0
+    request = ("GET /combos?torch=2.9.1 HTTP/1.1\r\nHost: x\r\n"
+               f"If-None-Match: {service.etag}\r\nConnection: close\r\n\r\n").encode("latin-1")
+    [(status, headers, body)] = _run(service, request)
+    assert status == 304 and body == b"" and headers["ETag"] == service.etag
+
+
+def test_keep_alive_and_head(service):
+    raw = (b"GET /metapackages HTTP/1.1\r\nHost: x\r\n\r\n"
+           b"GET /nowhere HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+    first, second = _run(service, raw, responses=2)
+    assert first[0] == 200 and first[1]["Connection"] == "keep-alive"
+    assert second[0] == 404 and "ETag" not in second[1]
+    [(status, headers, body)] = _run(service, b"HEAD /metapackages HTTP/1.0\r\n\r\n")
+    assert status == 200 and body == b"" and int(headers["Content-Length"]) > 0
+
+
+def test_request_body_is_discarded(service):
+    # The body looks like a request line; it must not be answered as one
+    body = b"GET /nowhere HTTP/1.1\r\n\r\n"
+    raw = (b"GET /metapackages HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body +
+           b"GET /metapackages/12.8.1 HTTP/1.1\r\nConnection: close\r\n\r\n")
+    first, second = _run(service, raw, responses=2)
+    assert first[0] == 200 and second[0] == 200
+    assert list(json.loads(second[2])["metapackages"]) == ["12.8.1"]
+
+
+@pytest.mark.parametrize("headers, status", [
+    (b"Transfer-Encoding: chunked\r\n", 400),
+    (b"Content-Length: 3\r\nContent-Length: 4\r\n", 400),
+    (b"Content-Length: x\r\n", 400),
+    (b"Content-Length: %d\r\n" % (MAX_BODY_BYTES + 1), 413),
+])
+def test_unframed_bodies_close_the_connection(service, headers, status):
+    [(found, response_headers, _)] = _run(service, b"GET /metapackages HTTP/1.1\r\n" + headers + b"\r\n")
+    assert found == status and response_headers["Connection"] == "close"
+
+
+def test_other_methods(service):
+    [(status, headers, _)] = _run(service, b"POST /combos HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}")
+    assert status == 405 and headers["Connection"] == "close"
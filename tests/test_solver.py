@@ -0,0 +1,76 @@
+import pytest
+
+from compatibility_engine import Filters
+from compatibility_solver import CRITERIA, StackSolver, parse_objective
+from compatibility_versions import Version
+
+SELECTIONS = [{}, {"python": "3.12"}, {"torch": "2.8.0", "windows_only": True}, {"cuda": "12.6"},
+              {"fa2": "2.8.2", "python": "3.12"}, {"bnb": "0.47.0", "python": "3.12"},
+              {"xformers": "0.0.32.post2"}, {"bnb": "0.49.2|0.48.2", "torch": ">=2.7"}]
+OBJECTIVES = [CRITERIA, ("verified", "python", "torch"), ("exact_cuda", "cuda", "fa2"), ("python",)]
+
+
+def brute_force_score(row, selection, objective):
+    # The solver's criteria, computed from the full resolve with the pinned
+    # add-on versions picked by plain comparison
+    picks = {}
+    for field in ("fa2", "xformers", "bnb"):
+        versions = getattr(row, field + "_versions")
+        if selection.get(field):
+            versions = [v for v in versions if v in selection[field].split("|")]
+        picks[field] = max(versions, key=Version) if versions else None
+    fa2, bnb = picks["fa2"], picks["bnb"]
+    values = {
+        "torch": row.torch.key,
+        "fa2": Version(fa2).key if fa2 else (),
+        "exact_cuda": -(bool(row.xformers_patch_diff) + (bnb in row.bnb_patch_diff)),
+        "verified": -((fa2 in row.fa2_assumed) + (bnb in row.bnb_assumed)),
+        "cuda": row.cuda.key,
+        "python": row.python.key,
+    }
+    return tuple(values[name] for name in objective), picks
+
+
+@pytest.mark.parametrize("objective", OBJECTIVES)
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_solve_matches_brute_force(engine, selection, objective):
+    filters = Filters.from_selection(**selection)
+    rows = engine.resolve(filters)
+    expected = sorted((brute_force_score(row, selection, objective)[0] for row in rows), reverse=True)
+    for k in (1, 3, 10):
+        picks = StackSolver(engine, objective).solve(filters, k)
+        assert [pick.score for pick in picks] == expected[:k]
+        for pick in picks:
+            assert pick.combination in rows
+            score, add_ons = brute_force_score(pick.combination, selection, objective)
+            assert pick.score == score
+            assert (pick.fa2, pick.xformers, pick.bnb) == (add_ons["fa2"], add_ons["xformers"], add_ons["bnb"])
+
+
+def test_pinned_add_ons_are_recommended(engine):
+    [pick] = StackSolver(engine).solve(Filters.from_selection(fa2="2.8.2", bnb="0.47.0", python="3.12"))
+    assert (pick.fa2, pick.bnb) == ("2.8.2", "0.47.0")
+    assert pick.display_cells()[5].rstrip("*") == "2.8.2"
+    assert pick.as_json()["bnb"] == "0.47.0"
+
+
+def test_search_prunes(engine):
+    solver = StackSolver(engine)
+    solver.solve(Filters(), 1)
+    assert solver.pruned > 0
+    assert solver.expanded < len(engine.data.torch_cuda)
+
+
+def test_nothing_matches(engine):
+    assert StackSolver(engine).solve(Filters.from_selection(torch="0.1.0")) == []
+
+
+def test_k_must_be_positive(engine):
+    with pytest.raises(ValueError):
+        StackSolver(engine).solve(Filters(), 0)
+
+
+def test_parse_objective():
+    assert parse_objective("python, torch,") == ("python", "torch")
+    with pytest.raises(ValueError):
+        parse_objective("torch,speed")
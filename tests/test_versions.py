@@ -0,0 +1,68 @@
+import itertools
+
+import pytest
+
+from compatibility_versions import Version, compile_specifier
+
+packaging_specifiers = pytest.importorskip("packaging.specifiers")
+
+RELEASES = ("2.7.9", "2.8", "2.8.0", "2.8.1", "2.9")
+SUFFIXES = ("", ".dev1", "a1", "rc1", "rc1.dev1", "rc1.post1", "rc2", ".post0.dev1", ".post1", ".post1.dev2",
+            ".post2")
+LOCALS = ("", "+cu128")
+VERSIONS = [release + suffix + local for release, suffix, local in itertools.product(RELEASES, SUFFIXES, LOCALS)]
+SPEC_VERSIONS = [release + suffix for release, suffix in itertools.product(RELEASES, SUFFIXES)]
+OPERATORS = ("==", "!=", "<=", ">=", "<", ">", "~=")
+
+
+def _specifiers():
+    for op, version in itertools.product(OPERATORS, SPEC_VERSIONS):
+        yield op + version
+    for release in RELEASES:
+        yield f"=={release}.*"
+        yield f"!={release}.*"
+        yield f"=={release}+cu128"
+
+
+@pytest.mark.parametrize("text", list(_specifiers()))
+def test_matches_packaging(text):
+    expected = packaging_specifiers.SpecifierSet(text)
+    accepts = compile_specifier(text)
+    mismatches = [version for version in VERSIONS
+                  if accepts(version) != expected.contains(version, prereleases=True)]
+    assert mismatches == []
+
+
+def test_exclusive_bounds_of_pre_releases():
+    accepts = compile_specifier(">2.8rc1")
+    assert all(accepts(v) for v in ("2.8", "2.8.0", "2.8.0.post1", "2.8.0+cu128"))
+    assert not compile_specifier(">2.8")("2.8.post1")
+    assert compile_specifier("<2.9.post1")("2.9.0rc1")
+    assert not compile_specifier("<2.9")("2.9.0rc1")
+
+
+def test_alternatives_and_names():
+    accepts = compile_specifier("torch>=2.8,<2.10|==2.7.1")
+    assert [v for v in ("2.7.0", "2.7.1", "2.8.0", "2.9.1", "2.10.0") if accepts(v)] == ["2.7.1", "2.8.0", "2.9.1"]
+
+
+def test_bare_family():
+    accepts = compile_specifier("12.8.1", bare_family=True)
+    assert accepts("12.8.0") and not accepts("12.9.1")
+
+
+def test_invalid_specifier():
+    with pytest.raises(ValueError):
+        compile_specifier(">=2.8,~=3")
+
+
+def test_compiled_specifiers_are_bounded():
+    for i in range(compile_specifier.cache_info().maxsize + 10):
+        compile_specifier(f">={i}")
+    info = compile_specifier.cache_info()
+    assert info.currsize == info.maxsize
+
+
+def test_version_ordering():
+    assert Version("2.8.0rc1") < Version("2.8.0") < Version("2.8.0.post1") < Version("2.8.1")
+    assert Version("2.8") == "2.8" and Version("2.8") is Version("2.8")
@@ -0,0 +1,146 @@
+import os
+
+import pytest
+
+from compatibility_engine import Filters
+from compatibility_install import InstallPlanner
+from compatibility_wheelhouse import (WheelhouseChecker, WheelhouseIndex, parse_wheel_filename, platform_compatible,
+                                      python_compatible, required_wheels)
+
+
+def touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+
+
+def bump(directory):
+    # Directory mtimes can be coarse; make every change visible
+    stat = os.stat(directory)
+    os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_parse_wheel_filename():
+    wheel = parse_wheel_filename("torch-2.9.1+cu128-cp312-cp312-manylinux_2_28_x86_64.whl")
+    assert wheel[:6] == ("torch", "2.9.1", "cu128", "cp312", "cp312", "manylinux_2_28_x86_64")
+    wheel = parse_wheel_filename("flash_attn-2.8.3+cu128torch2.7.0cxx11abiFALSE-cp312-cp312-win_amd64.whl")
+    assert (wheel.project, wheel.version, wheel.local) == ("flash-attn", "2.8.3", "cu128torch2.7.0cxx11abiFALSE")
+    assert parse_wheel_filename("triton-3.5.1-1-cp312-cp312-linux_x86_64.whl").version == "3.5.1"
+    assert parse_wheel_filename("sympy-1.14.0.tar.gz") is None
+    assert parse_wheel_filename("broken-1.0.whl") is None
+
+
+@pytest.mark.parametrize("filename, python, expected", [
+    ("x-1-cp312-cp312-linux_x86_64.whl", "3.12", True),
+    ("x-1-cp312-cp312-linux_x86_64.whl", "3.13", False),
+    ("x-1-cp39-abi3-linux_x86_64.whl", "3.12", True),
+    ("x-1-cp313-abi3-linux_x86_64.whl", "3.12", False),
+    ("x-1-py3-none-any.whl", "3.10", True),
+    ("x-1-py2.py3-none-any.whl", "3.12", True),
+])
+def test_python_compatible(filename, python, expected):
+    assert python_compatible(parse_wheel_filename(filename), python) is expected
+
+
+def test_platform_compatible():
+    linux = parse_wheel_filename("x-1-cp312-cp312-manylinux_2_17_x86_64.manylinux2014_x86_64.whl")
+    assert platform_compatible(linux, "linux") and not platform_compatible(linux, "windows")
+    universal = parse_wheel_filename("x-1-py3-none-any.whl")
+    assert platform_compatible(universal, "linux") and platform_compatible(universal, "windows")
+
+
+@pytest.fixture
+def wheelhouse(tmp_path):
+    root = tmp_path / "wheels"
+    touch(root / "torch" / "torch-2.9.1+cu128-cp312-cp312-manylinux_2_28_x86_64.whl")
+    touch(root / "torch" / "torch-2.9.1+cu126-cp312-cp312-manylinux_2_28_x86_64.whl")
+    touch(root / "extras" / "deep" / "xformers-0.0.33.post2-cp39-abi3-manylinux_2_28_x86_64.whl")
+    touch(root / "sympy-1.14.0-py3-none-any.whl")
+    touch(root / "README.txt")
+    touch(root / ".hidden" / "bitsandbytes-0.49.2-py3-none-manylinux_2_24_x86_64.whl")
+    return root
+
+
+def _index(root):
+    return WheelhouseIndex(str(root), str(root.parent / "index.cache"))
+
+
+def test_update_lists_only_changed_directories(wheelhouse):
+    index = _index(wheelhouse)
+    assert index.update() == 4
+    assert len(index) == 4
+    assert index.update() == 0
+
+    touch(wheelhouse / "extras" / "deep" / "bitsandbytes-0.49.2-py3-none-manylinux_2_24_x86_64.whl")
+    bump(wheelhouse / "extras" / "deep")
+    assert index.update() == 1
+    assert [w.path for w in index.find("bitsandbytes", "0.49.2", python="3.12", platform="linux")] == \
+        [os.path.join("extras", "deep", "bitsandbytes-0.49.2-py3-none-manylinux_2_24_x86_64.whl")]
+
+
+def test_removed_wheels_and_directories_drop_out(wheelhouse):
+    index = _index(wheelhouse)
+    index.update()
+    os.remove(wheelhouse / "torch" / "torch-2.9.1+cu126-cp312-cp312-manylinux_2_28_x86_64.whl")
+    bump(wheelhouse / "torch")
+    index.update()
+    assert [w.local for w in index.find("torch", "2.9.1")] == ["cu128"]
+
+    os.remove(wheelhouse / "extras" / "deep" / "xformers-0.0.33.post2-cp39-abi3-manylinux_2_28_x86_64.whl")
+    os.rmdir(wheelhouse / "extras" / "deep")
+    bump(wheelhouse / "extras")
+    index.update()
+    assert index.find("xformers", "0.0.33.post2") == []
+    assert index.versions("xformers") == []
+    assert len(index) == 2
+
+
+def test_saved_index_is_reused(wheelhouse):
+    index = _index(wheelhouse)
+    index.update()
+    reloaded = _index(wheelhouse)
+    assert reloaded.buckets == index.buckets
+    assert reloaded.update() == 0
+    # An index kept for another root is ignored
+    other = WheelhouseIndex(str(wheelhouse / "torch"), index.index_path)
+    assert other.buckets == {} and other.update() == 1
+
+
+def test_symlinked_directories_are_not_followed(wheelhouse):
+    os.symlink(wheelhouse, wheelhouse / "extras" / "loop", target_is_directory=True)
+    index = _index(wheelhouse)
+    assert index.update() == 4
+    assert len(index.find("torch", "2.9.1")) == 2
+
+
+def test_find_specifier(wheelhouse):
+    index = _index(wheelhouse)
+    index.update()
+    assert [w.version for w in index.find_specifier("sympy", ">=1.13.3", "3.12", "windows")] == ["1.14.0"]
+    assert index.find_specifier("sympy", "<1.13", "3.12", "linux") == []
+
+
+def test_checker_reports_missing_wheels(data, engine, tmp_path):
+    combo = engine.first(Filters.from_selection(torch="2.9.1", python="3.12", cuda="12.8"))
+    plan = InstallPlanner(data).plan(combo, "linux")
+    root = tmp_path / "wheels"
+    for project, version, local, _ in required_wheels(plan):
+        version = f"{version}+{local}" if local else version
+        touch(root / f"{project.replace('-', '_')}-{version}-cp312-cp312-manylinux_2_28_x86_64.whl")
+    touch(root / "sympy-1.14.0-py3-none-any.whl")
+    index = _index(root)
+    index.update()
+    assert WheelhouseChecker(index, data, "linux").missing(combo) == ()
+
+    os.remove(root / f"xformers-{plan.xformers}-cp312-cp312-manylinux_2_28_x86_64.whl")
+    bump(root)
+    index.update()
+    assert WheelhouseChecker(index, data, "linux").missing(combo) == (f"xformers=={plan.xformers}",)
+    # Nothing the Windows plan needs is there
+    assert len(WheelhouseChecker(index, data, "windows").missing(combo)) > 3
+
+
+def test_unwritable_index_location(wheelhouse, tmp_path):
+    index = WheelhouseIndex(str(wheelhouse), str(tmp_path / "missing" / "index.cache"))
+    assert index.update() == 4
+    assert not os.path.exists(tmp_path / "missing")
+    assert index.update() == 0
@@ -0,0 +1,497 @@
+import argparse
+import sys
+
+from compatibility_engine import ADDON_FIELDS, COMBINATION_HEADERS, FILTER_FIELDS, CompatibilityEngine, Filters
+
+# Headless command line front end for the compatibility engine. It never
+# imports PySide6, so it is cheap enough for shell loops and CI matrix
+# generation:
+#
+#   python -m torch_cuda_checker query --torch 2.9.1 --python 3.12 --cuda 12.8
+#   python -m torch_cuda_checker query --python 3.12 --format json
+#   python -m torch_cuda_checker query --python 3.12 --cuda 12.8 --limit 1
+#   python -m torch_cuda_checker recommend --python 3.12 --top 3
+#   python -m torch_cuda_checker builds --xformers 0.0.33.post2
+#   python -m torch_cuda_checker metapackages 12.8.1 --format csv
+#   python -m torch_cuda_checker cuda-release nvidia-cublas-cu12==12.8.4.1 nvidia-cuda-runtime-cu12==12.8.90
+#   python -m torch_cuda_checker export --python 3.12 --format html -o report.html
+#   python -m torch_cuda_checker detect
+#   python -m torch_cuda_checker audit ~/venvs /opt/conda --format csv
+#   python -m torch_cuda_checker lockfiles --python 3.12 -o locks --formats requirements,uv
+#   python -m torch_cuda_checker wheelhouse ./wheels --python 3.12 --platform windows
+#   python -m torch_cuda_checker ingest ground-truth
+#   python -m torch_cuda_checker batch fleet.jsonl --jobs 8 > resolved.jsonl
+#   python -m torch_cuda_checker serve --port 8765
+#
+# STARTUP BUDGET: a complete "query" run (interpreter start, imports, data
+# load from the compiled cache and one query) must finish within
+# STARTUP_BUDGET_MS of wall-clock time on top of a bare interpreter start.
+# "python -m torch_cuda_checker startup" measures it (best of --runs) and
+# exits non-zero when over. Importing argparse, re and pickle is most of
+# what remains; the solver, exporters and the other subcommands' parsers
+# are only loaded when asked for. With the modules' bytecode cached a run
+# costs 30-40 ms over the interpreter on an idle desktop. Without it
+# (PYTHONDONTWRITEBYTECODE, read-only installs) every module is compiled
+# from source on each start, which adds 15-20 ms, and on slow or loaded
+# machines that has measured around 90 ms, over the budget.
+
+STARTUP_BUDGET_MS = 80
+
+FORMATS = ("ascii", "json", "csv")
+
+# Every filter also takes a PEP 440 specifier set, "|" separating alternatives
+FILTER_HELP = {
+    "torch": "PyTorch version or specifier set, e.g. 2.9.1 or '>=2.8,<2.11'",
+    "python": "Python version or specifier set, e.g. 3.12 or '~=3.11' or '3.11|3.12'",
+    "cuda": "CUDA version, matching its major.minor family (12.8 or 12.8.1), or specifier set, e.g. '==12.*'",
+    "fa2": "Flash Attention 2 version",
+    "xformers": "xformers version",
+    "triton": "Triton version",
+    "bnb": "bitsandbytes version",
+}
+
+
+def add_filter_arguments(parser):
+    for field in FILTER_FIELDS:
+        parser.add_argument(f"--{field}", help=FILTER_HELP[field])
+    parser.add_argument("--windows-only", action="store_true",
+                        help="hide combinations lacking cuDNN on Windows")
+
+
+def filters_from_args(args):
+    filters = Filters.from_selection(windows_only=args.windows_only,
+                                     **{field: getattr(args, field) for field in FILTER_FIELDS})
+    try:
+        return filters.check_specifiers()
+    except ValueError as e:
+        sys.stderr.write(f"{e}\n")
+        sys.exit(2)
+
+
+def write_table(headers, rows, fmt, out, records=None):
+    # rows are lists of cell text; records, when given, replace them in JSON
+    if fmt == "json":
+        import json
+        if records is None:
+            records = [dict(zip(headers, row)) for row in rows]
+        # One compact record per line: indent= would bypass the C encoder
+        out.write("[\n" + ",\n".join(map(json.dumps, records)) + "\n]\n" if records else "[]\n")
+    elif fmt == "csv":
+        import csv
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(headers)
+        writer.writerows(rows)
+    else:
+        from compatibility_export import format_ascii_table
+        out.write(format_ascii_table(headers, rows) + "\n")
+
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise ValueError(f"{text} is not a positive integer")
+    return value
+
+
+def cmd_query(args, out):
+    # Streamed so --limit stops the join early instead of resolving everything
+    rows = list(CompatibilityEngine().iter_combinations(filters_from_args(args), args.limit))
+    if not rows and args.format == "ascii":
+        out.write("No compatible combinations found.\n")
+    else:
+        write_table(COMBINATION_HEADERS, [row.display_cells() for row in rows], args.format, out,
+                    records=[row.as_json() for row in rows])
+    return 0 if rows else 1
+
+
+def cmd_recommend(args, out):
+    from compatibility_solver import RECOMMENDATION_HEADERS, StackSolver
+    picks = StackSolver(CompatibilityEngine(), args.prefer).solve(filters_from_args(args), args.top)
+    if not picks and args.format == "ascii":
+        out.write("No compatible combinations found.\n")
+    else:
+        write_table(RECOMMENDATION_HEADERS, [pick.display_cells() for pick in picks], args.format, out,
+                    records=[pick.as_json() for pick in picks])
+    return 0 if picks else 1
+
+
+def cmd_builds(args, out):
+    versions = {field: getattr(args, field) for field in ADDON_FIELDS}
+    if not any(versions.values()):
+        sys.stderr.write("Give at least one add-on version, e.g. --xformers 0.0.33.post2\n")
+        return 2
+    builds = CompatibilityEngine().supported_builds(args.exact, **versions)
+    # Newest torch and CUDA first, pythons ascending within a build
+    builds = sorted(builds, key=lambda build: build[2].key)
+    rows = [list(build) for build in sorted(builds, key=lambda build: (build[0].key, build[1].key), reverse=True)]
+    write_table(["PyTorch", "CUDA", "Python"], rows, args.format, out)
+    return 0 if rows else 1
+
+
+def cmd_export(args, out):
+    from compatibility_export import export_report
+    filters = filters_from_args(args)
+    engine = CompatibilityEngine()
+    labels = [(field, getattr(filters, field) or "Any") for field in FILTER_FIELDS]
+    labels.append(("windows_only", "Yes" if filters.windows_only else "No"))
+    # Matrix-wide column widths let even an unfiltered ASCII export stream
+    widths = [len(text) for text in engine.matrix.longest_cells()]
+    target = open(args.output, "w", encoding="utf-8", newline="") if args.output else out
+    try:
+        count = export_report(target, args.format, engine.iter_combinations(filters),
+                              engine.metapackage_view(filters.cuda), labels, widths)
+    finally:
+        if args.output:
+            target.close()
+    return 0 if count else 1
+
+
+def cmd_detect(args, out):
+    from compatibility_environment import check_environment, environment_filters, scan_environment
+    env = scan_environment(args.path, args.python)
+    problems = {}
+    for mismatch in check_environment(CompatibilityEngine(), env):
+        problems.setdefault(mismatch.package, []).append(mismatch.problem)
+    installed = [("python", env.python)] + sorted(env.packages.items())
+    installed += [(f"nvidia-{component}", version) for component, version in sorted(env.nvidia.items())]
+    rows = [[name, version or "-", "; ".join(problems.pop(name, ()))] for name, version in installed]
+    rows += [[name, "-", "; ".join(found)] for name, found in problems.items()]
+    write_table(["Package", "Installed", "Problem"], rows, args.format, out)
+    if args.format == "ascii":
+        selected = environment_filters(env)
+        out.write("Filters: " + " ".join(f"--{field} {value}" for field, value in selected.items()
+                                         if value != "Any") + "\n")
+    return 1 if any(row[2] for row in rows) else 0
+
+
+def cmd_audit(args, out):
+    from compatibility_environment import audit_environments, find_environments, torch_cuda_family
+    prefixes = []
+    for path in args.paths:
+        found = find_environments(path)
+        if not found:
+            sys.stderr.write(f"No virtualenv or conda environment found in {path}\n")
+        prefixes.extend(prefix for prefix in found if prefix not in prefixes)
+    rows = []
+    records = []
+    for prefix, env, mismatches in audit_environments(CompatibilityEngine(), prefixes, args.jobs):
+        problems = [f"{m.package} {m.installed}: {m.problem}" if m.installed else m.problem for m in mismatches]
+        cuda = torch_cuda_family(env)
+        rows.append([prefix, env.python or "-", env.packages.get("torch", "-"), cuda or "-", "; ".join(problems)])
+        records.append({"environment": prefix, "python": env.python, "packages": env.packages,
+                        "nvidia": env.nvidia, "cuda": cuda, "mismatches": [m._asdict() for m in mismatches]})
+    write_table(["Environment", "Python", "PyTorch", "CUDA", "Problems"], rows, args.format, out, records)
+    return 1 if not rows or any(row[4] for row in rows) else 0
+
+
+def cmd_lockfiles(args, out):
+    from compatibility_install import LOCKFILE_FORMATS, PLATFORMS, write_lockfiles
+    choices = {}
+    for name, allowed in (("formats", LOCKFILE_FORMATS), ("platforms", PLATFORMS)):
+        text = getattr(args, name)
+        picked = tuple(part.strip() for part in text.split(",") if part.strip()) if text else allowed
+        unknown = [part for part in picked if part not in allowed]
+        if unknown:
+            sys.stderr.write(f"unknown {name[:-1]} {unknown[0]!r}; expected some of {', '.join(allowed)}\n")
+            return 2
+        choices[name] = picked
+    filters = filters_from_args(args)
+    engine = CompatibilityEngine()
+    stacks, written, unchanged = write_lockfiles(
+        engine.data, engine.iter_combinations(filters), args.output, choices["formats"], choices["platforms"])
+    out.write(f"{stacks} stacks: {written} files written, {unchanged} unchanged -> {args.output}\n")
+    return 0 if stacks else 1
+
+
+def cmd_wheelhouse(args, out):
+    import os
+    from compatibility_wheelhouse import WheelhouseChecker, WheelhouseIndex
+    if not os.path.isdir(args.directory):
+        sys.stderr.write(f"No such directory: {args.directory}\n")
+        return 2
+    filters = filters_from_args(args)
+    engine = CompatibilityEngine()
+    index = WheelhouseIndex(args.directory, args.index)
+    index.update()
+    checker = WheelhouseChecker(index, engine.data, args.platform)
+    rows = []
+    records = []
+    for combo in engine.iter_combinations(filters):
+        missing = checker.missing(combo)
+        rows.append([combo.torch, combo.python, combo.cuda, ", ".join(missing) or "-"])
+        records.append({**combo.as_json(), "platform": args.platform, "missing": list(missing)})
+    complete = sum(not record["missing"] for record in records)
+    write_table(["PyTorch", "Python", "CUDA", "Missing"], rows, args.format, out, records)
+    if args.format == "ascii":
+        out.write(f"{complete} of {len(rows)} combinations installable from {len(index)} wheels "
+                  f"({args.platform})\n")
+    return 0 if complete else 1
+
+
+def cmd_ingest(args, out):
+    import os
+    from compatibility_data import DATA_PATH
+    from compatibility_ingest import ingest
+    if not os.path.isdir(args.directory):
+        sys.stderr.write(f"No such directory: {args.directory}\n")
+        return 2
+    output = args.output or DATA_PATH
+    (files, parsed, cached, skipped), warnings, changed = ingest(args.directory, output, args.jobs)
+    for warning in warnings:
+        sys.stderr.write(f"warning: {warning}\n")
+    out.write(f"{files} files: {parsed} parsed, {cached} unchanged, {skipped} not ground truth\n")
+    out.write(f"Updated {', '.join(changed)} -> {output}\n" if changed else f"{output} is up to date\n")
+    return 0
+
+
+def cmd_metapackages(args, out):
+    view = CompatibilityEngine().metapackage_view(args.cuda)
+    if view is None:
+        sys.stderr.write(f"No metapackage data available for CUDA {args.cuda}\n")
+        return 1
+    headers, rows = view
+    write_table(headers, rows, args.format, out)
+    return 0
+
+
+def cmd_cuda_release(args, out):
+    from compatibility_environment import NVIDIA_PREFIX, normalize_name, nvidia_component, scan_environment
+    if args.components:
+        components = {}
+        for text in args.components:
+            name, sep, version = text.partition("==")
+            if not sep:
+                name, sep, version = text.partition("=")
+            if not sep or not name.strip() or not version.strip():
+                sys.stderr.write(f"Expected component==version, got {text!r}\n")
+                return 2
+            name = normalize_name(name.strip())
+            components[nvidia_component(name) if name.startswith(NVIDIA_PREFIX) else name] = version.strip()
+    else:
+        components = scan_environment(args.path).nvidia
+    matches = CompatibilityEngine().match_cuda_release(components)
+    rows = []
+    for match in matches:
+        known = len(match.matched) + len(match.mismatched)
+        rows.append([match.cuda, f"{len(match.matched)}/{known}",
+                     ", ".join(f"{name} {installed} (expected {expected})"
+                               for name, installed, expected in match.mismatched)])
+    if not rows and args.format == "ascii":
+        out.write("No CUDA release matches the installed components.\n")
+    else:
+        write_table(["CUDA", "Matched", "Disagreeing"], rows, args.format, out,
+                    records=[{"cuda": m.cuda, "matched": m.matched,
+                              "mismatched": [dict(zip(("component", "installed", "expected"), triple))
+                                             for triple in m.mismatched]} for m in matches])
+    return 0 if matches and not matches[0].mismatched else 1
+
+
+def cmd_batch(args, out):
+    from compatibility_batch import read_specs, resolve_batch, write_batch
+    write_batch(resolve_batch(read_specs(args.specs), args.jobs), out)
+    return 0
+
+
+def cmd_serve(args, out):
+    from compatibility_server import serve
+    serve(args.host, args.port)
+    return 0
+
+
+def cmd_bench(args, out):
+    from compatibility_server import bench_targets, benchmark
+    targets = bench_targets(CompatibilityEngine())
+    rate, p50, p99 = benchmark(args.url, targets, args.connections, args.requests)
+    out.write(f"{args.requests} requests over {args.connections} connections: "
+              f"{rate:.0f} req/s  p50: {p50:.2f} ms  p99: {p99:.2f} ms\n")
+    return 0
+
+
+def cmd_startup(args, out):
+    import subprocess
+    import time
+
+    def best_of(command):
+        best = None
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    # Warm the compiled data cache first so it's the steady state that is measured
+    subprocess.run([sys.executable, "-m", "torch_cuda_checker", "query"], stdout=subprocess.DEVNULL)
+    bare = best_of([sys.executable, "-c", "pass"])
+    query = best_of([sys.executable, "-m", "torch_cuda_checker", "query", "--format", "json"])
+    overhead = query - bare
+    out.write(f"interpreter: {bare:.1f} ms  query: {query:.1f} ms  "
+              f"overhead: {overhead:.1f} ms  budget: {STARTUP_BUDGET_MS} ms\n")
+    if sys.flags.dont_write_bytecode:
+        out.write("note: bytecode caching is off, so every run compiled the modules from source\n")
+    return 0 if overhead <= STARTUP_BUDGET_MS else 1
+
+
+def add_query_arguments(parser):
+    add_filter_arguments(parser)
+    parser.add_argument("--format", choices=FORMATS, default="ascii")
+    parser.add_argument("--limit", type=positive_int, default=None,
+                        help="stop after this many rows (newest torch first); 1 gives the newest stack")
+    parser.set_defaults(func=cmd_query)
+
+
+def add_recommend_arguments(parser):
+    from compatibility_solver import DEFAULT_OBJECTIVE, parse_objective
+    add_filter_arguments(parser)
+    parser.add_argument("--top", type=positive_int, default=1, help="also list the next best alternatives")
+    parser.add_argument("--prefer", type=parse_objective, default=DEFAULT_OBJECTIVE,
+                        help="comma-separated criteria, most important first "
+                             f"(default: {','.join(DEFAULT_OBJECTIVE)})")
+    parser.add_argument("--format", choices=FORMATS, default="ascii")
+    parser.set_defaults(func=cmd_recommend)
+
+
+def add_builds_arguments(parser):
+    for field in ADDON_FIELDS:
+        parser.add_argument(f"--{field}", help=FILTER_HELP[field])
+    parser.add_argument("--exact", action="store_true", help="leave out matches on a different CUDA patch (~)")
+    parser.add_argument("--format", choices=FORMATS, default="ascii")
+    parser.set_defaults(func=cmd_builds)
+
+
+def add_export_arguments(parser):
+    from compatibility_export import EXPORT_FORMATS
+    add_filter_arguments(parser)
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ascii")
+    parser.add_argument("-o", "--output", help="file to write (default: stdout)")
+    parser.set_defaults(func=cmd_export)
+
+
+def add_detect_arguments(parser):
+    parser.add_argument("--path", action="append",
+                        help="site-packages directory to scan, repeatable (default: this interpreter's)")
+    parser.add_argument("--python", help="Python version of that environment (default: from the path)")
+    parser.add_argument("--format", choices=FORMATS, default="ascii")
+    parser.set_defaults(func=cmd_detect)
+
+
+def add_audit_arguments(parser):
+    parser.add_argument("paths", nargs="+", help="environment prefixes, or directories holding environments")
+    parser.add_argument("--jobs", type=positive_int, default=8, help="concurrent scans (default: 8)")
+    parser.add_argument("--format", choices=FORMATS, default="ascii")
+    parser.set_defaults(func=cmd_audit)
+
+
+def add_lockfiles_arguments(parser):
+    add_filter_arguments(parser)
+    parser.add_argument("-o", "--output", required=True, help="directory to write into")
+    parser.add_argument("--formats", help="comma-separated subset of requirements,constraints,uv,conda (default: all)")
+    parser.add_argument("--platforms", help="comma-separated subset of linux,windows (default: both)")
+    parser.set_defaults(func=cmd_lockfiles)
+
+
+def add_wheelhouse_arguments(parser):
+    parser.add_argument("directory", help="directory tree of downloaded *.whl files")
+    add_filter_arguments(parser)
+    parser.add_argument("--platform", choices=("linux", "windows"),
+                        default="windows" if sys.platform == "win32" else "linux")
+    parser.add_argument("--index", help="index file to keep (default: one per directory next to the data cache)")
+    parser.add_argument("--format", choices=FORMATS, default="ascii")
+    parser.set_defaults(func=cmd_wheelhouse)
+
+
+def add_ingest_arguments(parser):
+    parser.add_argument("directory", help="ground-truth directory, see compatibility_ingest.py for the file names")
+    parser.add_argument("-o", "--output", help="data file to update (default: compatibility_data.json)")
+    parser.add_argument("--jobs", type=positive_int, default=None, help="worker processes (default: CPU count)")
+    parser.set_defaults(func=cmd_ingest)
+
+
+def add_metapackages_arguments(parser):
+    parser.add_argument("cuda", nargs="?", help="CUDA release, e.g. 12.8.1 (default: all)")
+    parser.add_argument("--format", choices=FORMATS, default="ascii")
+    parser.set_defaults(func=cmd_metapackages)
+
+
+def add_cuda_release_arguments(parser):
+    parser.add_argument("components", nargs="*",
+                        help="component==version pins, e.g. nvidia-cublas-cu12==12.8.4.1 or cublas=12.8.4.1 "
+                             "(default: the nvidia-* wheels installed in --path)")
+    parser.add_argument("--path", action="append",
+                        help="site-packages directory to scan, repeatable (default: this interpreter's)")
+    parser.add_argument("--format", choices=FORMATS, default="ascii")
+    parser.set_defaults(func=cmd_cuda_release)
+
+
+def add_batch_arguments(parser):
+    parser.add_argument("specs", help="JSONL file of filter objects, or CSV with one column per filter")
+    parser.add_argument("--jobs", type=positive_int, default=None, help="worker processes (default: CPU count)")
+    parser.set_defaults(func=cmd_batch)
+
+
+def add_serve_arguments(parser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.set_defaults(func=cmd_serve)
+
+
+def add_bench_arguments(parser):
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--connections", type=positive_int, default=8)
+    parser.add_argument("--requests", type=positive_int, default=5000)
+    parser.set_defaults(func=cmd_bench)
+
+
+def add_startup_arguments(parser):
+    parser.add_argument("--runs", type=int, default=10)
+    parser.set_defaults(func=cmd_startup)
+
+
+# name: (help, function adding its arguments), in the order --help lists them
+SUBCOMMANDS = {
+    "query": ("list compatible combinations", add_query_arguments),
+    "recommend": ("pick the best stack for the given pins", add_recommend_arguments),
+    "builds": ("list the torch/CUDA/python builds that run given add-on versions", add_builds_arguments),
+    "export": ("write a report of the matching combinations", add_export_arguments),
+    "detect": ("check the torch stack installed in a Python environment", add_detect_arguments),
+    "audit": ("check every virtualenv/conda environment under some directories", add_audit_arguments),
+    "lockfiles": ("write install lockfiles for every matching combination", add_lockfiles_arguments),
+    "wheelhouse": ("check which combinations a local wheel directory can install", add_wheelhouse_arguments),
+    "ingest": ("update the data file from a directory of ground-truth files", add_ingest_arguments),
+    "metapackages": ("show CUDA metapackage versions", add_metapackages_arguments),
+    "cuda-release": ("find the CUDA release installed nvidia-* wheels belong to", add_cuda_release_arguments),
+    "batch": ("resolve a JSONL or CSV file of filter specs", add_batch_arguments),
+    "serve": ("answer queries over HTTP from one warm process", add_serve_arguments),
+    "bench": ("measure requests/sec and latency of a running server", add_bench_arguments),
+    "startup": ("measure startup time against the budget", add_startup_arguments),
+}
+
+
+def build_parser(command=None):
+    # Given the subcommand about to run, only its parser is built: setting up
+    # all of them is a sizeable slice of the startup budget
+    parser = argparse.ArgumentParser(
+        prog="torch_cuda_checker",
+        description="Check compatibility between torch, CUDA, python and common ML libraries.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, (summary, add_arguments) in SUBCOMMANDS.items():
+        if command is None or name == command:
+            add_arguments(commands.add_parser(name, help=summary))
+    return parser
+
+
+def main(argv=None, out=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    args = build_parser(argv[0] if argv and argv[0] in SUBCOMMANDS else None).parse_args(argv)
+    try:
+        return args.func(args, out if out is not None else sys.stdout)
+    except BrokenPipeError:
+        # Output piped into head & co.; silence the flush at interpreter exit
+        import os
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())